@@ -0,0 +1,30 @@
+"""Listado de inventario paginado por (nombre, id)
+
+Revision ID: 3f8b2d6e9a14
+Revises: 7c4e9a2f1d63
+Create Date: 2026-10-19 09:12:40.561203
+
+ultima_actualizacion cambia con cada venta o movimiento: paginar por esa columna
+saltaba o repetía items actualizados entre páginas.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8b2d6e9a14'
+down_revision: Union[str, None] = '7c4e9a2f1d63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_items_inventario_sucursal_actualizacion', table_name='items_inventario')
+    op.create_index('ix_items_inventario_sucursal_nombre', 'items_inventario', ['sucursal_id', 'nombre', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_items_inventario_sucursal_nombre', table_name='items_inventario')
+    op.create_index('ix_items_inventario_sucursal_actualizacion', 'items_inventario', ['sucursal_id', 'ultima_actualizacion', 'id'], unique=False)
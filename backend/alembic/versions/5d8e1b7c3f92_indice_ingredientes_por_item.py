@@ -0,0 +1,28 @@
+"""Índice inverso de ingredientes por item de inventario
+
+Revision ID: 5d8e1b7c3f92
+Revises: a4d7c2e91b58
+Create Date: 2026-10-18 21:05:12.418207
+
+Al cambiar el costo de un item se recalculan solo las recetas que lo usan
+(CostosRecetasService.recalcular_por_items), buscándolas por item_inventario_id.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8e1b7c3f92'
+down_revision: Union[str, None] = 'a4d7c2e91b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_ingredientes_receta_item_inventario_id'), 'ingredientes_receta', ['item_inventario_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ingredientes_receta_item_inventario_id'), table_name='ingredientes_receta')
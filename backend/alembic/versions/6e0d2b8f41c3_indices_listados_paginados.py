@@ -0,0 +1,44 @@
+"""Índices compuestos para listados paginados por cursor
+
+Revision ID: 6e0d2b8f41c3
+Revises: a1c93e5d7b20
+Create Date: 2026-10-18 14:05:32.190447
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e0d2b8f41c3'
+down_revision: Union[str, None] = 'a1c93e5d7b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_ventas_sucursal_fecha', 'ventas', ['sucursal_id', 'fecha_creacion', 'id'], unique=False)
+    op.create_index('ix_ventas_sucursal_estado_fecha', 'ventas', ['sucursal_id', 'estado', 'fecha_creacion', 'id'], unique=False)
+    op.create_index(op.f('ix_items_venta_venta_id'), 'items_venta', ['venta_id'], unique=False)
+    op.create_index('ix_movimientos_sucursal_fecha', 'movimientos_inventario', ['sucursal_id', 'fecha_creacion', 'id'], unique=False)
+    op.create_index('ix_movimientos_sucursal_tipo_fecha', 'movimientos_inventario', ['sucursal_id', 'tipo_movimiento', 'fecha_creacion', 'id'], unique=False)
+    op.create_index('ix_movimientos_item_fecha', 'movimientos_inventario', ['item_inventario_id', 'fecha_creacion', 'id'], unique=False)
+    op.create_index('ix_ordenes_compra_sucursal_fecha', 'ordenes_compra', ['sucursal_id', 'fecha_creacion', 'id'], unique=False)
+    op.create_index('ix_ordenes_compra_sucursal_estado_fecha', 'ordenes_compra', ['sucursal_id', 'estado', 'fecha_creacion', 'id'], unique=False)
+    op.create_index(op.f('ix_items_orden_compra_orden_compra_id'), 'items_orden_compra', ['orden_compra_id'], unique=False)
+    op.create_index('ix_items_inventario_sucursal_actualizacion', 'items_inventario', ['sucursal_id', 'ultima_actualizacion', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_items_inventario_sucursal_actualizacion', table_name='items_inventario')
+    op.drop_index(op.f('ix_items_orden_compra_orden_compra_id'), table_name='items_orden_compra')
+    op.drop_index('ix_ordenes_compra_sucursal_estado_fecha', table_name='ordenes_compra')
+    op.drop_index('ix_ordenes_compra_sucursal_fecha', table_name='ordenes_compra')
+    op.drop_index('ix_movimientos_item_fecha', table_name='movimientos_inventario')
+    op.drop_index('ix_movimientos_sucursal_tipo_fecha', table_name='movimientos_inventario')
+    op.drop_index('ix_movimientos_sucursal_fecha', table_name='movimientos_inventario')
+    op.drop_index(op.f('ix_items_venta_venta_id'), table_name='items_venta')
+    op.drop_index('ix_ventas_sucursal_estado_fecha', table_name='ventas')
+    op.drop_index('ix_ventas_sucursal_fecha', table_name='ventas')
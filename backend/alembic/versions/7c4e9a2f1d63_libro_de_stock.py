@@ -0,0 +1,81 @@
+"""Libro de stock: delta y saldo en movimientos, snapshots_inventario
+
+Revision ID: 7c4e9a2f1d63
+Revises: d2a8e5f17c64
+Create Date: 2026-10-18 23:02:17.418265
+
+Desde aquí cada cambio de stock escribe un movimiento con su delta firmado e
+items_inventario.cantidad es la proyección del libro (ver app/services/kardex_service.py).
+Las ventas no registraban movimientos, así que el histórico no explica el stock actual:
+se toma un snapshot de apertura de cada item con su cantidad y el libro parte de ahí.
+"""
+import uuid
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c4e9a2f1d63'
+down_revision: Union[str, None] = 'd2a8e5f17c64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('movimientos_inventario', sa.Column('delta', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('movimientos_inventario', sa.Column('saldo', sa.Float(), nullable=True))
+    # Delta de los movimientos existentes según su tipo (igual que crear_movimiento)
+    op.execute("""
+        UPDATE movimientos_inventario SET delta = CASE
+            WHEN tipo_movimiento IN ('ENTRADA', 'COMPRA', 'DEVOLUCION', 'AJUSTE') THEN cantidad
+            WHEN tipo_movimiento IN ('SALIDA', 'VENTA', 'MERMA', 'ROBO', 'CADUCIDAD') THEN -cantidad
+            ELSE 0
+        END
+    """)
+
+    op.create_table('snapshots_inventario',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('item_inventario_id', sa.String(), nullable=False),
+    sa.Column('sucursal_id', sa.String(), nullable=False),
+    sa.Column('cantidad', sa.Float(), nullable=False),
+    sa.Column('fecha', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['item_inventario_id'], ['items_inventario.id'], ),
+    sa.ForeignKeyConstraint(['sucursal_id'], ['sucursales.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_snapshots_inventario_id'), 'snapshots_inventario', ['id'], unique=False)
+    op.create_index('ix_snapshots_item_fecha', 'snapshots_inventario', ['item_inventario_id', 'fecha'], unique=False)
+
+    conexion = op.get_bind()
+    items = sa.table(
+        'items_inventario',
+        sa.column('id', sa.String), sa.column('sucursal_id', sa.String), sa.column('cantidad', sa.Float)
+    )
+    snapshots = sa.table(
+        'snapshots_inventario',
+        sa.column('id', sa.String), sa.column('item_inventario_id', sa.String),
+        sa.column('sucursal_id', sa.String), sa.column('cantidad', sa.Float),
+        sa.column('fecha', sa.DateTime), sa.column('created_at', sa.DateTime)
+    )
+    apertura = datetime.utcnow()
+    filas = [
+        {"id": str(uuid.uuid4()), "item_inventario_id": item_id, "sucursal_id": sucursal_id,
+         "cantidad": cantidad or 0.0, "fecha": apertura, "created_at": apertura}
+        for item_id, sucursal_id, cantidad in conexion.execute(
+            sa.select(items.c.id, items.c.sucursal_id, items.c.cantidad)
+        )
+    ]
+    if filas:
+        op.bulk_insert(snapshots, filas)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_snapshots_item_fecha', table_name='snapshots_inventario')
+    op.drop_index(op.f('ix_snapshots_inventario_id'), table_name='snapshots_inventario')
+    op.drop_table('snapshots_inventario')
+    op.drop_column('movimientos_inventario', 'saldo')
+    op.drop_column('movimientos_inventario', 'delta')
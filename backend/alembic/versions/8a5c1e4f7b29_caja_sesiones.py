@@ -0,0 +1,47 @@
+"""Tabla caja_sesiones
+
+Revision ID: 8a5c1e4f7b29
+Revises: 6e0d2b8f41c3
+Create Date: 2026-10-19 09:41:05.227318
+
+La tabla existía solo por Base.metadata.create_all y c27f5a09d8e4 le agrega un
+índice: en una base vacía `alembic upgrade head` fallaba. Las bases existentes ya la
+tienen y se dejan como están.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a5c1e4f7b29'
+down_revision: Union[str, None] = '6e0d2b8f41c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table('caja_sesiones'):
+        return
+    op.create_table('caja_sesiones',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('sucursal_id', sa.String(), nullable=False),
+    sa.Column('usuario_id', sa.String(), nullable=False),
+    sa.Column('fecha_apertura', sa.DateTime(), nullable=False),
+    sa.Column('fecha_cierre', sa.DateTime(), nullable=True),
+    sa.Column('monto_inicial', sa.Float(), nullable=False),
+    sa.Column('monto_final', sa.Float(), nullable=True),
+    sa.Column('monto_sistema', sa.Float(), nullable=True),
+    sa.Column('diferencia', sa.Float(), nullable=True),
+    sa.Column('estado', sa.String(), nullable=False),
+    sa.Column('comentarios', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['sucursal_id'], ['sucursales.id'], ),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    # Puede venir de create_all con datos: no se borra
+    pass
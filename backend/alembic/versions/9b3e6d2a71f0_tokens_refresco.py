@@ -0,0 +1,45 @@
+"""Tokens de refresco rotativos
+
+Revision ID: 9b3e6d2a71f0
+Revises: c27f5a09d8e4
+Create Date: 2026-10-18 17:04:12.512873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3e6d2a71f0'
+down_revision: Union[str, None] = 'c27f5a09d8e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('tokens_refresco',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('usuario_id', sa.String(), nullable=False),
+    sa.Column('familia_id', sa.String(), nullable=False),
+    sa.Column('token_hash', sa.String(), nullable=False),
+    sa.Column('creado_en', sa.DateTime(), nullable=True),
+    sa.Column('expira_en', sa.DateTime(), nullable=False),
+    sa.Column('usado_en', sa.DateTime(), nullable=True),
+    sa.Column('revocado_en', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tokens_refresco_id'), 'tokens_refresco', ['id'], unique=False)
+    op.create_index(op.f('ix_tokens_refresco_usuario_id'), 'tokens_refresco', ['usuario_id'], unique=False)
+    op.create_index(op.f('ix_tokens_refresco_familia_id'), 'tokens_refresco', ['familia_id'], unique=False)
+    op.create_index(op.f('ix_tokens_refresco_revocado_en'), 'tokens_refresco', ['revocado_en'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_tokens_refresco_revocado_en'), table_name='tokens_refresco')
+    op.drop_index(op.f('ix_tokens_refresco_familia_id'), table_name='tokens_refresco')
+    op.drop_index(op.f('ix_tokens_refresco_usuario_id'), table_name='tokens_refresco')
+    op.drop_index(op.f('ix_tokens_refresco_id'), table_name='tokens_refresco')
+    op.drop_table('tokens_refresco')
@@ -0,0 +1,105 @@
+"""Snapshot de costo unitario y versión de receta en items_venta
+
+Revision ID: a1c93e5d7b20
+Revises: f4550173c587
+Create Date: 2026-10-18 11:40:07.552913
+
+Backfill de filas existentes, en orden de preferencia:
+  1. Última versiones_receta creada antes de la venta (costo / porciones).
+  2. Costo de ingredientes según historial_costos_inventario a la fecha de la venta.
+  3. Costo y versión actuales de la receta.
+
+Después de migrar, regenerar el resumen diario con:
+    python scripts/backfill_resumen_ventas.py
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c93e5d7b20'
+down_revision: Union[str, None] = 'f4550173c587'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('items_venta', sa.Column('costo_unitario', sa.Float(), nullable=True))
+    op.add_column('items_venta', sa.Column('receta_version', sa.Integer(), nullable=True))
+
+    # 1. Versión de receta vigente al momento de la venta
+    op.execute("""
+        UPDATE items_venta SET
+            costo_unitario = (
+                SELECT vr.costo / CASE WHEN vr.porciones > 0 THEN vr.porciones ELSE 1 END
+                FROM versiones_receta vr, ventas v
+                WHERE v.id = items_venta.venta_id
+                  AND vr.receta_id = items_venta.receta_id
+                  AND vr.created_at <= v.fecha_creacion
+                ORDER BY vr.created_at DESC, vr.numero_version DESC
+                LIMIT 1
+            ),
+            receta_version = (
+                SELECT vr.numero_version
+                FROM versiones_receta vr, ventas v
+                WHERE v.id = items_venta.venta_id
+                  AND vr.receta_id = items_venta.receta_id
+                  AND vr.created_at <= v.fecha_creacion
+                ORDER BY vr.created_at DESC, vr.numero_version DESC
+                LIMIT 1
+            )
+        WHERE receta_id IS NOT NULL
+    """)
+
+    # 2. Costo de ingredientes con el último costo histórico previo a la venta
+    op.execute("""
+        UPDATE items_venta SET
+            costo_unitario = (
+                SELECT SUM(ir.cantidad * (
+                           SELECT h.costo_unitario
+                           FROM historial_costos_inventario h
+                           WHERE h.item_inventario_id = ir.item_inventario_id
+                             AND h.fecha <= v.fecha_creacion
+                           ORDER BY h.fecha DESC
+                           LIMIT 1
+                       )) / CASE WHEN r.porciones > 0 THEN r.porciones ELSE 1 END
+                FROM ingredientes_receta ir, recetas r, ventas v
+                WHERE ir.receta_id = items_venta.receta_id
+                  AND r.id = items_venta.receta_id
+                  AND v.id = items_venta.venta_id
+                GROUP BY r.porciones
+            )
+        WHERE receta_id IS NOT NULL AND costo_unitario IS NULL
+          AND EXISTS (SELECT 1 FROM ingredientes_receta ir WHERE ir.receta_id = items_venta.receta_id)
+          AND NOT EXISTS (
+              -- Solo si todos los ingredientes tienen costo histórico a esa fecha
+              SELECT 1 FROM ingredientes_receta ir, ventas v
+              WHERE ir.receta_id = items_venta.receta_id
+                AND v.id = items_venta.venta_id
+                AND NOT EXISTS (
+                    SELECT 1 FROM historial_costos_inventario h
+                    WHERE h.item_inventario_id = ir.item_inventario_id
+                      AND h.fecha <= v.fecha_creacion
+                )
+          )
+    """)
+
+    # 3. Costo y versión actuales de la receta
+    op.execute("""
+        UPDATE items_venta SET
+            costo_unitario = COALESCE(costo_unitario, (
+                SELECT r.costo / CASE WHEN r.porciones > 0 THEN r.porciones ELSE 1 END
+                FROM recetas r WHERE r.id = items_venta.receta_id
+            )),
+            receta_version = COALESCE(receta_version, (
+                SELECT r.version_actual FROM recetas r WHERE r.id = items_venta.receta_id
+            ))
+        WHERE receta_id IS NOT NULL AND (costo_unitario IS NULL OR receta_version IS NULL)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('items_venta', 'receta_version')
+    op.drop_column('items_venta', 'costo_unitario')
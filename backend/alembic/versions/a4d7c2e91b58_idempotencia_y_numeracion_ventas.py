@@ -0,0 +1,71 @@
+"""Claves de idempotencia y numeración de ventas por sucursal
+
+Revision ID: a4d7c2e91b58
+Revises: e81c4f3a9d27
+Create Date: 2026-10-18 19:47:26.881930
+
+numero_venta pasa a ser único por sucursal (V-000001, V-000002, ...). En PostgreSQL
+se crea una SEQUENCE por sucursal existente; las nuevas la crean al darse de alta.
+secuencias_venta es el contador equivalente para SQLite.
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d7c2e91b58'
+down_revision: Union[str, None] = 'e81c4f3a9d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _nombre_secuencia(sucursal_id: str) -> str:
+    # Igual que app.services.numeracion_ventas_service.nombre_secuencia
+    return "ventas_numero_" + re.sub(r"[^a-z0-9]", "", sucursal_id.lower())[:48]
+
+
+def upgrade() -> None:
+    op.create_table('claves_idempotencia',
+    sa.Column('usuario_id', sa.String(), nullable=False),
+    sa.Column('clave', sa.String(), nullable=False),
+    sa.Column('endpoint', sa.String(), nullable=False),
+    sa.Column('hash_peticion', sa.String(), nullable=False),
+    sa.Column('codigo_estado', sa.Integer(), nullable=False),
+    sa.Column('respuesta', sa.JSON(), nullable=False),
+    sa.Column('creado_en', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('usuario_id', 'clave')
+    )
+    op.create_table('secuencias_venta',
+    sa.Column('sucursal_id', sa.String(), nullable=False),
+    sa.Column('ultimo', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['sucursal_id'], ['sucursales.id'], ),
+    sa.PrimaryKeyConstraint('sucursal_id')
+    )
+
+    op.drop_index('ix_ventas_numero_venta', table_name='ventas')
+    op.create_index(op.f('ix_ventas_numero_venta'), 'ventas', ['numero_venta'], unique=False)
+    # batch: SQLite no puede agregar restricciones con ALTER (en PostgreSQL es un ALTER normal)
+    with op.batch_alter_table('ventas') as batch_op:
+        batch_op.create_unique_constraint('uq_ventas_sucursal_numero_venta', ['sucursal_id', 'numero_venta'])
+
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        for (sucursal_id,) in bind.execute(sa.text("SELECT id FROM sucursales")):
+            op.execute(f"CREATE SEQUENCE IF NOT EXISTS {_nombre_secuencia(sucursal_id)}")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        for (sucursal_id,) in bind.execute(sa.text("SELECT id FROM sucursales")):
+            op.execute(f"DROP SEQUENCE IF EXISTS {_nombre_secuencia(sucursal_id)}")
+
+    with op.batch_alter_table('ventas') as batch_op:
+        batch_op.drop_constraint('uq_ventas_sucursal_numero_venta', type_='unique')
+    op.drop_index(op.f('ix_ventas_numero_venta'), table_name='ventas')
+    op.create_index('ix_ventas_numero_venta', 'ventas', ['numero_venta'], unique=True)
+    op.drop_table('secuencias_venta')
+    op.drop_table('claves_idempotencia')
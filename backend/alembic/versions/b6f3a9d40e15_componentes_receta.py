@@ -0,0 +1,42 @@
+"""Subrecetas: componentes_receta
+
+Revision ID: b6f3a9d40e15
+Revises: 5d8e1b7c3f92
+Create Date: 2026-10-18 21:40:03.552918
+
+Una receta puede usar porciones de otras (salsas, marinados). El grafo se valida sin
+ciclos al guardar; ver app/services/subrecetas_service.py.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6f3a9d40e15'
+down_revision: Union[str, None] = '5d8e1b7c3f92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('componentes_receta',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('receta_id', sa.String(), nullable=False),
+    sa.Column('subreceta_id', sa.String(), nullable=False),
+    sa.Column('cantidad', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['receta_id'], ['recetas.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['subreceta_id'], ['recetas.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_componentes_receta_id'), 'componentes_receta', ['id'], unique=False)
+    op.create_index(op.f('ix_componentes_receta_receta_id'), 'componentes_receta', ['receta_id'], unique=False)
+    op.create_index(op.f('ix_componentes_receta_subreceta_id'), 'componentes_receta', ['subreceta_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_componentes_receta_subreceta_id'), table_name='componentes_receta')
+    op.drop_index(op.f('ix_componentes_receta_receta_id'), table_name='componentes_receta')
+    op.drop_index(op.f('ix_componentes_receta_id'), table_name='componentes_receta')
+    op.drop_table('componentes_receta')
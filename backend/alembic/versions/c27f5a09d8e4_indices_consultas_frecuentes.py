@@ -0,0 +1,43 @@
+"""Índices compuestos y parciales para las consultas más frecuentes
+
+Revision ID: c27f5a09d8e4
+Revises: 8a5c1e4f7b29
+Create Date: 2026-10-18 15:22:48.730116
+
+Complementa 6e0d2b8f41c3 (listados paginados, items_venta.venta_id).
+ItemInventario(id, sucursal_id) no necesita índice propio: id es la clave primaria.
+Verificar con: python scripts/explain_consultas.py
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c27f5a09d8e4'
+down_revision: Union[str, None] = '8a5c1e4f7b29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_caja_sesiones_abiertas', 'caja_sesiones', ['usuario_id', 'sucursal_id'], unique=False,
+        postgresql_where=sa.text("estado = 'ABIERTA'"),
+        sqlite_where=sa.text("estado = 'ABIERTA'")
+    )
+    op.create_index(
+        'ix_items_inventario_criticos', 'items_inventario', ['sucursal_id'], unique=False,
+        postgresql_where=sa.text("cantidad <= stock_minimo"),
+        sqlite_where=sa.text("cantidad <= stock_minimo")
+    )
+    op.create_index(op.f('ix_ingredientes_receta_receta_id'), 'ingredientes_receta', ['receta_id'], unique=False)
+    op.create_index(op.f('ix_items_venta_receta_id'), 'items_venta', ['receta_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_items_venta_receta_id'), table_name='items_venta')
+    op.drop_index(op.f('ix_ingredientes_receta_receta_id'), table_name='ingredientes_receta')
+    op.drop_index('ix_items_inventario_criticos', table_name='items_inventario')
+    op.drop_index('ix_caja_sesiones_abiertas', table_name='caja_sesiones')
@@ -0,0 +1,68 @@
+"""Unidades de medida base (peso, volumen, unidad)
+
+Revision ID: d2a8e5f17c64
+Revises: b6f3a9d40e15
+Create Date: 2026-10-18 22:18:44.107395
+
+Carga las unidades de app.core.enums con sus factores para que la conversión de
+unidades (app/core/conversion_unidades.py) funcione desde el inicio. Solo se insertan
+los códigos que no existen; el downgrade no borra nada (pueden estar referenciadas).
+"""
+import uuid
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a8e5f17c64'
+down_revision: Union[str, None] = 'b6f3a9d40e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (código, nombre, tipo, código de la base, factor a la base)
+UNIDADES = [
+    ("kg", "Kilogramo", "peso", None, 1.0),
+    ("g", "Gramo", "peso", "kg", 0.001),
+    ("lb", "Libra", "peso", "kg", 0.45359237),
+    ("oz", "Onza", "peso", "kg", 0.028349523125),
+    ("L", "Litro", "volumen", None, 1.0),
+    ("mL", "Mililitro", "volumen", "L", 0.001),
+    ("cucharada", "Cucharada", "volumen", "L", 0.015),
+    ("cucharadita", "Cucharadita", "volumen", "L", 0.005),
+    ("unid", "Unidad", "unidad", None, 1.0),
+    ("pza", "Pieza", "unidad", "unid", 1.0),
+]
+
+
+def upgrade() -> None:
+    conexion = op.get_bind()
+    unidades = sa.table(
+        'unidades',
+        sa.column('id', sa.String), sa.column('codigo', sa.String), sa.column('nombre', sa.String),
+        sa.column('tipo', sa.String), sa.column('unidad_base_id', sa.String),
+        sa.column('factor_conversion', sa.Float), sa.column('activa', sa.Boolean),
+        sa.column('created_at', sa.DateTime)
+    )
+    ids = {
+        codigo.lower(): unidad_id
+        for unidad_id, codigo in conexion.execute(sa.select(unidades.c.id, unidades.c.codigo))
+    }
+    filas = []
+    for codigo, nombre, tipo, base, factor in UNIDADES:  # las bases van antes que sus derivadas
+        if codigo.lower() in ids:
+            continue
+        ids[codigo.lower()] = str(uuid.uuid4())
+        filas.append({
+            "id": ids[codigo.lower()], "codigo": codigo, "nombre": nombre, "tipo": tipo,
+            "unidad_base_id": ids.get(base.lower()) if base else None,
+            "factor_conversion": factor, "activa": True, "created_at": datetime.utcnow()
+        })
+    if filas:
+        op.bulk_insert(unidades, filas)
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,28 @@
+"""Clave de idempotencia en ventas (POST /ventas/batch)
+
+Revision ID: e81c4f3a9d27
+Revises: 9b3e6d2a71f0
+Create Date: 2026-10-18 18:31:05.204417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81c4f3a9d27'
+down_revision: Union[str, None] = '9b3e6d2a71f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('ventas', sa.Column('clave_idempotencia', sa.String(), nullable=True))
+    op.create_index(op.f('ix_ventas_clave_idempotencia'), 'ventas', ['clave_idempotencia'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ventas_clave_idempotencia'), table_name='ventas')
+    op.drop_column('ventas', 'clave_idempotencia')
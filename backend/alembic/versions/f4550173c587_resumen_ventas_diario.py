@@ -0,0 +1,45 @@
+"""Resumen diario de ventas
+
+Revision ID: f4550173c587
+Revises: 085c338f5fa9
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4550173c587'
+down_revision: Union[str, None] = '085c338f5fa9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('resumen_ventas_diario',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('sucursal_id', sa.String(), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('receta_id', sa.String(), nullable=False),
+    sa.Column('nombre_item', sa.String(), nullable=True),
+    sa.Column('ingresos', sa.Float(), nullable=False),
+    sa.Column('unidades', sa.Integer(), nullable=False),
+    sa.Column('costo', sa.Float(), nullable=False),
+    sa.Column('tickets', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['sucursal_id'], ['sucursales.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sucursal_id', 'fecha', 'receta_id')
+    )
+    op.create_index(op.f('ix_resumen_ventas_diario_fecha'), 'resumen_ventas_diario', ['fecha'], unique=False)
+    op.create_index(op.f('ix_resumen_ventas_diario_id'), 'resumen_ventas_diario', ['id'], unique=False)
+    # Los datos existentes se cargan con: python scripts/backfill_resumen_ventas.py
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_resumen_ventas_diario_id'), table_name='resumen_ventas_diario')
+    op.drop_index(op.f('ix_resumen_ventas_diario_fecha'), table_name='resumen_ventas_diario')
+    op.drop_table('resumen_ventas_diario')
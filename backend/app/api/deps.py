@@ -1,11 +1,13 @@
 from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from app.models.usuario import Usuario
 from app.core import security
+from app.core.cache_usuarios import cache_usuarios, UsuarioActual
+from app.core.permisos import permisos_compilados
+from app.core.revocacion_tokens import revocacion_tokens
 from app.core.config import settings
 from app.core.database import get_db
 from app.schemas.token import TokenPayload
@@ -16,7 +18,12 @@ reusable_oauth2 = OAuth2PasswordBearer(
 
 def get_current_user(
     db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> Usuario:
+) -> UsuarioActual:
+    """
+    Usuario autenticado. Con un token de login vigente sale de sus claims sin consultar
+    la base; si no, de la caché por proceso (ver app.core.cache_usuarios). Los tokens de
+    una sesión revocada se rechazan en memoria (ver app.core.revocacion_tokens).
+    """
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
@@ -27,14 +34,48 @@ def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = db.query(Usuario).filter(Usuario.id == token_data.sub).first()
+    if token_data.fam and revocacion_tokens.revocada(db, token_data.fam):
+        # Sesión cerrada (logout, refresh token reutilizado o contraseña cambiada)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+    user = cache_usuarios.desde_claims(payload) or cache_usuarios.obtener(db, token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 def get_current_active_user(
-    current_user: Usuario = Depends(get_current_user),
-) -> Usuario:
+    current_user: UsuarioActual = Depends(get_current_user),
+) -> UsuarioActual:
     if not current_user.activo:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+METODOS_LECTURA = {"GET", "HEAD", "OPTIONS"}
+
+def require_permission(permiso: str, solo_escritura: bool = False):
+    """
+    Dependencia que exige un permiso al usuario autenticado (los superusuarios pasan
+    siempre). Con solo_escritura, GET/HEAD solo exigen estar autenticado: para catálogos
+    que el POS lee aunque el usuario no pueda modificarlos.
+
+    Uso: APIRouter.include_router(router, dependencies=[Depends(require_permission("gestionar_ventas"))])
+    """
+    def verificar_permiso(
+        request: Request,
+        current_user: UsuarioActual = Depends(get_current_active_user),
+        db: Session = Depends(get_db)
+    ) -> UsuarioActual:
+        if solo_escritura and request.method in METODOS_LECTURA:
+            return current_user
+        if current_user.es_superusuario:
+            return current_user
+        if not permisos_compilados.permite(db, current_user.roles, permiso):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Permiso requerido: {permiso}",
+            )
+        return current_user
+
+    return verificar_permiso
@@ -0,0 +1,112 @@
+"""
+Claves de idempotencia para los POST que el POS reintenta (cabecera Idempotency-Key)
+
+El cliente genera una clave por operación y la repite en cada reintento. La primera
+vez la respuesta se guarda en claves_idempotencia dentro de la misma transacción que
+el recurso creado; los reintentos reciben esa respuesta sin volver a ejecutar nada
+(sin ventas duplicadas ni stock descontado dos veces). Las claves son por usuario y
+se conservan IDEMPOTENCIA_TTL_HORAS.
+
+Uso en un endpoint:
+    clave: Optional[str] = Depends(clave_idempotencia)
+    ...
+    guardada = respuesta_guardada(db, usuario_id, clave, endpoint, huella)
+    if guardada: return guardada
+    ... crear el recurso ...
+    guardar_respuesta(db, usuario_id, clave, endpoint, huella, respuesta)
+    repetida = confirmar(db, usuario_id, clave, endpoint, huella)
+"""
+import json
+import hashlib
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from fastapi import Header, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.clave_idempotencia import ClaveIdempotencia
+
+CABECERA_IDEMPOTENCIA = "Idempotency-Key"
+CABECERA_REPETIDA = "Idempotent-Replayed"
+
+
+def clave_idempotencia(
+    idempotency_key: Optional[str] = Header(None, alias=CABECERA_IDEMPOTENCIA, max_length=100)
+) -> Optional[str]:
+    """Clave enviada por el cliente (usar como dependencia); None si no la envió"""
+    return idempotency_key or None
+
+
+def huella(cuerpo: Any) -> str:
+    """SHA-256 del cuerpo de la petición, para rechazar una clave reutilizada con otro contenido"""
+    contenido = json.dumps(jsonable_encoder(cuerpo), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def respuesta_guardada(
+    db: Session, usuario_id: str, clave: Optional[str], endpoint: str, hash_peticion: str
+) -> Optional[JSONResponse]:
+    """Respuesta de un envío anterior con la misma clave, o None si es la primera vez"""
+    if not clave:
+        return None
+    fila = db.query(ClaveIdempotencia).filter(
+        ClaveIdempotencia.usuario_id == usuario_id,
+        ClaveIdempotencia.clave == clave
+    ).first()
+    if fila is None:
+        return None
+    if fila.endpoint != endpoint or fila.hash_peticion != hash_peticion:
+        raise HTTPException(
+            status_code=422,
+            detail=f"La {CABECERA_IDEMPOTENCIA} ya se usó con otra petición"
+        )
+    return JSONResponse(
+        status_code=fila.codigo_estado,
+        content=fila.respuesta,
+        headers={CABECERA_REPETIDA: "true"}
+    )
+
+
+def guardar_respuesta(
+    db: Session, usuario_id: str, clave: Optional[str], endpoint: str, hash_peticion: str,
+    respuesta: Any, codigo_estado: int = 200
+) -> None:
+    """Agrega la respuesta a la transacción en curso (se confirma con el recurso)"""
+    if not clave:
+        return
+    # De paso, limpiar las claves vencidas del usuario (prefijo de la clave primaria)
+    db.query(ClaveIdempotencia).filter(
+        ClaveIdempotencia.usuario_id == usuario_id,
+        ClaveIdempotencia.creado_en < datetime.utcnow() - timedelta(hours=settings.IDEMPOTENCIA_TTL_HORAS)
+    ).delete(synchronize_session=False)
+    db.add(ClaveIdempotencia(
+        usuario_id=usuario_id,
+        clave=clave,
+        endpoint=endpoint,
+        hash_peticion=hash_peticion,
+        codigo_estado=codigo_estado,
+        respuesta=jsonable_encoder(respuesta),
+        creado_en=datetime.utcnow()
+    ))
+
+
+def confirmar(
+    db: Session, usuario_id: str, clave: Optional[str], endpoint: str, hash_peticion: str
+) -> Optional[JSONResponse]:
+    """
+    Commit de la operación. Si un envío simultáneo con la misma clave confirmó
+    primero, se revierte esta y se retorna la respuesta de aquel; si no, None.
+    """
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        repetida = respuesta_guardada(db, usuario_id, clave, endpoint, hash_peticion)
+        if repetida is None:
+            raise
+        return repetida
+    return None
@@ -0,0 +1,80 @@
+"""
+Paginación por cursor (keyset) para los endpoints de listado
+
+Los listados se ordenan de más reciente a más antiguo por (columna de fecha, id),
+o ascendente por otra columna estable (p. ej. (nombre, id) en inventario, cuya fecha
+de actualización cambia con cada venta). El cursor es opaco para el cliente: codifica
+el valor de orden y el id del último registro de la página. La respuesta sigue siendo una lista; el cursor de la página siguiente
+viaja en la cabecera X-Next-Cursor (ausente en la última página).
+"""
+import json
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import DateTime, tuple_
+
+CABECERA_CURSOR = "X-Next-Cursor"
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 500
+
+
+class Paginacion:
+    """Parámetros comunes de paginación (usar como dependencia)"""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Cursor devuelto en X-Next-Cursor"),
+        limite: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO)
+    ):
+        self.cursor = cursor
+        self.limite = limite
+
+
+def codificar_cursor(valor: Any, id: str) -> str:
+    if isinstance(valor, datetime):
+        valor = valor.isoformat()
+    contenido = json.dumps([valor, id]).encode()
+    return base64.urlsafe_b64encode(contenido).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, es_fecha: bool = True) -> Tuple[Any, str]:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valor, id = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if es_fecha:
+            valor = datetime.fromisoformat(valor)
+        elif not isinstance(valor, str):
+            raise TypeError(valor)
+        return valor, str(id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+
+
+def paginar(query, columna_orden, columna_id, paginacion: Paginacion, response: Response,
+            ascendente: bool = False) -> list:
+    """
+    Aplica el orden por (columna_orden, id), descendente salvo ascendente=True, el
+    filtro del cursor y el límite. Lee un registro extra para saber si existe una
+    página siguiente. columna_orden no debe cambiar mientras se recorre el listado.
+    """
+    if paginacion.cursor:
+        valor, id = decodificar_cursor(paginacion.cursor, isinstance(columna_orden.type, DateTime))
+        clave, desde = tuple_(columna_orden, columna_id), tuple_(valor, id)
+        query = query.filter(clave > desde if ascendente else clave < desde)
+
+    if ascendente:
+        query = query.order_by(columna_orden.asc(), columna_id.asc())
+    else:
+        query = query.order_by(columna_orden.desc(), columna_id.desc())
+    filas = query.limit(paginacion.limite + 1).all()
+
+    if len(filas) > paginacion.limite:
+        filas = filas[:paginacion.limite]
+        ultima = filas[-1]
+        response.headers[CABECERA_CURSOR] = codificar_cursor(
+            getattr(ultima, columna_orden.key), getattr(ultima, columna_id.key)
+        )
+    return filas
@@ -1,7 +1,9 @@
 """
 API v1 routes
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from app.api.deps import require_permission, get_current_active_user
+from app.core.permisos import PERMISO_ADMIN
 from app.api.v1 import (
     usuarios, 
     sucursales, 
@@ -23,35 +25,43 @@ from app.api.v1 import (
     auth,
     password_recovery,
     caja,
+    unidades,
     admin_db
     # alerts 
 )
 
 api_router = APIRouter()
 
+def permiso(nombre: str, solo_escritura: bool = False) -> list:
+    """dependencies= de un router que exige el permiso (ver require_permission)"""
+    return [Depends(require_permission(nombre, solo_escritura=solo_escritura))]
+
+# Públicos: health, enums, login y recuperación de contraseña, onboarding inicial
 api_router.include_router(health.router, prefix="/health", tags=["health"])
 api_router.include_router(enums.router, prefix="/enums", tags=["enums"])
-api_router.include_router(admin_db.router, prefix="/admin", tags=["admin"])
+api_router.include_router(admin_db.router, prefix="/admin", tags=["admin"], dependencies=permiso(PERMISO_ADMIN))
 
 # Nuevos routers en español
-api_router.include_router(caja.router, prefix="/caja", tags=["caja"])
+api_router.include_router(caja.router, prefix="/caja", tags=["caja"], dependencies=permiso("gestionar_ventas"))
 api_router.include_router(onboarding.router, prefix="/onboarding", tags=["onboarding"])
-api_router.include_router(usuarios.router, prefix="/usuarios", tags=["usuarios"])
-api_router.include_router(sucursales.router, prefix="/sucursales", tags=["sucursales"])
-api_router.include_router(inventario.router, prefix="/inventario", tags=["inventario"])
-api_router.include_router(recetas.router, prefix="/recetas", tags=["recetas"])
-api_router.include_router(ventas.router, prefix="/ventas", tags=["ventas"])
-api_router.include_router(promociones.router, prefix="/promociones", tags=["promociones"])
-api_router.include_router(proveedores.router, prefix="/proveedores", tags=["proveedores"])
-api_router.include_router(movimientos_inventario.router, prefix="/movimientos-inventario", tags=["movimientos-inventario"])
-api_router.include_router(ordenes_compra.router, prefix="/ordenes-compra", tags=["ordenes-compra"])
-api_router.include_router(roles.router, prefix="/roles", tags=["roles"])
-api_router.include_router(configuracion.router, prefix="/configuracion", tags=["configuracion"])
+api_router.include_router(usuarios.router, prefix="/usuarios", tags=["usuarios"], dependencies=permiso("gestionar_usuarios"))
+api_router.include_router(sucursales.router, prefix="/sucursales", tags=["sucursales"], dependencies=permiso("gestionar_sucursales", solo_escritura=True))
+api_router.include_router(inventario.router, prefix="/inventario", tags=["inventario"], dependencies=permiso("gestionar_inventario", solo_escritura=True))
+api_router.include_router(unidades.router, prefix="/unidades", tags=["unidades"], dependencies=permiso("gestionar_inventario", solo_escritura=True))
+api_router.include_router(recetas.router, prefix="/recetas", tags=["recetas"], dependencies=permiso("gestionar_recetas", solo_escritura=True))
+api_router.include_router(ventas.router, prefix="/ventas", tags=["ventas"], dependencies=permiso("gestionar_ventas"))
+api_router.include_router(promociones.router, prefix="/promociones", tags=["promociones"], dependencies=permiso("gestionar_promociones", solo_escritura=True))
+api_router.include_router(proveedores.router, prefix="/proveedores", tags=["proveedores"], dependencies=permiso("gestionar_proveedores", solo_escritura=True))
+api_router.include_router(movimientos_inventario.router, prefix="/movimientos-inventario", tags=["movimientos-inventario"], dependencies=permiso("gestionar_inventario"))
+api_router.include_router(ordenes_compra.router, prefix="/ordenes-compra", tags=["ordenes-compra"], dependencies=permiso("gestionar_compras"))
+api_router.include_router(roles.router, prefix="/roles", tags=["roles"], dependencies=permiso("gestionar_roles"))
+api_router.include_router(configuracion.router, prefix="/configuracion", tags=["configuracion"], dependencies=permiso("gestionar_configuracion", solo_escritura=True))
 api_router.include_router(auth.router, tags=["auth"])
 api_router.include_router(password_recovery.router, tags=["password-recovery"])
 
 # Pendientes
-api_router.include_router(chatbot.router, prefix="/chatbot", tags=["chatbot"])
-api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
-api_router.include_router(reports.router, prefix="/reports", tags=["reports"])
+# Dashboard (página de inicio de todos) y chatbot (visible en todas las páginas): cualquier usuario autenticado
+api_router.include_router(chatbot.router, prefix="/chatbot", tags=["chatbot"], dependencies=[Depends(get_current_active_user)])
+api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"], dependencies=[Depends(get_current_active_user)])
+api_router.include_router(reports.router, prefix="/reports", tags=["reports"], dependencies=permiso("ver_reportes"))
 # api_router.include_router(alerts.router, prefix="/alerts", tags=["alerts"])
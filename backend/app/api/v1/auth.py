@@ -6,14 +6,26 @@ from sqlalchemy.orm import Session
 from app.core import security
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.cache_usuarios import cache_usuarios
+from app.services.tokens_refresco_service import TokensRefrescoService, TokenRefrescoInvalidoError
 from app.models.usuario import Usuario
-from app.schemas.token import Token
+from app.schemas.token import Token, RefreshTokenRequest
 from app.schemas.usuario import UsuarioResponse
 
 router = APIRouter()
 
+def _access_token(db: Session, usuario_id: str, familia_id: str) -> str:
+    """Access token con los claims de permisos y la familia del refresh token ("fam")"""
+    claims = cache_usuarios.claims(db, usuario_id)
+    claims["fam"] = familia_id
+    return security.create_access_token(
+        usuario_id,
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        claims=claims
+    )
+
 @router.post("/login/access-token", response_model=Token)
-def login_access_token(
+async def login_access_token(
     db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
@@ -24,16 +36,56 @@ def login_access_token(
         # Intentar con nombre de usuario si el email falla
         usuario = db.query(Usuario).filter(Usuario.nombre_usuario == form_data.username).first()
         
-    if not usuario or not security.verify_password(form_data.password, usuario.contrasena_hash):
+    if not usuario:
+        raise HTTPException(status_code=400, detail="Incorrect email or password")
+    contrasena_hash, activo = usuario.contrasena_hash, usuario.activo
+    # Devolver la conexión al pool mientras bcrypt corre (~250 ms): en un cambio de
+    # turno los logins concurrentes agotarían el pool solo esperando el hash
+    db.rollback()
+    
+    # bcrypt en el pool de hashing, fuera del event loop
+    valida, nuevo_hash = await security.verify_and_update_password_async(
+        form_data.password, contrasena_hash
+    )
+    if not valida:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
-    elif not usuario.activo:
+    elif not activo:
         raise HTTPException(status_code=400, detail="Inactive user")
+    
+    if nuevo_hash:
+        # BCRYPT_ROUNDS cambió desde que se guardó el hash: actualizarlo ahora que tenemos la contraseña
+        usuario.contrasena_hash = nuevo_hash
+        db.commit()
         
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    # Sesión del turno: los access tokens siguientes salen de /login/refresh sin bcrypt
+    refresh_token, familia_id = TokensRefrescoService.emitir(db, usuario.id)
     return {
-        "access_token": security.create_access_token(
-            usuario.id, expires_delta=access_token_expires
-        ),
+        "access_token": _access_token(db, usuario.id, familia_id),
         "token_type": "bearer",
+        "refresh_token": refresh_token,
         "usuario": usuario # Incluimos el usuario en la respuesta para el frontend
     }
+
+@router.post("/login/refresh", response_model=Token)
+def login_refresh_token(
+    datos: RefreshTokenRequest, db: Session = Depends(get_db)
+) -> Any:
+    """
+    Renovar el access token con el refresh token (rotativo: cada uno sirve una sola vez
+    y la respuesta trae el siguiente)
+    """
+    try:
+        refresh_token, usuario_id, familia_id = TokensRefrescoService.rotar(db, datos.refresh_token)
+    except TokenRefrescoInvalidoError as e:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
+    return {
+        "access_token": _access_token(db, usuario_id, familia_id),
+        "token_type": "bearer",
+        "refresh_token": refresh_token
+    }
+
+@router.post("/logout")
+def logout(datos: RefreshTokenRequest, db: Session = Depends(get_db)) -> Any:
+    """Cerrar la sesión: revoca el refresh token y los access tokens emitidos con él"""
+    TokensRefrescoService.revocar_token(db, datos.refresh_token)
+    return {"message": "Sesión cerrada"}
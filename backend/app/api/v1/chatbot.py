@@ -4,7 +4,7 @@ API de Chatbot en Español
 from fastapi import APIRouter, Depends, HTTPException
 from app.schemas.chatbot import MensajeChat, RespuestaChat
 from app.services.ai_service import ai_service
-from app.core.database import get_db
+from app.core.database import get_read_db
 from sqlalchemy.orm import Session
 from datetime import datetime
 import uuid
@@ -12,7 +12,7 @@ import uuid
 router = APIRouter()
 
 @router.post("/chat", response_model=RespuestaChat)
-async def chat(mensaje: MensajeChat, db: Session = Depends(get_db)):
+async def chat(mensaje: MensajeChat, db: Session = Depends(get_read_db)):
     """
     Endpoint de chat - recibe mensaje del usuario y retorna respuesta de IA
     con contexto del negocio en tiempo real.
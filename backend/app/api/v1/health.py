@@ -2,12 +2,20 @@
 Health check endpoints including database status
 """
 from fastapi import APIRouter, Depends, HTTPException
-from app.core.database import engine, get_db
+from app.api.deps import require_permission
+from app.core import database
+from app.core.permisos import PERMISO_ADMIN
+from app.core.database import engine, get_db, metricas_pool
 from app.core.config import settings
+from app.core.cache import cache
 from sqlalchemy import text
 
 router = APIRouter()
 
+# Métricas internas (tamaños de pool, contadores de caché, errores de la réplica):
+# solo administradores. "/" sigue siendo público para los balanceadores.
+solo_admin = [Depends(require_permission(PERMISO_ADMIN))]
+
 @router.get("/")
 async def health_check():
     """Basic health check"""
@@ -17,6 +25,32 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@router.get("/cache", dependencies=solo_admin)
+async def cache_health():
+    """Aciertos/fallos de la caché de dashboard y reportes (por worker)"""
+    return cache.estadisticas()
+
+@router.get("/pool", dependencies=solo_admin)
+async def pool_health():
+    """Saturación, espera por conexión y edad de las conexiones de cada pool (por worker)"""
+    return {
+        "configuracion": {
+            "workers": settings.WEB_CONCURRENCY,
+            "pool_timeout_s": settings.DB_POOL_TIMEOUT,
+            "pool_recycle_s": settings.DB_POOL_RECYCLE,
+            "pre_ping": settings.DB_PRE_PING,
+            "pgbouncer": settings.DB_PGBOUNCER,
+        },
+        "engines": {nombre: metricas.estadisticas() for nombre, metricas in metricas_pool.items()},
+    }
+
+@router.get("/replica", dependencies=solo_admin)
+async def replica_health():
+    """Retraso de la réplica de lectura y cuántas lecturas fueron a réplica o primaria (por worker)"""
+    if database.replica is None:
+        return {"status": "not_configured"}
+    return {"status": "ok" if database.replica.error is None else "error", **database.replica.estadisticas()}
+
 @router.get("/database")
 async def database_health():
     """Check database connection and status"""
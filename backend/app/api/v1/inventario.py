@@ -1,26 +1,51 @@
 """
 API de Inventario en Español
 """
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response
+from typing import List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 import uuid
 
 from app.schemas.item_inventario import ItemInventarioCreate, ItemInventarioUpdate, ItemInventarioResponse
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
+from app.core.cache import cache
+from app.core.cache_recetas import cache_recetas
+from app.api.paginacion import Paginacion, paginar
 from app.models.item_inventario import ItemInventario
 from app.models.sucursal import Sucursal
 from app.models.historial_costo_inventario import HistorialCostoInventario
+from app.models.movimiento_inventario import MovimientoInventario
+from app.models.snapshot_inventario import SnapshotInventario
+from app.services.costos_recetas_service import CostosRecetasService
+from app.services.stock_service import StockService
 
 router = APIRouter()
 
 @router.get("/", response_model=List[ItemInventarioResponse])
-async def obtener_items_inventario(db: Session = Depends(get_db)):
-    """Obtener todos los items de inventario"""
-    items = db.query(ItemInventario).order_by(desc(ItemInventario.ultima_actualizacion)).all()
-    return items
+async def obtener_items_inventario(
+    response: Response,
+    sucursal_id: Optional[str] = None,
+    categoria: Optional[str] = None,
+    paginacion: Paginacion = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Obtener items de inventario por nombre (paginado por cursor).
+    
+    No se pagina por ultima_actualizacion: cambia con cada venta o movimiento y un item
+    actualizado entre páginas se saltaría o se repetiría.
+    """
+    def consultar(sesion: Session):
+        query = sesion.query(ItemInventario)
+        if sucursal_id:
+            query = query.filter(ItemInventario.sucursal_id == sucursal_id)
+        if categoria:
+            query = query.filter(ItemInventario.categoria == categoria)
+        return paginar(query, ItemInventario.nombre, ItemInventario.id, paginacion, response, ascendente=True)
+    
+    return await db.run_sync(consultar)
 
 @router.post("/", response_model=ItemInventarioResponse)
 async def crear_item_inventario(item: ItemInventarioCreate, db: Session = Depends(get_db)):
@@ -35,7 +60,7 @@ async def crear_item_inventario(item: ItemInventarioCreate, db: Session = Depend
         id=str(uuid.uuid4()),
         nombre=item.nombre,
         categoria=item.categoria,
-        cantidad=item.cantidad,
+        cantidad=0.0,  # El stock inicial entra por el libro de movimientos
         unidad=item.unidad,
         unidad_id=item.unidad_id,
         stock_minimo=item.stock_minimo,
@@ -65,7 +90,11 @@ async def crear_item_inventario(item: ItemInventarioCreate, db: Session = Depend
         )
         db.add(historial)
     
+    if item.cantidad:
+        StockService.ajustar_stock(db, db_item.id, item.cantidad, {"notas": "Stock inicial"})
+    
     db.commit()
+    cache.invalidar("inventario")
     db.refresh(db_item)
     return db_item
 
@@ -88,13 +117,23 @@ async def actualizar_item_inventario(
     if not db_item:
         raise HTTPException(status_code=404, detail="Item de inventario no encontrado")
     
-    # Actualizar campos
+    # Actualizar campos; la cantidad no se escribe directo (es la proyección del libro)
     update_data = item.model_dump(exclude_unset=True)
+    nueva_cantidad = update_data.pop("cantidad", None)
     for field, value in update_data.items():
         setattr(db_item, field, value)
     
     db_item.ultima_actualizacion = datetime.utcnow()
     
+    if nueva_cantidad is not None:
+        # AJUSTE por la diferencia con el stock actual, leído con la fila bloqueada
+        db.flush()
+        actual = db.query(ItemInventario.cantidad).filter(
+            ItemInventario.id == item_id
+        ).with_for_update().scalar()
+        if nueva_cantidad != actual:
+            StockService.ajustar_stock(db, item_id, nueva_cantidad - actual, {"notas": "Edición del item"})
+    
     # Si cambió el costo, registrar en historial
     # (Lógica simplificada, idealmente verificar si realmente cambió)
     if "costo_unitario" in update_data:
@@ -108,7 +147,15 @@ async def actualizar_item_inventario(
         )
          db.add(historial)
 
+    # El costo de las recetas que usan el item depende de su costo y su unidad
+    if update_data.keys() & {"costo_unitario", "unidad", "unidad_id"}:
+        CostosRecetasService.recalcular_por_items(db, [db_item.id])
+
     db.commit()
+    cache.invalidar("inventario")
+    if update_data.keys() & {"unidad", "unidad_id"}:
+        # Los factores de unidad quedan guardados en el BOM de las recetas
+        cache_recetas.invalidar()
     db.refresh(db_item)
     return db_item
 
@@ -119,6 +166,20 @@ async def eliminar_item_inventario(item_id: str, db: Session = Depends(get_db)):
     if not db_item:
         raise HTTPException(status_code=404, detail="Item de inventario no encontrado")
     
+    # El libro de stock es de solo inserción: borrar el item borraría su historial y
+    # el kardex de periodos pasados ya no se podría reconstruir
+    con_movimientos = db.query(MovimientoInventario.id).filter(
+        MovimientoInventario.item_inventario_id == item_id
+    ).first() is not None
+    con_snapshots = db.query(SnapshotInventario.id).filter(
+        SnapshotInventario.item_inventario_id == item_id
+    ).first() is not None
+    if con_movimientos or con_snapshots:
+        raise HTTPException(
+            status_code=409,
+            detail="El item tiene movimientos de inventario registrados y no se puede eliminar"
+        )
     db.delete(db_item)
     db.commit()
+    cache.invalidar("inventario")
     return {"message": "Item de inventario eliminado exitosamente"}
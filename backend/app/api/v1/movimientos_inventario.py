@@ -1,30 +1,88 @@
 """
 API de Movimientos de Inventario en Español
 """
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response
+from typing import List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 import uuid
 
-from app.schemas.movimiento_inventario import MovimientoInventarioCreate, MovimientoInventarioResponse
-from app.core.database import get_db
+from app.schemas.movimiento_inventario import (
+    MovimientoInventarioCreate, MovimientoInventarioResponse, StockEnFechaResponse
+)
+from app.core.database import get_db, get_async_db
+from app.core.cache import cache
+from app.core.conversion_unidades import conversion_unidades
+from app.api.paginacion import Paginacion, paginar
+from app.api.idempotencia import clave_idempotencia, huella, respuesta_guardada, guardar_respuesta, confirmar
+from app.api.deps import get_current_active_user
 from app.models.movimiento_inventario import MovimientoInventario
 from app.models.sucursal import Sucursal
 from app.models.item_inventario import ItemInventario
+from app.services.stock_service import StockService
+from app.services.kardex_service import KardexService
 
 router = APIRouter()
 
 @router.get("/", response_model=List[MovimientoInventarioResponse])
-async def obtener_movimientos(db: Session = Depends(get_db)):
-    """Obtener todos los movimientos de inventario"""
-    movimientos = db.query(MovimientoInventario).order_by(desc(MovimientoInventario.fecha_creacion)).all()
-    return movimientos
+async def obtener_movimientos(
+    response: Response,
+    sucursal_id: Optional[str] = None,
+    tipo_movimiento: Optional[str] = None,
+    item_inventario_id: Optional[str] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    paginacion: Paginacion = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Obtener movimientos de inventario, del más reciente al más antiguo (paginado por cursor)"""
+    def consultar(sesion: Session):
+        query = sesion.query(MovimientoInventario)
+        if sucursal_id:
+            query = query.filter(MovimientoInventario.sucursal_id == sucursal_id)
+        if tipo_movimiento:
+            query = query.filter(MovimientoInventario.tipo_movimiento == tipo_movimiento)
+        if item_inventario_id:
+            query = query.filter(MovimientoInventario.item_inventario_id == item_inventario_id)
+        if desde:
+            query = query.filter(MovimientoInventario.fecha_creacion >= desde)
+        if hasta:
+            query = query.filter(MovimientoInventario.fecha_creacion < hasta)
+        return paginar(query, MovimientoInventario.fecha_creacion, MovimientoInventario.id, paginacion, response)
+    
+    return await db.run_sync(consultar)
+
+@router.get("/stock", response_model=List[StockEnFechaResponse])
+async def obtener_stock_en_fecha(
+    sucursal_id: str,
+    fecha: datetime,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Stock de cada item de la sucursal en una fecha: último snapshot más los movimientos posteriores"""
+    def consultar(sesion: Session):
+        stock = KardexService.stock_en(sesion, fecha, sucursal_id)
+        return [{"item_inventario_id": item_id, "cantidad": cantidad} for item_id, cantidad in stock.items()]
+    
+    return await db.run_sync(consultar)
 
 @router.post("/", response_model=MovimientoInventarioResponse)
-async def crear_movimiento(movimiento: MovimientoInventarioCreate, db: Session = Depends(get_db)):
-    """Registrar un nuevo movimiento de inventario"""
+async def crear_movimiento(
+    movimiento: MovimientoInventarioCreate,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user),
+    clave: Optional[str] = Depends(clave_idempotencia)
+):
+    """
+    Registrar un nuevo movimiento de inventario.
+    
+    Con la cabecera Idempotency-Key, un reintento retorna el movimiento original sin
+    volver a ajustar el stock.
+    """
+    endpoint, hash_peticion = "POST /movimientos-inventario", huella(movimiento)
+    guardada = respuesta_guardada(db, current_user.id, clave, endpoint, hash_peticion)
+    if guardada:
+        return guardada
     
     # Validar sucursal
     sucursal = db.query(Sucursal).filter(Sucursal.id == movimiento.sucursal_id).first()
@@ -36,35 +94,35 @@ async def crear_movimiento(movimiento: MovimientoInventarioCreate, db: Session =
     if not item:
         raise HTTPException(status_code=404, detail="Item de inventario no encontrado")
     
-    db_movimiento = MovimientoInventario(
-        id=str(uuid.uuid4()),
-        item_inventario_id=movimiento.item_inventario_id,
-        sucursal_id=movimiento.sucursal_id,
-        tipo_movimiento=movimiento.tipo_movimiento,
-        cantidad=movimiento.cantidad,
-        unidad=movimiento.unidad,
-        costo_unitario=movimiento.costo_unitario,
-        referencia_id=movimiento.referencia_id,
-        tipo_referencia=movimiento.tipo_referencia,
-        notas=movimiento.notas,
-        fecha_creacion=datetime.utcnow()
-    )
-    db.add(db_movimiento)
+    # Delta en la unidad del item (el movimiento puede venir en otra, p. ej. g de un item en kg).
+    # AJUSTE es relativo: 'cantidad' es la diferencia a sumar/restar.
+    factor = conversion_unidades.factor(db, None, movimiento.unidad, item.unidad_id, item.unidad)
+    delta = StockService.delta_por_tipo(movimiento.tipo_movimiento, movimiento.cantidad) * factor
     
-    # Actualizar stock del item
-    if movimiento.tipo_movimiento in ["ENTRADA", "COMPRA", "DEVOLUCION"]:
-        item.cantidad += movimiento.cantidad
-    elif movimiento.tipo_movimiento in ["SALIDA", "VENTA", "MERMA", "ROBO", "CADUCIDAD"]:
-        item.cantidad -= movimiento.cantidad
-    elif movimiento.tipo_movimiento == "AJUSTE":
-        # Ajuste absoluto o relativo? Asumiremos relativo por simplicidad, o absoluto si se define así.
-        # Por ahora lo tratamos como ajuste de stock (diferencia)
-        # Si fuera absoluto, necesitaríamos saber el stock anterior.
-        # Asumiremos que 'cantidad' es la diferencia a sumar/restar.
-        item.cantidad += movimiento.cantidad
-        
-    item.ultima_actualizacion = datetime.utcnow()
+    # La fila del libro y el stock (cantidad = cantidad + delta, en la base de datos para
+    # no perder actualizaciones concurrentes) se escriben juntos
+    movimiento_id = str(uuid.uuid4())
+    StockService.registrar_movimientos(db, [{
+        "id": movimiento_id,
+        "item_inventario_id": item.id,
+        "delta": delta,
+        "tipo_movimiento": movimiento.tipo_movimiento,
+        "cantidad": movimiento.cantidad,
+        "unidad": movimiento.unidad,
+        "costo_unitario": movimiento.costo_unitario,
+        "referencia_id": movimiento.referencia_id,
+        "tipo_referencia": movimiento.tipo_referencia,
+        "notas": movimiento.notas,
+        "usuario_id": current_user.id
+    }])
+    db_movimiento = db.get(MovimientoInventario, movimiento_id)
     
-    db.commit()
+    if clave:
+        guardar_respuesta(db, current_user.id, clave, endpoint, hash_peticion,
+                          MovimientoInventarioResponse.model_validate(db_movimiento))
+    repetida = confirmar(db, current_user.id, clave, endpoint, hash_peticion)
+    if repetida:
+        return repetida
+    cache.invalidar("inventario")
     db.refresh(db_movimiento)
     return db_movimiento
@@ -1,27 +1,50 @@
 """
 API de Ordenes de Compra en Español
 """
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from fastapi import APIRouter, Depends, HTTPException, Response
+from typing import List, Optional
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 import uuid
 
 from app.schemas.orden_compra import OrdenCompraCreate, OrdenCompraUpdate, OrdenCompraResponse
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
+from app.core.cache import cache
+from app.core.conversion_unidades import conversion_unidades
+from app.api.paginacion import Paginacion, paginar
 from app.models.orden_compra import OrdenCompra, ItemOrdenCompra
 from app.models.sucursal import Sucursal
 from app.models.item_inventario import ItemInventario
-from app.models.movimiento_inventario import MovimientoInventario
+from app.services.costos_recetas_service import CostosRecetasService
+from app.services.stock_service import StockService
 
 router = APIRouter()
 
 @router.get("/", response_model=List[OrdenCompraResponse])
-async def obtener_ordenes_compra(db: Session = Depends(get_db)):
-    """Obtener todas las ordenes de compra"""
-    ordenes = db.query(OrdenCompra).order_by(desc(OrdenCompra.fecha_creacion)).all()
-    return ordenes
+async def obtener_ordenes_compra(
+    response: Response,
+    sucursal_id: Optional[str] = None,
+    estado: Optional[str] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    paginacion: Paginacion = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Obtener ordenes de compra, de la más reciente a la más antigua (paginado por cursor)"""
+    def consultar(sesion: Session):
+        query = sesion.query(OrdenCompra).options(selectinload(OrdenCompra.items))
+        if sucursal_id:
+            query = query.filter(OrdenCompra.sucursal_id == sucursal_id)
+        if estado:
+            query = query.filter(OrdenCompra.estado == estado)
+        if desde:
+            query = query.filter(OrdenCompra.fecha_creacion >= desde)
+        if hasta:
+            query = query.filter(OrdenCompra.fecha_creacion < hasta)
+        return paginar(query, OrdenCompra.fecha_creacion, OrdenCompra.id, paginacion, response)
+    
+    return await db.run_sync(consultar)
 
 @router.post("/", response_model=OrdenCompraResponse)
 async def crear_orden_compra(orden: OrdenCompraCreate, db: Session = Depends(get_db)):
@@ -86,33 +109,42 @@ async def actualizar_orden_compra(
     # Si se marca como RECIBIDA, actualizar inventario
     if orden_update.estado == "RECIBIDA" and db_orden.estado != "RECIBIDA":
         db_orden.fecha_recepcion = datetime.utcnow()
+        costos_actualizados = set()
+        movimientos = []
         
         for item_orden in db_orden.items:
             if item_orden.item_inventario_id:
-                # Crear movimiento de entrada
-                movimiento = MovimientoInventario(
-                    id=str(uuid.uuid4()),
-                    item_inventario_id=item_orden.item_inventario_id,
-                    sucursal_id=db_orden.sucursal_id,
-                    tipo_movimiento="COMPRA",
-                    cantidad=item_orden.cantidad,
-                    unidad=item_orden.unidad,
-                    costo_unitario=item_orden.precio_unitario,
-                    referencia_id=db_orden.id,
-                    tipo_referencia="orden_compra",
-                    fecha_creacion=datetime.utcnow()
-                )
-                db.add(movimiento)
-                
-                # Actualizar stock del item
                 item_inv = db.query(ItemInventario).filter(ItemInventario.id == item_orden.item_inventario_id).first()
                 if item_inv:
-                    item_inv.cantidad += item_orden.cantidad
-                    item_inv.costo_unitario = item_orden.precio_unitario # Actualizar costo
+                    # Se compra en la unidad de la orden (p. ej. cajas de g), el stock está en la del item
+                    factor = conversion_unidades.factor(
+                        db, None, item_orden.unidad, item_inv.unidad_id, item_inv.unidad
+                    )
+                    # Movimiento de entrada; el stock se suma junto con el resto de la orden
+                    movimientos.append({
+                        "item_inventario_id": item_inv.id,
+                        "delta": item_orden.cantidad * factor,
+                        "tipo_movimiento": "COMPRA",
+                        "cantidad": item_orden.cantidad,
+                        "unidad": item_orden.unidad,
+                        "costo_unitario": item_orden.precio_unitario,
+                        "referencia_id": db_orden.id,
+                        "tipo_referencia": "orden_compra"
+                    })
+                    costo_unitario = item_orden.precio_unitario / factor
+                    if item_inv.costo_unitario != costo_unitario:
+                        costos_actualizados.add(item_inv.id)
+                    item_inv.costo_unitario = costo_unitario # Actualizar costo
                     item_inv.ultima_actualizacion = datetime.utcnow()
                 
                 item_orden.cantidad_recibida = item_orden.cantidad # Asumimos recepción completa por ahora
 
+        # Entradas de toda la orden: un UPDATE del stock y un INSERT en el libro
+        StockService.registrar_movimientos(db, movimientos)
+
+        # Una sola pasada por las recetas afectadas por todos los costos nuevos de la orden
+        CostosRecetasService.recalcular_por_items(db, costos_actualizados)
+
     if orden_update.estado:
         db_orden.estado = orden_update.estado
     
@@ -120,5 +152,6 @@ async def actualizar_orden_compra(
         db_orden.notas = orden_update.notas
 
     db.commit()
+    cache.invalidar("inventario")
     db.refresh(db_orden)
     return db_orden
@@ -8,6 +8,7 @@ from app.schemas.password_recovery import PasswordRecoveryRequest, PasswordReset
 from app.core import security
 from app.core.config import settings
 from app.services.email import email_service
+from app.services.tokens_refresco_service import TokensRefrescoService
 import logging
 
 router = APIRouter()
@@ -57,7 +58,8 @@ async def reset_password(
         raise HTTPException(status_code=404, detail="User not found")
     
     # Update password
-    user.contrasena_hash = security.get_password_hash(confirm.new_password)
+    user.contrasena_hash = await security.get_password_hash_async(confirm.new_password)
     db.commit()
+    TokensRefrescoService.revocar_usuario(db, user.id)
     
     return {"message": "Password updated successfully"}
@@ -8,19 +8,63 @@ from sqlalchemy import desc
 from datetime import datetime
 import uuid
 
-from app.schemas.receta import RecetaCreate, RecetaUpdate, RecetaResponse
+from app.schemas.receta import RecetaCreate, RecetaUpdate, RecetaResponse, DisponibilidadRecetaResponse
 from app.core.database import get_db
-from app.models.receta import Receta, IngredienteReceta
+from app.core.cache_recetas import cache_recetas
+from app.models.receta import Receta, IngredienteReceta, ComponenteReceta
 from app.models.sucursal import Sucursal
+from app.schemas.receta import ComponenteRecetaCreate
+from app.services.subrecetas_service import SubrecetasService, CicloRecetasError
+from app.services.costos_recetas_service import CostosRecetasService
+from app.services.disponibilidad_service import DisponibilidadService
 
 router = APIRouter()
 
+def _guardar_componentes(db: Session, receta_id: str, componentes: List[ComponenteRecetaCreate]):
+    """Valida (existencia y ciclos) y agrega las subrecetas de la receta"""
+    subreceta_ids = {componente.subreceta_id for componente in componentes}
+    existentes = {r_id for (r_id,) in db.query(Receta.id).filter(Receta.id.in_(subreceta_ids))}
+    if subreceta_ids - existentes:
+        raise HTTPException(status_code=404, detail="Subreceta no encontrada")
+    try:
+        SubrecetasService.validar_componentes(db, receta_id, subreceta_ids)
+    except CicloRecetasError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    for componente in componentes:
+        db.add(ComponenteReceta(
+            id=str(uuid.uuid4()),
+            receta_id=receta_id,
+            subreceta_id=componente.subreceta_id,
+            cantidad=componente.cantidad
+        ))
+
+def _propagar_costos(db: Session, receta_id: str):
+    """
+    Costo acumulado: la receta se recalcula si tiene subrecetas (si no, conserva el
+    costo enviado) y, en ambos casos, las recetas que la usan.
+    """
+    db.flush()
+    if db.query(ComponenteReceta.id).filter(ComponenteReceta.receta_id == receta_id).first():
+        CostosRecetasService.recalcular_recetas(db, [receta_id])
+    else:
+        padres = {r_id for (r_id,) in db.query(ComponenteReceta.receta_id).filter(
+            ComponenteReceta.subreceta_id == receta_id
+        )}
+        CostosRecetasService.recalcular_recetas(db, padres)
+
 @router.get("/", response_model=List[RecetaResponse])
 def obtener_recetas(db: Session = Depends(get_db)):
     """Obtener todas las recetas"""
     recetas = db.query(Receta).order_by(desc(Receta.created_at)).all()
     return recetas
 
+@router.get("/disponibilidad", response_model=List[DisponibilidadRecetaResponse])
+def obtener_disponibilidad(sucursal_id: str, db: Session = Depends(get_db)):
+    """Porciones que se pueden preparar de cada receta con el stock actual de la sucursal"""
+    if not db.query(Sucursal.id).filter(Sucursal.id == sucursal_id).first():
+        raise HTTPException(status_code=404, detail="Sucursal no encontrada")
+    return DisponibilidadService.calcular(db, sucursal_id)
+
 @router.post("/", response_model=RecetaResponse)
 def crear_receta(receta: RecetaCreate, db: Session = Depends(get_db)):
     """Crear una nueva receta"""
@@ -66,7 +110,12 @@ def crear_receta(receta: RecetaCreate, db: Session = Depends(get_db)):
         )
         db.add(db_ingrediente)
     
+    if receta.componentes:
+        _guardar_componentes(db, db_receta.id, receta.componentes)
+        _propagar_costos(db, db_receta.id)
+    
     db.commit()
+    cache_recetas.invalidar()
     db.refresh(db_receta)
     return db_receta
 
@@ -89,7 +138,7 @@ def actualizar_receta(
     if not db_receta:
         raise HTTPException(status_code=404, detail="Receta no encontrada")
     
-    update_data = receta_update.model_dump(exclude_unset=True, exclude={"ingredientes"})
+    update_data = receta_update.model_dump(exclude_unset=True, exclude={"ingredientes", "componentes"})
     for field, value in update_data.items():
         setattr(db_receta, field, value)
     
@@ -112,8 +161,16 @@ def actualizar_receta(
             )
             db.add(db_ingrediente)
     
+    if receta_update.componentes is not None:
+        db.query(ComponenteReceta).filter(ComponenteReceta.receta_id == receta_id).delete()
+        _guardar_componentes(db, receta_id, receta_update.componentes)
+    _propagar_costos(db, receta_id)
+    
+    # Nueva versión: las ventas guardan con qué versión se vendieron y la caché de BOM se descarta
+    db_receta.version_actual = (db_receta.version_actual or 1) + 1
     db_receta.updated_at = datetime.utcnow()
     db.commit()
+    cache_recetas.invalidar()
     db.refresh(db_receta)
     return db_receta
 
@@ -124,6 +181,16 @@ def eliminar_receta(receta_id: str, db: Session = Depends(get_db)):
     if not db_receta:
         raise HTTPException(status_code=404, detail="Receta no encontrada")
     
+    usada_en = [nombre for (nombre,) in db.query(Receta.nombre).join(
+        ComponenteReceta, ComponenteReceta.receta_id == Receta.id
+    ).filter(ComponenteReceta.subreceta_id == receta_id)]
+    if usada_en:
+        raise HTTPException(
+            status_code=400,
+            detail=f"La receta se usa como subreceta en: {', '.join(sorted(usada_en))}"
+        )
+    
     db.delete(db_receta)
     db.commit()
+    cache_recetas.invalidar()
     return {"message": "Receta eliminada exitosamente"}
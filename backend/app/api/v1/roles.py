@@ -10,6 +10,7 @@ import uuid
 
 from app.schemas.rol import RolCreate, RolUpdate, RolResponse, PermisoResponse
 from app.core.database import get_db
+from app.core.cache_usuarios import cache_usuarios
 from app.models.rol import Rol, Permiso, PermisoRol
 
 router = APIRouter()
@@ -66,6 +67,8 @@ async def crear_rol(rol: RolCreate, db: Session = Depends(get_db)):
         db.commit()
         db.refresh(db_rol)
     
+    # Recompilar las máscaras de permisos con el rol nuevo
+    cache_usuarios.invalidar_roles()
     return db_rol
 
 @router.put("/{rol_id}", response_model=RolResponse)
@@ -124,6 +127,7 @@ async def actualizar_rol(
                 db.add(permiso_rol)
     
     db.commit()
+    cache_usuarios.invalidar_roles()
     db.refresh(db_rol)
     return db_rol
 
@@ -139,4 +143,5 @@ async def eliminar_rol(rol_id: str, db: Session = Depends(get_db)):
     
     db.delete(db_rol)
     db.commit()
+    cache_usuarios.invalidar_roles()
     return {"message": "Rol eliminado exitosamente"}
@@ -11,6 +11,7 @@ import uuid
 from app.schemas.sucursal import SucursalCreate, SucursalUpdate, SucursalResponse
 from app.core.database import get_db
 from app.models.sucursal import Sucursal
+from app.services.numeracion_ventas_service import NumeracionVentasService
 
 router = APIRouter()
 
@@ -38,6 +39,7 @@ async def crear_sucursal(sucursal: SucursalCreate, db: Session = Depends(get_db)
         created_at=datetime.utcnow()
     )
     db.add(db_sucursal)
+    NumeracionVentasService.crear_secuencia(db, db_sucursal.id)
     db.commit()
     db.refresh(db_sucursal)
     return db_sucursal
@@ -0,0 +1,111 @@
+"""
+API de Unidades de Medida en Español
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import func, or_
+from datetime import datetime
+import uuid
+
+from app.schemas.unidad import UnidadCreate, UnidadUpdate, UnidadResponse
+from app.core.database import get_db
+from app.core.cache_recetas import cache_recetas
+from app.core.conversion_unidades import conversion_unidades
+from app.models.unidad import Unidad
+from app.models.receta import IngredienteReceta
+from app.models.item_inventario import ItemInventario
+from app.services.costos_recetas_service import CostosRecetasService
+
+router = APIRouter()
+
+def _validar_unidad(db: Session, unidad_id: Optional[str], codigo: str, tipo: str, unidad_base_id: Optional[str]):
+    """Código único (sin distinguir mayúsculas) y unidad base de la misma dimensión"""
+    repetida = db.query(Unidad.id).filter(
+        func.lower(Unidad.codigo) == codigo.lower(),
+        Unidad.id != unidad_id
+    ).first()
+    if repetida:
+        raise HTTPException(status_code=400, detail=f"Ya existe la unidad '{codigo}'")
+    if unidad_base_id is None:
+        return
+    if unidad_base_id == unidad_id:
+        raise HTTPException(status_code=400, detail="Una unidad no puede ser su propia base")
+    base = db.query(Unidad).filter(Unidad.id == unidad_base_id).first()
+    if not base:
+        raise HTTPException(status_code=404, detail="Unidad base no encontrada")
+    if base.tipo != tipo:
+        raise HTTPException(status_code=400, detail="La unidad base debe ser del mismo tipo")
+
+def _items_afectados(db: Session, tipos: List[str]) -> List[str]:
+    """Items de inventario usados en recetas con alguna unidad de esos tipos"""
+    unidades = db.query(Unidad.id, Unidad.codigo).filter(Unidad.tipo.in_(tipos)).all()
+    ids = [unidad.id for unidad in unidades]
+    codigos = [unidad.codigo.lower() for unidad in unidades]
+    return [item_id for (item_id,) in db.query(IngredienteReceta.item_inventario_id).join(
+        ItemInventario, ItemInventario.id == IngredienteReceta.item_inventario_id
+    ).filter(or_(
+        IngredienteReceta.unidad_id.in_(ids),
+        func.lower(IngredienteReceta.unidad).in_(codigos),
+        ItemInventario.unidad_id.in_(ids),
+        func.lower(ItemInventario.unidad).in_(codigos)
+    )).distinct()]
+
+def _confirmar(db: Session, tipos: List[str]):
+    """
+    Commit del cambio de unidades recalculando antes, en la misma transacción, el costo
+    de las recetas cuyos ingredientes o items usan unidades de esos tipos.
+    """
+    try:
+        # Factores nuevos (aún sin confirmar) para recalcular los costos
+        db.flush()
+        conversion_unidades.compilar(db)
+        CostosRecetasService.recalcular_por_items(db, _items_afectados(db, tipos))
+        db.commit()
+    finally:
+        # Confirmada o no, la próxima conversión vuelve a compilar desde lo confirmado
+        conversion_unidades.invalidar()
+    # Los factores quedan guardados en el BOM de las recetas
+    cache_recetas.invalidar()
+
+@router.get("/", response_model=List[UnidadResponse])
+def obtener_unidades(db: Session = Depends(get_db)):
+    """Obtener todas las unidades"""
+    return db.query(Unidad).order_by(Unidad.tipo, Unidad.codigo).all()
+
+@router.post("/", response_model=UnidadResponse)
+def crear_unidad(unidad: UnidadCreate, db: Session = Depends(get_db)):
+    """Crear una unidad de medida; recalcula el costo de las recetas que ya usaban su código"""
+    _validar_unidad(db, None, unidad.codigo, unidad.tipo, unidad.unidad_base_id)
+    db_unidad = Unidad(
+        id=str(uuid.uuid4()),
+        codigo=unidad.codigo,
+        nombre=unidad.nombre,
+        tipo=unidad.tipo,
+        unidad_base_id=unidad.unidad_base_id,
+        factor_conversion=unidad.factor_conversion,
+        activa=unidad.activa,
+        created_at=datetime.utcnow()
+    )
+    db.add(db_unidad)
+    # Los ingredientes que ya usaban el código empiezan a convertirse
+    _confirmar(db, [db_unidad.tipo])
+    db.refresh(db_unidad)
+    return db_unidad
+
+@router.put("/{unidad_id}", response_model=UnidadResponse)
+def actualizar_unidad(unidad_id: str, unidad: UnidadUpdate, db: Session = Depends(get_db)):
+    """Actualizar una unidad; recalcula el costo de las recetas que la usan"""
+    db_unidad = db.query(Unidad).filter(Unidad.id == unidad_id).first()
+    if not db_unidad:
+        raise HTTPException(status_code=404, detail="Unidad no encontrada")
+
+    tipo_anterior = db_unidad.tipo
+    update_data = unidad.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(db_unidad, field, value)
+    _validar_unidad(db, unidad_id, db_unidad.codigo, db_unidad.tipo, db_unidad.unidad_base_id)
+
+    _confirmar(db, [tipo_anterior, db_unidad.tipo])
+    db.refresh(db_unidad)
+    return db_unidad
@@ -7,24 +7,17 @@ from sqlalchemy.orm import Session
 from sqlalchemy import desc
 from datetime import datetime
 import uuid
-import bcrypt
 
 from app.schemas.usuario import UsuarioCreate, UsuarioUpdate, UsuarioResponse
+from app.core import security
 from app.core.database import get_db
+from app.core.cache_usuarios import cache_usuarios
+from app.services.tokens_refresco_service import TokensRefrescoService
 from app.models.usuario import Usuario
 from app.models.rol import Rol, UsuarioRol
 
 router = APIRouter()
 
-def get_password_hash(password: str) -> str:
-    """Hash a password using bcrypt directly"""
-    password_bytes = password.encode('utf-8')
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
-
 @router.get("/", response_model=List[UsuarioResponse])
 async def obtener_usuarios(db: Session = Depends(get_db)):
     """Obtener todos los usuarios"""
@@ -56,7 +49,7 @@ async def crear_usuario(usuario: UsuarioCreate, db: Session = Depends(get_db)):
         id=str(uuid.uuid4()),
         email=usuario.email,
         nombre_usuario=usuario.nombre_usuario,
-        contrasena_hash=get_password_hash(usuario.contrasena),
+        contrasena_hash=await security.get_password_hash_async(usuario.contrasena),
         nombre_completo=usuario.nombre_completo,
         telefono=usuario.telefono,
         activo=usuario.activo,
@@ -118,7 +111,7 @@ async def actualizar_usuario(
         setattr(db_usuario, key, value)
     
     if usuario_update.contrasena:
-        db_usuario.contrasena_hash = get_password_hash(usuario_update.contrasena)
+        db_usuario.contrasena_hash = await security.get_password_hash_async(usuario_update.contrasena)
     
     # Actualizar rol
     if usuario_update.rol_id:
@@ -143,6 +136,10 @@ async def actualizar_usuario(
     
     db_usuario.updated_at = datetime.utcnow()
     db.commit()
+    cache_usuarios.invalidar_usuario(usuario_id)
+    if usuario_update.contrasena or usuario_update.activo is False:
+        # Cerrar las sesiones abiertas: sin esto un refresh token seguiría renovándose
+        TokensRefrescoService.revocar_usuario(db, usuario_id)
     db.refresh(db_usuario)
     return db_usuario
 
@@ -156,6 +153,9 @@ async def eliminar_usuario(usuario_id: str, db: Session = Depends(get_db)):
     if db_usuario.es_superusuario:
         raise HTTPException(status_code=400, detail="No se puede eliminar un superusuario")
     
+    # Antes de borrar: el borrado en cascada elimina las familias de refresh tokens
+    TokensRefrescoService.revocar_usuario(db, usuario_id)
     db.delete(db_usuario)
     db.commit()
+    cache_usuarios.invalidar_usuario(usuario_id)
     return {"message": "Usuario eliminado exitosamente"}
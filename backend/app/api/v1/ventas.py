@@ -1,39 +1,107 @@
 """
 API de Ventas en Español
 """
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import List, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
 from datetime import datetime
 import uuid
 
-from app.schemas.venta import VentaCreate, VentaUpdate, VentaResponse
+from app.schemas.venta import VentaCreate, VentaUpdate, VentaResponse, VentaLoteCreate, VentaLoteResponse
 from app.core.database import get_db
+from app.core.cache import cache
 from app.models.venta import Venta, ItemVenta
 from app.models.sucursal import Sucursal
-from app.models.sucursal import Sucursal
-from app.models.receta import Receta, IngredienteReceta
-from app.models.item_inventario import ItemInventario
 from app.models.caja import CajaSesion
 from app.models.configuracion import Configuracion
 from app.api.deps import get_current_active_user
+from app.api.paginacion import Paginacion, paginar
+from app.api.idempotencia import (
+    CABECERA_IDEMPOTENCIA, CABECERA_REPETIDA,
+    clave_idempotencia, huella, respuesta_guardada, guardar_respuesta, confirmar
+)
+from app.services.stock_service import StockService, StockInsuficienteError
+from app.services.resumen_ventas_service import ResumenVentasService
+from app.services.numeracion_ventas_service import NumeracionVentasService
+from app.services.ventas_lote_service import VentasLoteService, VENTA_CREADA, VENTA_DUPLICADA, VENTA_RECHAZADA
 
 router = APIRouter()
 
+def _huella_venta(venta: VentaCreate) -> str:
+    """Huella del contenido de una venta, sin mesero_id (se fuerza al usuario) ni orden de items"""
+    contenido = venta.model_dump(exclude={"mesero_id"})
+    contenido["items"] = sorted(contenido["items"], key=huella)
+    return huella(contenido)
+
+def _venta_de_lote(db: Session, usuario_id: str, clave: str, venta: VentaCreate) -> Optional[JSONResponse]:
+    """
+    Venta del usuario registrada por /ventas/batch con la misma clave (el POS pudo
+    enviarla en un lote antes de reintentarla aquí). Se responde como un reintento si
+    el contenido coincide y con 422 si no, igual que respuesta_guardada.
+    """
+    existente = db.query(Venta).options(selectinload(Venta.items)).filter(
+        Venta.clave_idempotencia == clave,
+        Venta.mesero_id == usuario_id
+    ).first()
+    if existente is None:
+        return None
+    if _huella_venta(VentaCreate.model_validate(existente, from_attributes=True)) != _huella_venta(venta):
+        raise HTTPException(
+            status_code=422,
+            detail=f"La {CABECERA_IDEMPOTENCIA} ya se usó con otra petición"
+        )
+    return JSONResponse(
+        content=jsonable_encoder(VentaResponse.model_validate(existente)),
+        headers={CABECERA_REPETIDA: "true"}
+    )
+
+
 @router.get("/", response_model=List[VentaResponse])
-def obtener_ventas(db: Session = Depends(get_db)):
-    """Obtener todas las ventas"""
-    ventas = db.query(Venta).order_by(desc(Venta.fecha_creacion)).all()
-    return ventas
+def obtener_ventas(
+    response: Response,
+    sucursal_id: Optional[str] = None,
+    estado: Optional[str] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    paginacion: Paginacion = Depends(),
+    db: Session = Depends(get_db)
+):
+    """Obtener ventas, de la más reciente a la más antigua (paginado por cursor)"""
+    query = db.query(Venta).options(selectinload(Venta.items))
+    if sucursal_id:
+        query = query.filter(Venta.sucursal_id == sucursal_id)
+    if estado:
+        query = query.filter(Venta.estado == estado)
+    if desde:
+        query = query.filter(Venta.fecha_creacion >= desde)
+    if hasta:
+        query = query.filter(Venta.fecha_creacion < hasta)
+    return paginar(query, Venta.fecha_creacion, Venta.id, paginacion, response)
 
 @router.post("/", response_model=VentaResponse)
 def crear_venta(
     venta: VentaCreate, 
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_active_user)
+    current_user = Depends(get_current_active_user),
+    clave: Optional[str] = Depends(clave_idempotencia)
 ):
-    """Crear una nueva venta con validaciones estrictas"""
+    """
+    Crear una nueva venta con validaciones estrictas.
+    
+    Con la cabecera Idempotency-Key, reintentar la misma venta retorna la respuesta
+    original en lugar de registrarla (y descontar el stock) otra vez.
+    """
+    endpoint, hash_peticion = "POST /ventas", huella(venta)
+    guardada = respuesta_guardada(db, current_user.id, clave, endpoint, hash_peticion)
+    if guardada:
+        return guardada
+    if clave:
+        del_lote = _venta_de_lote(db, current_user.id, clave, venta)
+        if del_lote:
+            return del_lote
     
     # 0. Validar Caja Abierta
     # Buscar sesión de caja abierta para el usuario en esta sucursal
@@ -62,8 +130,19 @@ def crear_venta(
     config = db.query(Configuracion).first()
     permitir_stock_negativo = config.permitir_stock_negativo if config else True
     
-    # Generar número de venta
-    numero_venta = f"V-{int(datetime.utcnow().timestamp())}"
+    # 4. Calcular consumo agregado y validar stock antes de escribir
+    consumo = StockService.calcular_consumo(
+        db, ((item.receta_id, item.cantidad) for item in venta.items)
+    )
+    try:
+        consumo = StockService.validar_stock(
+            db, venta.sucursal_id, consumo, permitir_stock_negativo
+        )
+    except StockInsuficienteError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Número correlativo de la sucursal (secuencia: sin colisiones entre ventas simultáneas)
+    numero_venta = NumeracionVentasService.siguiente_numero(db, venta.sucursal_id)
     
     db_venta = Venta(
         id=str(uuid.uuid4()),
@@ -82,53 +161,104 @@ def crear_venta(
         metodo_pago=venta.metodo_pago,
         notas=venta.notas,
         estado=venta.estado,
-        fecha_creacion=datetime.utcnow()
+        fecha_creacion=datetime.utcnow(),
+        clave_idempotencia=clave
     )
     db.add(db_venta)
-    db.flush()
     
-    # Agregar items y validar stock
-    for item in venta.items:
-        db_item = ItemVenta(
+    # Agregar items con el costo y la versión de receta vigentes (snapshot)
+    costos = ResumenVentasService.snapshot_costos(db, (item.receta_id for item in venta.items))
+    items_venta = [
+        ItemVenta(
             id=str(uuid.uuid4()),
             venta_id=db_venta.id,
             receta_id=item.receta_id,
             nombre_item=item.nombre_item,
             cantidad=item.cantidad,
             precio_unitario=item.precio_unitario,
-            total=item.total
+            total=item.total,
+            costo_unitario=costos.get(item.receta_id, (None, None))[0],
+            receta_version=costos.get(item.receta_id, (None, None))[1]
         )
-        db.add(db_item)
-
-        # Descontar de inventario
-        receta = db.query(Receta).filter(Receta.id == item.receta_id).first()
-        
-        if receta and receta.ingredientes:
-            for ingrediente in receta.ingredientes:
-                if ingrediente.item_inventario_id:
-                    item_inv = db.query(ItemInventario).filter(
-                        ItemInventario.id == ingrediente.item_inventario_id,
-                        ItemInventario.sucursal_id == venta.sucursal_id
-                    ).first()
-                    
-                    if item_inv:
-                        cantidad_necesaria = ingrediente.cantidad * item.cantidad
-                        
-                        # Validar stock si no se permite negativo
-                        if not permitir_stock_negativo and (item_inv.cantidad - cantidad_necesaria) < 0:
-                            raise HTTPException(
-                                status_code=400,
-                                detail=f"Stock insuficiente para '{item_inv.nombre}'. Disponible: {item_inv.cantidad}, Necesario: {cantidad_necesaria}"
-                            )
-                        
-                        item_inv.cantidad -= cantidad_necesaria
-                        item_inv.ultima_actualizacion = datetime.utcnow()
-                        db.add(item_inv)
+        for item in venta.items
+    ]
+    db.add_all(items_venta)
+    try:
+        db.flush()
+    except IntegrityError:
+        # Un envío simultáneo con la misma clave registró su venta primero (índice único
+        # de clave_idempotencia): se responde con la de aquel
+        db.rollback()
+        if not clave:
+            raise
+        previa = (
+            respuesta_guardada(db, current_user.id, clave, endpoint, hash_peticion)
+            or _venta_de_lote(db, current_user.id, clave, venta)
+        )
+        if previa is None:
+            raise HTTPException(
+                status_code=422,
+                detail=f"La {CABECERA_IDEMPOTENCIA} ya se usó con otra petición"
+            )
+        return previa
     
-    db.commit()
+    # 5. Descontar inventario en un único UPDATE atómico (y registrar los movimientos)
+    try:
+        StockService.aplicar_descuento(db, consumo, permitir_stock_negativo, {
+            "tipo_movimiento": "VENTA",
+            "referencia_id": db_venta.id,
+            "tipo_referencia": "venta",
+            "usuario_id": current_user.id
+        })
+    except StockInsuficienteError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # 6. Acumular en el resumen diario (misma transacción que la venta)
+    ResumenVentasService.registrar_venta(db, db_venta, items_venta)
+    
+    if clave:
+        db_venta.items = items_venta
+        guardar_respuesta(db, current_user.id, clave, endpoint, hash_peticion,
+                          VentaResponse.model_validate(db_venta))
+    repetida = confirmar(db, current_user.id, clave, endpoint, hash_peticion)
+    if repetida:
+        return repetida
+    cache.invalidar("ventas", "inventario")
     db.refresh(db_venta)
     return db_venta
 
+@router.post("/batch", response_model=VentaLoteResponse)
+def crear_ventas_lote(
+    lote: VentaLoteCreate,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """
+    Registrar un lote de ventas guardadas por el POS sin conexión.
+
+    Cada venta lleva una clave_idempotencia generada por el POS: reenviar el lote
+    (o parte de él) no duplica ventas. Retorna un resultado por venta.
+    """
+    try:
+        resultados = VentasLoteService.registrar(db, current_user.id, lote.ventas)
+        db.commit()
+    except IntegrityError:
+        # Otra petición registró alguna de estas claves al mismo tiempo; al reintentar
+        # esas ventas salen como DUPLICADA
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Lote en conflicto con otro envío simultáneo, reintentar")
+    
+    creadas = sum(1 for r in resultados if r["estado"] == VENTA_CREADA)
+    if creadas:
+        cache.invalidar("ventas", "inventario")
+    return {
+        "creadas": creadas,
+        "duplicadas": sum(1 for r in resultados if r["estado"] == VENTA_DUPLICADA),
+        "rechazadas": sum(1 for r in resultados if r["estado"] == VENTA_RECHAZADA),
+        "resultados": resultados
+    }
+
 @router.get("/{venta_id}", response_model=VentaResponse)
 def obtener_venta(venta_id: str, db: Session = Depends(get_db)):
     """Obtener una venta específica"""
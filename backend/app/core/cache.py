@@ -0,0 +1,234 @@
+"""
+Caché de respuestas para dashboard y reportes
+
+Las entradas se agrupan por etiquetas ("ventas", "inventario", ...). Invalidar una
+etiqueta incrementa su versión, y como la versión forma parte de la clave, todas las
+entradas anteriores quedan obsoletas sin tener que recorrerlas (expiran por TTL/LRU).
+
+Backends:
+- "memoria": LRU en proceso (por defecto). Con varios workers cada uno tiene su copia
+  y solo ve las invalidaciones de su propio proceso; el TTL acota el desfase.
+- "redis": compartido entre workers (requiere el paquete redis y CACHE_URL). Acepta
+  cualquier cliente con get/setex/mget/incr, por lo que se puede sustituir por un
+  doble local en pruebas.
+
+Una respuesta leída de una réplica con retraso no se guarda: podría ser anterior a la
+última invalidación y quedaría bajo la versión nueva de la etiqueta durante todo el TTL.
+"""
+import json
+import time
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict, defaultdict
+from functools import wraps
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+
+# Parámetros de endpoint que no forman parte de la clave
+_PARAMETROS_IGNORADOS = {"db", "current_user"}
+
+_SIN_VALOR = object()
+
+
+def _lectura_atrasada(db: Any) -> bool:
+    """True si db es una sesión de la réplica con retraso (ver database.INFO_LAG_REPLICA)"""
+    info = getattr(db, "info", None)
+    if not isinstance(info, dict) or "lag_replica" not in info:
+        return False
+    lag = info["lag_replica"]
+    return lag is None or lag > 0
+
+
+class CacheBackend:
+    """Interfaz mínima de un backend de caché"""
+
+    def get(self, clave: str) -> Any:
+        """Retorna el valor o _SIN_VALOR si no existe o expiró"""
+        raise NotImplementedError
+
+    def set(self, clave: str, valor: Any, ttl: int) -> None:
+        raise NotImplementedError
+
+    def versiones(self, etiquetas: Iterable[str]) -> List[int]:
+        raise NotImplementedError
+
+    def incrementar_version(self, etiqueta: str) -> None:
+        raise NotImplementedError
+
+    def limpiar(self) -> None:
+        raise NotImplementedError
+
+
+class LRUCacheBackend(CacheBackend):
+    """LRU con TTL en memoria del proceso"""
+
+    def __init__(self, max_entradas: int = 1024):
+        self.max_entradas = max_entradas
+        self._entradas: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._versiones: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def get(self, clave: str) -> Any:
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return _SIN_VALOR
+            expira, valor = entrada
+            if expira < time.monotonic():
+                del self._entradas[clave]
+                return _SIN_VALOR
+            self._entradas.move_to_end(clave)
+            return valor
+
+    def set(self, clave: str, valor: Any, ttl: int) -> None:
+        with self._lock:
+            self._entradas[clave] = (time.monotonic() + ttl, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def versiones(self, etiquetas: Iterable[str]) -> List[int]:
+        with self._lock:
+            return [self._versiones[etiqueta] for etiqueta in etiquetas]
+
+    def incrementar_version(self, etiqueta: str) -> None:
+        with self._lock:
+            self._versiones[etiqueta] += 1
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self._versiones.clear()
+
+
+class RedisCacheBackend(CacheBackend):
+    """Backend compartido; los valores se guardan como JSON"""
+
+    def __init__(self, url: Optional[str] = None, cliente=None, prefijo: str = "gastrosmart:cache:"):
+        if cliente is None:
+            try:
+                import redis
+            except ImportError:
+                raise ImportError("redis is not installed. Install it with: pip install redis")
+            cliente = redis.Redis.from_url(url)
+        self.cliente = cliente
+        self.prefijo = prefijo
+
+    def get(self, clave: str) -> Any:
+        valor = self.cliente.get(self.prefijo + clave)
+        return _SIN_VALOR if valor is None else json.loads(valor)
+
+    def set(self, clave: str, valor: Any, ttl: int) -> None:
+        self.cliente.setex(self.prefijo + clave, ttl, json.dumps(valor))
+
+    def versiones(self, etiquetas: Iterable[str]) -> List[int]:
+        claves = [f"{self.prefijo}v:{etiqueta}" for etiqueta in etiquetas]
+        return [int(v or 0) for v in self.cliente.mget(claves)] if claves else []
+
+    def incrementar_version(self, etiqueta: str) -> None:
+        self.cliente.incr(f"{self.prefijo}v:{etiqueta}")
+
+    def limpiar(self) -> None:
+        for clave in self.cliente.scan_iter(f"{self.prefijo}*"):
+            self.cliente.delete(clave)
+
+
+class ResponseCache:
+    """Caché de endpoints con contadores de aciertos/fallos por endpoint"""
+
+    def __init__(self, backend: CacheBackend, ttl: int = 60, habilitada: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.habilitada = habilitada
+        self._contadores: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self._lock = threading.Lock()
+
+    def _contar(self, endpoint: str, resultado: str) -> None:
+        with self._lock:
+            self._contadores[endpoint][resultado] += 1
+
+    def _clave(self, endpoint: str, etiquetas: Tuple[str, ...], parametros: Dict[str, Any]) -> str:
+        versiones = self.backend.versiones(etiquetas)
+        firma = json.dumps(jsonable_encoder(parametros), sort_keys=True)
+        resumen = hashlib.sha1(firma.encode()).hexdigest()
+        return f"{endpoint}:{'.'.join(map(str, versiones))}:{resumen}"
+
+    def cachear(self, etiquetas: Iterable[str], ttl: Optional[int] = None):
+        """
+        Decorador para endpoints async. La clave incluye el nombre del endpoint, sus
+        parámetros (incluido sucursal_id) y la versión de cada etiqueta.
+        """
+        etiquetas = tuple(etiquetas)
+
+        def decorador(funcion):
+            endpoint = f"{funcion.__module__.rsplit('.', 1)[-1]}.{funcion.__name__}"
+            firma = inspect.signature(funcion)
+
+            @wraps(funcion)
+            async def envoltura(*args, **kwargs):
+                if not self.habilitada:
+                    return await funcion(*args, **kwargs)
+
+                argumentos = firma.bind(*args, **kwargs)
+                argumentos.apply_defaults()
+                parametros = {
+                    nombre: valor for nombre, valor in argumentos.arguments.items()
+                    if nombre not in _PARAMETROS_IGNORADOS
+                }
+                clave = self._clave(endpoint, etiquetas, parametros)
+
+                valor = self.backend.get(clave)
+                if valor is not _SIN_VALOR:
+                    self._contar(endpoint, "hits")
+                    return valor
+
+                self._contar(endpoint, "misses")
+                valor = jsonable_encoder(await funcion(*args, **kwargs))
+                if not _lectura_atrasada(argumentos.arguments.get("db")):
+                    self.backend.set(clave, valor, ttl or self.ttl)
+                return valor
+
+            return envoltura
+
+        return decorador
+
+    def invalidar(self, *etiquetas: str) -> None:
+        """Invalida todas las entradas que dependen de alguna de las etiquetas"""
+        for etiqueta in etiquetas:
+            self.backend.incrementar_version(etiqueta)
+
+    def estadisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            por_endpoint = {endpoint: dict(c) for endpoint, c in self._contadores.items()}
+        hits = sum(c["hits"] for c in por_endpoint.values())
+        misses = sum(c["misses"] for c in por_endpoint.values())
+        return {
+            "backend": type(self.backend).__name__,
+            "habilitada": self.habilitada,
+            "ttl_segundos": self.ttl,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "endpoints": por_endpoint,
+        }
+
+    def reiniciar_estadisticas(self) -> None:
+        with self._lock:
+            self._contadores.clear()
+
+
+def _crear_backend() -> CacheBackend:
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCacheBackend(settings.CACHE_URL)
+    return LRUCacheBackend(settings.CACHE_MAX_ENTRADAS)
+
+
+cache = ResponseCache(
+    _crear_backend(),
+    ttl=settings.CACHE_TTL_SEGUNDOS,
+    habilitada=settings.CACHE_HABILITADA
+)
@@ -0,0 +1,205 @@
+"""
+Caché por proceso de la lista de materiales (BOM) de cada receta
+
+Las ventas necesitan, por cada receta vendida, qué items de inventario consume y en
+qué cantidad. Esas filas cambian muy rara vez, así que se guardan en memoria como
+tuplas compactas (item_inventario_id, cantidad por unidad vendida, factor de unidad)
+y se cargan bajo demanda: solo las recetas que faltan, una consulta por nivel de
+subrecetas. Cada BOM ya incluye los insumos de sus subrecetas, así que una receta
+con un árbol profundo se resuelve en la venta con una sola búsqueda en el dict.
+
+crear_receta, actualizar_receta y eliminar_receta incrementan Receta.version_actual e
+invalidan la etiqueta "recetas" de la caché de respuestas. En el worker que hizo el
+cambio es inmediato; la versión compartida (CACHE_BACKEND=redis) se consulta como
+mucho cada INTERVALO_VERSION segundos y, con el backend en memoria, la caché se
+descarta además cada BOM_CACHE_TTL_SEGUNDOS.
+"""
+import time
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Integer, String, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.conversion_unidades import conversion_unidades
+from app.models.item_inventario import ItemInventario
+from app.models.receta import Receta, IngredienteReceta, ComponenteReceta
+
+ETIQUETA_RECETAS = "recetas"
+
+INTERVALO_VERSION = 1.0
+
+# (item_inventario_id, cantidad por unidad vendida, factor de la unidad de la receta a la del item)
+# El factor viene de conversion_unidades al cargar; editar unidades también invalida esta caché.
+Componente = Tuple[str, float, float]
+Bom = Tuple[Componente, ...]
+
+
+def _filas_nivel(db: Session, receta_ids: Set[str]):
+    """Ingredientes de inventario y subrecetas de las recetas, en una sola consulta"""
+    ingredientes = select(
+        IngredienteReceta.receta_id,
+        IngredienteReceta.item_inventario_id,
+        literal(None, String).label("subreceta_id"),
+        IngredienteReceta.cantidad,
+        literal(1, Integer).label("porciones"),
+        IngredienteReceta.unidad_id,
+        IngredienteReceta.unidad,
+        ItemInventario.unidad_id.label("item_unidad_id"),
+        ItemInventario.unidad.label("item_unidad")
+    ).join(
+        ItemInventario, ItemInventario.id == IngredienteReceta.item_inventario_id
+    ).where(
+        IngredienteReceta.receta_id.in_(receta_ids),
+        IngredienteReceta.item_inventario_id.isnot(None)
+    )
+    subrecetas = select(
+        ComponenteReceta.receta_id,
+        literal(None, String),
+        ComponenteReceta.subreceta_id,
+        ComponenteReceta.cantidad,
+        Receta.porciones,
+        literal(None, String),
+        literal(None, String),
+        literal(None, String),
+        literal(None, String)
+    ).join(
+        Receta, Receta.id == ComponenteReceta.subreceta_id
+    ).where(
+        ComponenteReceta.receta_id.in_(receta_ids)
+    )
+    return db.execute(union_all(ingredientes, subrecetas))
+
+
+def cargar_bom(
+    db: Session, receta_ids: Iterable[str], conocidos: Optional[Dict[str, Bom]] = None
+) -> Dict[str, Bom]:
+    """
+    BOM de las recetas con las subrecetas ya explotadas a insumos.
+
+    Se lee un nivel del árbol por consulta (las subrecetas que están en `conocidos`
+    no se vuelven a leer) y cada subreceta se aplana una sola vez aunque aparezca en
+    varias ramas. Una subreceta aporta sus insumos × porciones usadas / sus porciones.
+
+    Returns:
+        BOM de las recetas pedidas y de todas las subrecetas leídas (tupla vacía si no
+        consumen inventario).
+    """
+    conocidos = conocidos or {}
+    directos: Dict[str, List[Componente]] = {}
+    subrecetas: Dict[str, List[Tuple[str, float]]] = {}
+    pendientes = {receta_id for receta_id in receta_ids if receta_id not in conocidos}
+    while pendientes:
+        for receta_id in pendientes:
+            directos[receta_id] = []
+            subrecetas[receta_id] = []
+        for fila in _filas_nivel(db, pendientes):
+            receta_id, item_inventario_id, subreceta_id, cantidad, porciones = fila[:5]
+            if subreceta_id is None:
+                factor = conversion_unidades.factor(db, *fila[5:])
+                directos[receta_id].append((item_inventario_id, cantidad, factor))
+            else:
+                subrecetas[receta_id].append((subreceta_id, cantidad / (porciones or 1)))
+        pendientes = {
+            subreceta_id
+            for receta_id in pendientes
+            for subreceta_id, _ in subrecetas[receta_id]
+            if subreceta_id not in directos and subreceta_id not in conocidos
+        }
+
+    boms: Dict[str, Bom] = {}
+
+    def aplanar(receta_id: str, en_curso: Set[str]) -> Bom:
+        if receta_id in boms:
+            return boms[receta_id]
+        if receta_id in conocidos:
+            return conocidos[receta_id]
+        if receta_id in en_curso:
+            # Los ciclos se rechazan al guardar; si hubiera uno, la rama no aporta insumos
+            return ()
+        en_curso.add(receta_id)
+        totales: Dict[Tuple[str, float], float] = defaultdict(float)
+        for item_inventario_id, cantidad, factor in directos[receta_id]:
+            totales[(item_inventario_id, factor)] += cantidad
+        for subreceta_id, escala in subrecetas[receta_id]:
+            for item_inventario_id, cantidad, factor in aplanar(subreceta_id, en_curso):
+                totales[(item_inventario_id, factor)] += cantidad * escala
+        en_curso.discard(receta_id)
+        boms[receta_id] = tuple(
+            (item_inventario_id, cantidad, factor)
+            for (item_inventario_id, factor), cantidad in totales.items()
+        )
+        return boms[receta_id]
+
+    for receta_id in directos:
+        aplanar(receta_id, set())
+    return boms
+
+
+class CacheRecetas:
+    """BOM por receta_id, descartado completo cuando cambia cualquier receta"""
+
+    def __init__(self, ttl: int = 60):
+        self.ttl = ttl
+        self._bom: Dict[str, Bom] = {}
+        self._generacion = 0
+        self._version: Optional[int] = None
+        self._verificado_en = float("-inf")
+        self._cargado_en = float("-inf")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version_recetas() -> int:
+        return cache.backend.versiones([ETIQUETA_RECETAS])[0]
+
+    def _reiniciar(self) -> None:
+        version = self._version_recetas()
+        with self._lock:
+            self._bom = {}
+            self._generacion += 1
+            self._version = version
+            self._verificado_en = self._cargado_en = time.monotonic()
+
+    def vigente(self) -> bool:
+        if self._version is None:
+            return False
+        ahora = time.monotonic()
+        if ahora - self._cargado_en > self.ttl:
+            return False
+        if ahora - self._verificado_en < INTERVALO_VERSION:
+            return True
+        self._verificado_en = ahora
+        return self._version == self._version_recetas()
+
+    def bom(self, db: Session, receta_ids: Iterable[str]) -> Dict[str, Bom]:
+        """BOM de cada receta; solo las que no están en memoria se leen de la base"""
+        if not self.vigente():
+            self._reiniciar()
+        ids = set(receta_ids)
+        boms = self._bom
+        faltantes = [receta_id for receta_id in ids if receta_id not in boms]
+        if faltantes:
+            generacion = self._generacion
+            cargados = cargar_bom(db, faltantes, boms)
+            with self._lock:
+                # Si se invalidó mientras se leía, lo leído puede ser anterior al cambio
+                if generacion == self._generacion:
+                    self._bom.update(cargados)
+            return {
+                receta_id: cargados[receta_id] if receta_id in cargados else boms[receta_id]
+                for receta_id in ids
+            }
+        return {receta_id: boms[receta_id] for receta_id in ids}
+
+    def invalidar(self) -> None:
+        """Tras crear, modificar o eliminar recetas (después del commit)"""
+        with self._lock:
+            self._bom = {}
+            self._generacion += 1
+        cache.invalidar(ETIQUETA_RECETAS)
+
+
+cache_recetas = CacheRecetas(ttl=settings.BOM_CACHE_TTL_SEGUNDOS)
@@ -0,0 +1,162 @@
+"""
+Caché del usuario autenticado y sus permisos
+
+get_current_user resuelve al usuario sin tocar la base de datos en el caso normal:
+- El token emitido en el login lleva los roles y permisos ("roles", "permisos", "su")
+  y la versión de permisos vigente al emitirlo ("pv").
+- Si la versión del token sigue siendo la actual, se confía en sus claims.
+- Si no (usuario o roles modificados después del login), se usa la caché por proceso
+  (TTL corto, clave = sub) y, si expiró, una sola consulta a la base.
+
+La versión de permisos se apoya en las versiones por etiqueta de la caché de respuestas
+("usuario:<id>" y "roles"). Con CACHE_BACKEND=redis la invalidación la ven todos los
+workers; con el backend en memoria la versión incluye una época aleatoria del proceso,
+así que los tokens emitidos por otro worker (o antes de reiniciar) pasan por la caché
+por proceso en lugar de confiar en sus claims. Como ese worker tampoco ve los cambios
+hechos en otros, en el worker que emitió el token los claims solo se confían durante
+AUTH_CACHE_TTL_SEGUNDOS desde su emisión ("iat"); después se revalida igual que la
+caché por proceso.
+"""
+import time
+import uuid
+import threading
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache, LRUCacheBackend
+from app.core.config import settings
+from app.core.permisos import permisos_compilados
+from app.models.usuario import Usuario
+from app.models.rol import Permiso, PermisoRol, UsuarioRol
+
+# Permisos implícitos de un superusuario (igual que Usuario.permisos)
+PERMISOS_SUPERUSUARIO = frozenset({"admin", "all"})
+
+_EPOCA_PROCESO = uuid.uuid4().hex[:8]
+
+
+@dataclass(frozen=True)
+class UsuarioActual:
+    """Lo necesario para autorizar una petición, sin sesión ni relaciones perezosas"""
+    id: str
+    activo: bool
+    es_superusuario: bool
+    roles: FrozenSet[str]
+    permisos: FrozenSet[str]
+
+    def tiene_permiso(self, permiso: str) -> bool:
+        return self.es_superusuario or permiso in self.permisos
+
+
+def _etiquetas(usuario_id: str) -> Tuple[str, str]:
+    return (f"usuario:{usuario_id}", "roles")
+
+
+def version_permisos(usuario_id: str) -> str:
+    """Versión actual de los permisos del usuario, tal como se guarda en el claim "pv" """
+    versiones = ".".join(map(str, cache.backend.versiones(_etiquetas(usuario_id))))
+    if isinstance(cache.backend, LRUCacheBackend):
+        return f"{_EPOCA_PROCESO}:{versiones}"
+    return versiones
+
+
+def cargar_usuario_actual(db: Session, usuario_id: str) -> Optional[UsuarioActual]:
+    """Usuario, roles y permisos en dos consultas (en lugar de recorrer roles → rol → permisos)"""
+    fila = db.query(Usuario.id, Usuario.activo, Usuario.es_superusuario).filter(
+        Usuario.id == usuario_id
+    ).first()
+    if fila is None:
+        return None
+    roles, permisos = set(), set()
+    for rol_id, nombre in db.query(UsuarioRol.rol_id, Permiso.nombre).outerjoin(
+        PermisoRol, PermisoRol.rol_id == UsuarioRol.rol_id
+    ).outerjoin(
+        Permiso, Permiso.id == PermisoRol.permiso_id
+    ).filter(UsuarioRol.usuario_id == usuario_id):
+        roles.add(rol_id)
+        if nombre:
+            permisos.add(nombre)
+    if fila.es_superusuario:
+        permisos |= PERMISOS_SUPERUSUARIO
+    return UsuarioActual(
+        id=fila.id,
+        activo=bool(fila.activo),
+        es_superusuario=bool(fila.es_superusuario),
+        roles=frozenset(roles),
+        permisos=frozenset(permisos)
+    )
+
+
+class CacheUsuarios:
+    """UsuarioActual por id con TTL, en memoria del proceso"""
+
+    def __init__(self, ttl: int = 30):
+        self.ttl = ttl
+        self._entradas: Dict[str, Tuple[float, UsuarioActual]] = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, db: Session, usuario_id: str) -> Optional[UsuarioActual]:
+        with self._lock:
+            entrada = self._entradas.get(usuario_id)
+        if entrada is not None and entrada[0] > time.monotonic():
+            return entrada[1]
+
+        usuario = cargar_usuario_actual(db, usuario_id)
+        if usuario is not None:
+            with self._lock:
+                self._entradas[usuario_id] = (time.monotonic() + self.ttl, usuario)
+        return usuario
+
+    def desde_claims(self, payload: dict) -> Optional[UsuarioActual]:
+        """UsuarioActual a partir del token si sus permisos siguen vigentes, si no None"""
+        usuario_id = payload.get("sub")
+        if not usuario_id or not {"roles", "permisos", "pv"} <= payload.keys():
+            return None
+        if payload["pv"] != version_permisos(usuario_id):
+            return None
+        if isinstance(cache.backend, LRUCacheBackend):
+            # La versión local no refleja cambios hechos en otros workers
+            iat = payload.get("iat")
+            if iat is None or time.time() - iat > self.ttl:
+                return None
+        es_superusuario = bool(payload.get("su", False))
+        permisos = frozenset(payload["permisos"])
+        return UsuarioActual(
+            id=usuario_id,
+            activo=True,  # Solo se emiten tokens a usuarios activos; desactivar invalida
+            es_superusuario=es_superusuario,
+            roles=frozenset(payload["roles"]),
+            permisos=permisos | PERMISOS_SUPERUSUARIO if es_superusuario else permisos
+        )
+
+    @staticmethod
+    def claims(db: Session, usuario_id: str) -> dict:
+        """Claims de permisos para incluir en el token al iniciar sesión"""
+        # La versión se lee antes que los permisos: un cambio entre ambas lecturas deja
+        # el token con una versión vieja (se revalida) y nunca al revés
+        version = version_permisos(usuario_id)
+        usuario = cargar_usuario_actual(db, usuario_id)
+        return {
+            "roles": sorted(usuario.roles),
+            "permisos": sorted(usuario.permisos - PERMISOS_SUPERUSUARIO),
+            "su": usuario.es_superusuario,
+            "pv": version,
+        }
+
+    def invalidar_usuario(self, usuario_id: str) -> None:
+        """Tras modificar o eliminar un usuario: caché local y tokens ya emitidos"""
+        with self._lock:
+            self._entradas.pop(usuario_id, None)
+        cache.invalidar(_etiquetas(usuario_id)[0])
+
+    def invalidar_roles(self) -> None:
+        """Tras modificar los permisos de un rol: afecta a todos los usuarios"""
+        with self._lock:
+            self._entradas.clear()
+        cache.invalidar("roles")
+        permisos_compilados.invalidar()
+
+
+cache_usuarios = CacheUsuarios(ttl=settings.AUTH_CACHE_TTL_SEGUNDOS)
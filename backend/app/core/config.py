@@ -15,7 +15,13 @@ class Settings(BaseSettings):
     API_V1_PREFIX: str = "/api/v1"
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15  # vida corta: se renuevan con el refresh token
+    REFRESH_TOKEN_EXPIRE_HORAS: int = 12  # una sesión (turno) por login
+    AUTH_CACHE_TTL_SEGUNDOS: int = 30  # caché por proceso del usuario autenticado y sus permisos
+    BCRYPT_ROUNDS: int = 12  # al cambiarlo, los hashes se actualizan en el siguiente login
+    HASH_MAX_HILOS: int = 4  # hilos para bcrypt (por worker); acotar a los núcleos disponibles
+    IDEMPOTENCIA_TTL_HORAS: int = 24  # respuestas guardadas para reintentos con Idempotency-Key
+    BOM_CACHE_TTL_SEGUNDOS: int = 60  # caché por proceso de los ingredientes de cada receta y de las unidades
     
     # AI Configuration
     OPENAI_API_KEY: Optional[str] = None
@@ -33,6 +39,29 @@ class Settings(BaseSettings):
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     
+    # Caché de respuestas (dashboard y reportes)
+    CACHE_HABILITADA: bool = True
+    CACHE_BACKEND: str = "memoria"  # memoria o redis
+    CACHE_URL: Optional[str] = None  # redis://localhost:6379/0
+    CACHE_TTL_SEGUNDOS: int = 60
+    CACHE_MAX_ENTRADAS: int = 1024
+
+    # Pool de conexiones (cada worker tiene un engine síncrono y uno async)
+    WEB_CONCURRENCY: int = 1  # workers de uvicorn/gunicorn
+    DB_MAX_CONEXIONES: int = 80  # presupuesto de toda la app (max_connections de PostgreSQL menos reserva)
+    DB_POOL_SIZE: Optional[int] = None  # None: DB_MAX_CONEXIONES repartido entre workers y engines
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: float = 10.0  # segundos esperando una conexión libre antes de fallar
+    DB_POOL_RECYCLE: int = 1800  # segundos; cerrar antes que el idle timeout del servidor/balanceador
+    DB_PRE_PING: str = "optimista"  # optimista (la caída se detecta al usarla) o siempre (ping en cada checkout)
+    DB_PGBOUNCER: bool = False  # PgBouncer en modo transacción: sin prepared statements
+    DB_ECHO: bool = False
+
+    # Réplica de lectura (reportes, dashboard, contexto del chatbot)
+    DATABASE_READ_URL: Optional[str] = None
+    DB_REPLICA_MAX_LAG_SEGUNDOS: float = 10.0  # con más retraso se lee de la primaria
+    DB_REPLICA_INTERVALO_LAG_SEGUNDOS: float = 5.0  # cada cuánto se vuelve a medir el retraso
+    
     # CORS - Accepts comma-separated string from .env or list
     CORS_ORIGINS: Union[str, List[str]] = "http://localhost:3000,http://localhost:5173,http://localhost:5174,http://localhost:5175"
     
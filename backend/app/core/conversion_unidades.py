@@ -0,0 +1,144 @@
+"""
+Conversión de unidades con factores precalculados
+
+La tabla unidades es un bosque: cada unidad apunta a su unidad_base_id con un
+factor_conversion (g -> kg = 0.001). Al compilar se recorre cada cadena una sola vez
+y se arma, por dimensión (peso, volumen, unidad), una matriz densa con el factor entre
+cada par de unidades. Convertir es buscar la unidad por id o código (sin distinguir
+mayúsculas) y leer una celda: sin recorrer cadenas ni consultar la base.
+
+Se compila al arrancar y se recompila cuando cambia la versión de la etiqueta
+"unidades" (crear o modificar una unidad la incrementan), con el mismo esquema que los
+permisos compilados: versión compartida consultada como mucho cada INTERVALO_VERSION
+segundos y, con el backend en memoria, recompilación cada BOM_CACHE_TTL_SEGUNDOS.
+"""
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.models.unidad import Unidad
+
+logger = logging.getLogger(__name__)
+
+ETIQUETA_UNIDADES = "unidades"
+
+INTERVALO_VERSION = 1.0
+
+# Máximo de saltos al seguir unidad_base_id (protege de ciclos mal cargados)
+PROFUNDIDAD_MAXIMA = 10
+
+
+class ConversionUnidades:
+    """Índice clave -> (dimensión, posición) y una matriz de factores por dimensión"""
+
+    def __init__(self):
+        self._indice: Dict[str, Tuple[Tuple[str, str], int]] = {}
+        self._matrices: Dict[Tuple[str, str], List[List[float]]] = {}
+        self._version: Optional[int] = None
+        self._verificado_en = float("-inf")
+        self._compilado_en = float("-inf")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version_unidades() -> int:
+        return cache.backend.versiones([ETIQUETA_UNIDADES])[0]
+
+    def compilar(self, db: Session) -> None:
+        """Lee unidades (una consulta) y reemplaza el índice y las matrices"""
+        version = self._version_unidades()
+        unidades = {
+            unidad.id: unidad for unidad in db.query(
+                Unidad.id, Unidad.codigo, Unidad.tipo, Unidad.unidad_base_id, Unidad.factor_conversion
+            ).filter(Unidad.activa.isnot(False))
+        }
+
+        # Factor de cada unidad a la raíz de su cadena; la dimensión es (tipo, raíz)
+        por_dimension: Dict[Tuple[str, str], List[Tuple[str, float]]] = {}
+        for unidad in unidades.values():
+            raiz, factor = unidad, 1.0
+            for _ in range(PROFUNDIDAD_MAXIMA):
+                factor *= raiz.factor_conversion or 1.0
+                base = unidades.get(raiz.unidad_base_id)
+                if base is None or base.id == raiz.id:
+                    break
+                raiz = base
+            por_dimension.setdefault((unidad.tipo, raiz.id), []).append((unidad.id, factor))
+
+        indice: Dict[str, Tuple[Tuple[str, str], int]] = {}
+        matrices: Dict[Tuple[str, str], List[List[float]]] = {}
+        for dimension, miembros in por_dimension.items():
+            matrices[dimension] = [
+                [origen / destino if destino else 1.0 for _, destino in miembros]
+                for _, origen in miembros
+            ]
+            for posicion, (unidad_id, _) in enumerate(miembros):
+                indice[unidad_id] = indice[unidades[unidad_id].codigo.lower()] = (dimension, posicion)
+
+        with self._lock:
+            self._indice = indice
+            self._matrices = matrices
+            self._version = version
+            self._verificado_en = self._compilado_en = time.monotonic()
+
+    def invalidar(self) -> None:
+        """Tras crear o modificar unidades (después del commit)"""
+        self._version = None
+        cache.invalidar(ETIQUETA_UNIDADES)
+
+    def vigente(self) -> bool:
+        if self._version is None:
+            return False
+        ahora = time.monotonic()
+        if ahora - self._compilado_en > settings.BOM_CACHE_TTL_SEGUNDOS:
+            return False
+        if ahora - self._verificado_en < INTERVALO_VERSION:
+            return True
+        self._verificado_en = ahora
+        return self._version == self._version_unidades()
+
+    def _buscar(self, unidad_id: Optional[str], codigo: Optional[str]):
+        return self._indice.get(unidad_id) or self._indice.get((codigo or "").lower())
+
+    def factor(
+        self, db: Session,
+        origen_id: Optional[str], origen_codigo: Optional[str],
+        destino_id: Optional[str], destino_codigo: Optional[str]
+    ) -> float:
+        """
+        Factor para pasar una cantidad de la unidad origen a la destino (g -> kg = 0.001).
+        Cada unidad se busca por id y, si no lo tiene, por código. Si alguna no está
+        registrada o son de distinta dimensión retorna 1.0 (la cantidad se usa tal cual).
+        """
+        if origen_id == destino_id and (
+            origen_id is not None or (origen_codigo or "").lower() == (destino_codigo or "").lower()
+        ):
+            return 1.0
+        if not self.vigente():
+            self.compilar(db)
+        origen = self._buscar(origen_id, origen_codigo)
+        destino = self._buscar(destino_id, destino_codigo)
+        if origen is None or destino is None or origen[0] != destino[0]:
+            return 1.0
+        return self._matrices[origen[0]][origen[1]][destino[1]]
+
+
+conversion_unidades = ConversionUnidades()
+
+
+def compilar_al_iniciar(session_factory) -> None:
+    """Compilación inicial; si la base no está disponible se compila en la primera conversión"""
+    if session_factory is None:
+        return
+    try:
+        db = session_factory()
+        try:
+            conversion_unidades.compilar(db)
+        finally:
+            db.close()
+    except Exception as e:
+        logger.warning(f"No se pudieron compilar las unidades al iniciar: {e}")
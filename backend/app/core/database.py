@@ -2,11 +2,21 @@
 Database configuration and session management
 Supports both PostgreSQL (SQLAlchemy) and MongoDB
 """
+import time
+import uuid
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+from fastapi import Depends
+
 from app.core.config import settings
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from typing import Optional
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 # MongoDB imports (optional)
 try:
@@ -16,13 +26,162 @@ except ImportError:
     AsyncIOMotorClient = None
     MongoClient = None
 
+class MetricasPool:
+    """
+    Espera por conexión, saturación y edad de las conexiones de un pool.
+    Las esperas se miden en _do_get, que es donde un checkout se bloquea si el
+    pool está agotado; los timeouts cuentan las veces que se superó DB_POOL_TIMEOUT.
+    """
+
+    MUESTRAS = 1000
+
+    def __init__(self):
+        self.engine = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+        self._esperas = deque(maxlen=self.MUESTRAS)
+        self._creadas: Dict[int, float] = {}
+
+    def registrar_espera(self, segundos: float, timeout: bool = False) -> None:
+        with self._lock:
+            if timeout:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.espera_total += segundos
+            self.espera_maxima = max(self.espera_maxima, segundos)
+            self._esperas.append(segundos)
+
+    def conexion_abierta(self, dbapi_connection) -> None:
+        with self._lock:
+            self._creadas[id(dbapi_connection)] = time.monotonic()
+
+    def conexion_cerrada(self, dbapi_connection) -> None:
+        with self._lock:
+            self._creadas.pop(id(dbapi_connection), None)
+
+    def estadisticas(self) -> dict:
+        pool = self.engine.pool
+        with self._lock:
+            esperas = sorted(self._esperas)
+            edades = [time.monotonic() - creada for creada in self._creadas.values()]
+            total = self.checkouts + self.timeouts
+            espera_promedio = self.espera_total / total if total else 0.0
+            checkouts, timeouts, espera_maxima = self.checkouts, self.timeouts, self.espera_maxima
+
+        capacidad = pool.size() + max(pool._max_overflow, 0)
+        en_uso = pool.checkedout()
+        return {
+            "pool": {
+                "tamano": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "en_uso": en_uso,
+                "libres": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "saturacion": round(en_uso / capacidad, 3) if capacidad else 0.0,
+            },
+            "esperas": {
+                "checkouts": checkouts,
+                "timeouts": timeouts,
+                "promedio_ms": round(espera_promedio * 1000, 3),
+                "p95_ms": round(esperas[int(len(esperas) * 0.95) - 1] * 1000, 3) if esperas else 0.0,
+                "maxima_ms": round(espera_maxima * 1000, 3),
+            },
+            "conexiones": {
+                "abiertas": len(edades),
+                "edad_maxima_s": round(max(edades), 1) if edades else 0.0,
+                "edad_promedio_s": round(sum(edades) / len(edades), 1) if edades else 0.0,
+            },
+        }
+
+
+class _PoolMedido:
+    """Mixin para QueuePool que registra el tiempo de espera de cada checkout"""
+
+    metricas: MetricasPool
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except PoolTimeoutError:
+            self.metricas.registrar_espera(time.perf_counter() - inicio, timeout=True)
+            raise
+        self.metricas.registrar_espera(time.perf_counter() - inicio)
+        return conexion
+
+    def recreate(self):
+        # engine.dispose() recrea el pool: conservar las métricas acumuladas
+        nuevo = super().recreate()
+        nuevo.metricas = self.metricas
+        return nuevo
+
+
+class QueuePoolMedido(_PoolMedido, QueuePool):
+    pass
+
+
+class AsyncQueuePoolMedido(_PoolMedido, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrumentar_pool(engine, metricas: Optional[MetricasPool] = None) -> MetricasPool:
+    """Asocia métricas al pool del engine (que debe usar un *PoolMedido)"""
+    metricas = metricas or MetricasPool()
+    metricas.engine = engine
+    engine.pool.metricas = metricas
+
+    @event.listens_for(engine, "connect")
+    def _al_conectar(dbapi_connection, connection_record):
+        metricas.conexion_abierta(dbapi_connection)
+
+    @event.listens_for(engine, "close")
+    def _al_cerrar(dbapi_connection, connection_record):
+        metricas.conexion_cerrada(dbapi_connection)
+
+    @event.listens_for(engine, "close_detached")
+    def _al_cerrar_desligada(dbapi_connection):
+        metricas.conexion_cerrada(dbapi_connection)
+
+    return metricas
+
+
+def tamano_pool() -> int:
+    """
+    Conexiones permanentes por engine. Sin DB_POOL_SIZE explícito, DB_MAX_CONEXIONES
+    se reparte entre los workers y sus dos engines (síncrono y async), descontando
+    el overflow para no superar el presupuesto en picos.
+    """
+    if settings.DB_POOL_SIZE is not None:
+        return settings.DB_POOL_SIZE
+    por_engine = settings.DB_MAX_CONEXIONES // (max(settings.WEB_CONCURRENCY, 1) * 2)
+    return max(por_engine - settings.DB_MAX_OVERFLOW, 1)
+
+
+def opciones_pool() -> dict:
+    """Argumentos comunes de create_engine / create_async_engine"""
+    return {
+        "pool_size": tamano_pool(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        # "optimista": sin ida y vuelta extra; una conexión caída invalida el pool al usarse
+        "pool_pre_ping": settings.DB_PRE_PING == "siempre",
+        "echo": settings.DB_ECHO,
+    }
+
+
+# Métricas por engine, expuestas en /health/pool
+metricas_pool: Dict[str, MetricasPool] = {}
+
 # SQLAlchemy setup for PostgreSQL
 if settings.DATABASE_TYPE == "postgresql":
-    engine = create_engine(
-        settings.DATABASE_URL,
-        pool_pre_ping=True,
-        echo=settings.ENVIRONMENT == "development"
-    )
+    # psycopg2 no usa prepared statements del lado del servidor: compatible con PgBouncer tal cual
+    engine = create_engine(settings.DATABASE_URL, poolclass=QueuePoolMedido, **opciones_pool())
+    metricas_pool["sync"] = instrumentar_pool(engine)
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     Base = declarative_base()
 else:
@@ -30,6 +189,179 @@ else:
     SessionLocal = None
     Base = None
 
+def url_async(url: str, pgbouncer: bool = False) -> str:
+    """
+    Convierte la URL síncrona al driver async equivalente (asyncpg / aiosqlite).
+    Con pgbouncer desactiva la caché de prepared statements de SQLAlchemy.
+    """
+    esquema, _, resto = url.partition("://")
+    driver = {
+        "postgresql": "postgresql+asyncpg",
+        "postgres": "postgresql+asyncpg",
+        "postgresql+psycopg2": "postgresql+asyncpg",
+        "sqlite": "sqlite+aiosqlite",
+    }.get(esquema, esquema)
+    if driver == "postgresql+asyncpg":
+        # asyncpg usa ssl= en lugar de sslmode=
+        resto = resto.replace("sslmode=", "ssl=")
+        if pgbouncer:
+            resto += ("&" if "?" in resto else "?") + "prepared_statement_cache_size=0"
+    return f"{driver}://{resto}"
+
+
+def connect_args_async() -> dict:
+    """
+    En modo PgBouncer (transacción) asyncpg no puede reutilizar prepared statements:
+    sin caché propia y con nombres únicos para no chocar entre backends compartidos.
+    """
+    if not settings.DB_PGBOUNCER:
+        return {}
+    return {
+        "statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+    }
+
+# SQLAlchemy async (endpoints async de solo lectura: reportes, dashboard, listados)
+async_engine = None
+AsyncSessionLocal = None
+if settings.DATABASE_TYPE == "postgresql":
+    try:
+        async_engine = create_async_engine(
+            url_async(settings.DATABASE_URL, pgbouncer=settings.DB_PGBOUNCER),
+            poolclass=AsyncQueuePoolMedido,
+            connect_args=connect_args_async(),
+            **opciones_pool()
+        )
+        metricas_pool["async"] = instrumentar_pool(async_engine.sync_engine)
+        AsyncSessionLocal = async_sessionmaker(
+            async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+    except ImportError:
+        async_engine = None
+
+
+class Replica:
+    """
+    Engines de solo lectura sobre DATABASE_READ_URL y control del retraso de replicación.
+
+    El retraso se mide como mucho cada DB_REPLICA_INTERVALO_LAG_SEGUNDOS; si supera
+    DB_REPLICA_MAX_LAG_SEGUNDOS o la réplica no responde, las lecturas van a la primaria
+    hasta la siguiente medición. Las sesiones de la réplica llevan el último retraso
+    medido en info["lag_replica"]: la caché de respuestas no guarda lo leído con
+    retraso (quedaría bajo la versión nueva de una etiqueta recién invalidada).
+    """
+
+    # En una réplica al día (LSN recibido = LSN aplicado) el retraso es 0 aunque la
+    # primaria no haya escrito nada reciente
+    CONSULTA_LAG_POSTGRES = text("""
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END
+    """)
+
+    def __init__(
+        self,
+        url: str,
+        max_lag: float = settings.DB_REPLICA_MAX_LAG_SEGUNDOS,
+        intervalo: float = settings.DB_REPLICA_INTERVALO_LAG_SEGUNDOS
+    ):
+        self.max_lag = max_lag
+        self.intervalo = intervalo
+        self.engine = create_engine(url, poolclass=QueuePoolMedido, **opciones_pool())
+        self.metricas = instrumentar_pool(self.engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        try:
+            self.async_engine = create_async_engine(
+                url_async(url, pgbouncer=settings.DB_PGBOUNCER),
+                poolclass=AsyncQueuePoolMedido,
+                connect_args=connect_args_async(),
+                **opciones_pool()
+            )
+            self.metricas_async = instrumentar_pool(self.async_engine.sync_engine)
+            self.AsyncSessionLocal = async_sessionmaker(
+                self.async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+            )
+        except ImportError:
+            self.async_engine = None
+            self.metricas_async = None
+            self.AsyncSessionLocal = None
+
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+        self.lecturas_replica = 0
+        self.lecturas_primaria = 0
+        self._medido_en = float("-inf")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def medir_lag(conexion) -> float:
+        """Segundos de retraso de la réplica (SQLite no replica: siempre 0)"""
+        if conexion.dialect.name != "postgresql":
+            return 0.0
+        return float(conexion.execute(Replica.CONSULTA_LAG_POSTGRES).scalar() or 0)
+
+    def _vigente(self) -> bool:
+        return time.monotonic() - self._medido_en < self.intervalo
+
+    def _registrar(self, lag: Optional[float], error: Optional[str] = None) -> None:
+        with self._lock:
+            self.lag = lag
+            self.error = error
+            self._medido_en = time.monotonic()
+
+    def _decidir(self) -> bool:
+        usable = self.error is None and self.lag is not None and self.lag <= self.max_lag
+        with self._lock:
+            if usable:
+                self.lecturas_replica += 1
+            else:
+                self.lecturas_primaria += 1
+        return usable
+
+    def disponible(self) -> bool:
+        """True si la próxima lectura puede ir a la réplica"""
+        if not self._vigente():
+            try:
+                with self.engine.connect() as conexion:
+                    self._registrar(self.medir_lag(conexion))
+            except Exception as e:
+                self._registrar(None, str(e))
+        return self._decidir()
+
+    async def disponible_async(self) -> bool:
+        """Como disponible(), midiendo con el engine async"""
+        if self.async_engine is None:
+            return False
+        if not self._vigente():
+            try:
+                async with self.async_engine.connect() as conexion:
+                    self._registrar(await conexion.run_sync(self.medir_lag))
+            except Exception as e:
+                self._registrar(None, str(e))
+        return self._decidir()
+
+    def estadisticas(self) -> dict:
+        return {
+            "lag_s": round(self.lag, 3) if self.lag is not None else None,
+            "max_lag_s": self.max_lag,
+            "error": self.error,
+            "lecturas_replica": self.lecturas_replica,
+            "lecturas_primaria": self.lecturas_primaria,
+        }
+
+
+# Clave de Session.info con el retraso de la réplica al abrir la sesión
+INFO_LAG_REPLICA = "lag_replica"
+
+replica: Optional[Replica] = None
+if settings.DATABASE_TYPE == "postgresql" and settings.DATABASE_READ_URL:
+    replica = Replica(settings.DATABASE_READ_URL)
+    metricas_pool["lectura"] = replica.metricas
+    if replica.metricas_async:
+        metricas_pool["lectura_async"] = replica.metricas_async
+
 # MongoDB setup
 mongodb_client: Optional[AsyncIOMotorClient] = None
 mongodb_sync_client: Optional[MongoClient] = None
@@ -52,6 +384,13 @@ def get_mongodb_sync():
         mongodb_sync_client = MongoClient(settings.MONGODB_URL)
     return mongodb_sync_client
 
+async def get_async_db():
+    """Dependency for getting an async database session (PostgreSQL via asyncpg)"""
+    if AsyncSessionLocal is None:
+        raise ImportError("asyncpg is not installed. Install it with: pip install asyncpg")
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def get_db():
     """Dependency for getting database session (PostgreSQL)"""
     if settings.DATABASE_TYPE == "postgresql":
@@ -64,3 +403,28 @@ def get_db():
         # For MongoDB, we use the client directly
         yield get_mongodb()
 
+def get_read_db(db: Session = Depends(get_db)):
+    """
+    Sesión de solo lectura: la réplica si está configurada y al día, si no la primaria.
+    La sesión de la primaria no abre conexión hasta usarse, así que no cuesta nada
+    cuando se lee de la réplica.
+    """
+    if replica is None or not replica.disponible():
+        yield db
+        return
+    db_replica = replica.SessionLocal()
+    db_replica.info[INFO_LAG_REPLICA] = replica.lag
+    try:
+        yield db_replica
+    finally:
+        db_replica.close()
+
+async def get_async_read_db(db: AsyncSession = Depends(get_async_db)):
+    """Versión async de get_read_db"""
+    if replica is None or not await replica.disponible_async():
+        yield db
+        return
+    async with replica.AsyncSessionLocal() as db_replica:
+        db_replica.info[INFO_LAG_REPLICA] = replica.lag
+        yield db_replica
+
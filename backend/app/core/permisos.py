@@ -0,0 +1,120 @@
+"""
+Permisos compilados a máscaras de bits
+
+Cada permiso recibe un bit y cada rol la OR de los bits de sus permisos. La máscara de
+un usuario es la OR de sus roles (memorizada por combinación de roles), así que
+verificar un permiso es un AND entre dos enteros.
+
+Se compila al arrancar y se recompila cuando cambia la versión de la etiqueta "roles"
+de la caché de respuestas (crear/actualizar/eliminar rol la incrementan). En el worker
+que hizo el cambio es inmediato; la versión compartida (CACHE_BACKEND=redis) se consulta
+como mucho cada INTERVALO_VERSION segundos para no pagar un round-trip por verificación.
+Con el backend en memoria los demás workers no ven esa versión: las máscaras se
+recompilan además cada AUTH_CACHE_TTL_SEGUNDOS, el mismo desfase que la caché de usuarios.
+"""
+import time
+import logging
+import threading
+from typing import Dict, FrozenSet, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.models.rol import Permiso, PermisoRol
+
+logger = logging.getLogger(__name__)
+
+# Permiso reservado a superusuarios (no existe en la tabla permisos)
+PERMISO_ADMIN = "admin"
+
+INTERVALO_VERSION = 1.0
+
+
+class PermisosCompilados:
+    """Bits por permiso y máscaras por rol"""
+
+    def __init__(self):
+        self.bits: Dict[str, int] = {}
+        self.mascaras_rol: Dict[str, int] = {}
+        self._mascaras_roles: Dict[FrozenSet[str], int] = {}
+        self._version: Optional[int] = None
+        self._verificado_en = float("-inf")
+        self._compilado_en = float("-inf")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version_roles() -> int:
+        return cache.backend.versiones(["roles"])[0]
+
+    def compilar(self, db: Session) -> None:
+        """Lee permisos y permisos_rol (dos consultas) y reemplaza las máscaras"""
+        version = self._version_roles()
+        nombres = [nombre for (nombre,) in db.query(Permiso.nombre).order_by(Permiso.nombre)]
+        bits = {nombre: 1 << i for i, nombre in enumerate(nombres)}
+        mascaras_rol: Dict[str, int] = {}
+        for rol_id, nombre in db.query(PermisoRol.rol_id, Permiso.nombre).join(
+            Permiso, Permiso.id == PermisoRol.permiso_id
+        ):
+            mascaras_rol[rol_id] = mascaras_rol.get(rol_id, 0) | bits[nombre]
+        with self._lock:
+            self.bits = bits
+            self.mascaras_rol = mascaras_rol
+            self._mascaras_roles = {}
+            self._version = version
+            self._verificado_en = self._compilado_en = time.monotonic()
+
+    def invalidar(self) -> None:
+        """Forzar la recompilación en la próxima verificación"""
+        self._version = None
+
+    def vigente(self) -> bool:
+        if self._version is None:
+            return False
+        ahora = time.monotonic()
+        if ahora - self._compilado_en > settings.AUTH_CACHE_TTL_SEGUNDOS:
+            return False
+        if ahora - self._verificado_en < INTERVALO_VERSION:
+            return True
+        self._verificado_en = ahora
+        return self._version == self._version_roles()
+
+    def bit(self, permiso: str) -> int:
+        """Bit del permiso; 0 si no existe (nadie salvo un superusuario lo tiene)"""
+        return self.bits.get(permiso, 0)
+
+    def mascara(self, roles: Iterable[str]) -> int:
+        """OR de las máscaras de los roles, memorizada por combinación de roles"""
+        if not isinstance(roles, frozenset):
+            roles = frozenset(roles)
+        mascara = self._mascaras_roles.get(roles)
+        if mascara is None:
+            mascara = 0
+            for rol_id in roles:
+                mascara |= self.mascaras_rol.get(rol_id, 0)
+            with self._lock:
+                self._mascaras_roles[roles] = mascara
+        return mascara
+
+    def permite(self, db: Session, roles: Iterable[str], permiso: str) -> bool:
+        """True si alguno de los roles otorga el permiso (recompila si los roles cambiaron)"""
+        if not self.vigente():
+            self.compilar(db)
+        return bool(self.mascara(roles) & self.bit(permiso))
+
+
+permisos_compilados = PermisosCompilados()
+
+
+def compilar_al_iniciar(session_factory) -> None:
+    """Compilación inicial; si la base no está disponible se compila en la primera verificación"""
+    if session_factory is None:
+        return
+    try:
+        db = session_factory()
+        try:
+            permisos_compilados.compilar(db)
+        finally:
+            db.close()
+    except Exception as e:
+        logger.warning(f"No se pudieron compilar los permisos al iniciar: {e}")
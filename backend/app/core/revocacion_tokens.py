@@ -0,0 +1,112 @@
+"""
+Revocación de access tokens por familia de refresh token
+
+Los access tokens son JWT de vida corta: no se consultan en la base. Cada uno lleva la
+familia ("fam") del refresh token con el que se emitió; al revocar una familia (logout,
+reutilización de un refresh token ya rotado, cambio de contraseña) sus access tokens
+tienen que rechazarse hasta que expiren solos.
+
+Por eso basta recordar las familias revocadas durante ACCESS_TOKEN_EXPIRE_MINUTES: el
+conjunto es pequeño y se guarda completo en memoria (un set responde igual de rápido
+que un filtro de Bloom y no tiene falsos positivos). La fuente es la columna
+tokens_refresco.revocado_en; cada worker recarga cuando cambia la versión de la
+etiqueta "tokens_revocados" de la caché de respuestas (consultada como mucho cada
+INTERVALO_VERSION segundos) y, con el backend en memoria, cada AUTH_CACHE_TTL_SEGUNDOS.
+"""
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.models.token_refresco import TokenRefresco
+
+logger = logging.getLogger(__name__)
+
+ETIQUETA_REVOCADOS = "tokens_revocados"
+
+INTERVALO_VERSION = 1.0
+
+
+def ventana_access_token() -> timedelta:
+    """Tiempo durante el que un access token ya emitido sigue siendo válido"""
+    return timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+
+
+class RevocacionTokens:
+    """Familias revocadas → hasta cuándo puede quedar un access token suyo vigente"""
+
+    def __init__(self):
+        self._familias: Dict[str, datetime] = {}
+        self._version: Optional[int] = None
+        self._verificado_en = float("-inf")
+        self._cargado_en = float("-inf")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version_revocados() -> int:
+        return cache.backend.versiones([ETIQUETA_REVOCADOS])[0]
+
+    def cargar(self, db: Session) -> None:
+        """Familias revocadas dentro de la ventana de los access tokens (una consulta)"""
+        version = self._version_revocados()
+        ventana = ventana_access_token()
+        filas = db.query(
+            TokenRefresco.familia_id, func.max(TokenRefresco.revocado_en)
+        ).filter(
+            TokenRefresco.revocado_en >= datetime.utcnow() - ventana
+        ).group_by(TokenRefresco.familia_id)
+        familias = {familia_id: revocado_en + ventana for familia_id, revocado_en in filas}
+        with self._lock:
+            self._familias = familias
+            self._version = version
+            self._verificado_en = self._cargado_en = time.monotonic()
+
+    def registrar(self, familias: Iterable[str]) -> None:
+        """Tras marcar familias como revocadas en la base (y hacer commit)"""
+        hasta = datetime.utcnow() + ventana_access_token()
+        with self._lock:
+            for familia_id in familias:
+                self._familias[familia_id] = hasta
+        cache.invalidar(ETIQUETA_REVOCADOS)
+
+    def vigente(self) -> bool:
+        if self._version is None:
+            return False
+        ahora = time.monotonic()
+        if ahora - self._cargado_en > settings.AUTH_CACHE_TTL_SEGUNDOS:
+            return False
+        if ahora - self._verificado_en < INTERVALO_VERSION:
+            return True
+        self._verificado_en = ahora
+        return self._version == self._version_revocados()
+
+    def revocada(self, db: Optional[Session], familia_id: str) -> bool:
+        """True si la familia fue revocada y sus access tokens aún no expiraron"""
+        # Sin sesión (scripts) se usa lo ya cargado
+        if db is not None and not self.vigente():
+            self.cargar(db)
+        hasta = self._familias.get(familia_id)
+        return hasta is not None and hasta > datetime.utcnow()
+
+
+revocacion_tokens = RevocacionTokens()
+
+
+def cargar_al_iniciar(session_factory) -> None:
+    """Carga inicial; si la base no está disponible se carga en la primera verificación"""
+    if session_factory is None:
+        return
+    try:
+        db = session_factory()
+        try:
+            revocacion_tokens.cargar(db)
+        finally:
+            db.close()
+    except Exception as e:
+        logger.warning(f"No se pudieron cargar los tokens revocados al iniciar: {e}")
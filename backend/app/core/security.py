@@ -1,28 +1,61 @@
+import uuid
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Optional, Tuple, Union
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+# bcrypt libera el GIL: un pool acotado lo saca del event loop sin acaparar la CPU
+# ni los hilos de anyio que usan los endpoints síncronos
+_hash_executor = ThreadPoolExecutor(max_workers=settings.HASH_MAX_HILOS, thread_name_prefix="bcrypt")
 
 ALGORITHM = "HS256"
 
 def create_access_token(
-    subject: Union[str, Any], expires_delta: timedelta = None
+    subject: Union[str, Any], expires_delta: timedelta = None, claims: Optional[dict] = None
 ) -> str:
+    ahora = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = ahora + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(
+        expire = ahora + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {
+        **(claims or {}), "exp": expire, "iat": ahora, "sub": str(subject), "jti": uuid.uuid4().hex
+    }
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _bcrypt_72(password: str) -> bytes:
+    """
+    bcrypt solo usa los primeros 72 bytes (y bcrypt>=4.1 falla con más). Se pasan los
+    bytes cortados tal cual, aunque corten un carácter multibyte: así se generaban los
+    hashes existentes.
+    """
+    return password.encode("utf-8")[:72]
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context.verify(_bcrypt_72(plain_password), hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return pwd_context.hash(_bcrypt_72(password))
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifica y, si el hash usa otro costo que BCRYPT_ROUNDS, retorna el hash nuevo
+    (si no, None) para guardarlo en el mismo login.
+    """
+    return pwd_context.verify_and_update(_bcrypt_72(plain_password), hashed_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, verify_and_update_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, get_password_hash, password)
@@ -6,6 +6,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.v1 import api_router
+from app.api.paginacion import CABECERA_CURSOR
+from app.core.database import SessionLocal
+from app.core.permisos import compilar_al_iniciar
+from app.core import revocacion_tokens
+from app.core import conversion_unidades
 
 app = FastAPI(
     title="GastroSmart AI API",
@@ -22,11 +27,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CABECERA_CURSOR],
 )
 
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
+@app.on_event("startup")
+def compilar_permisos():
+    """Máscaras de permisos por rol (require_permission)"""
+    compilar_al_iniciar(SessionLocal)
+
+@app.on_event("startup")
+def cargar_tokens_revocados():
+    """Familias de refresh token revocadas (access tokens a rechazar)"""
+    revocacion_tokens.cargar_al_iniciar(SessionLocal)
+
+@app.on_event("startup")
+def compilar_unidades():
+    """Factores de conversión entre unidades (stock, compras y costos)"""
+    conversion_unidades.compilar_al_iniciar(SessionLocal)
+
 @app.get("/")
 async def root():
     return {
@@ -12,8 +12,9 @@ if Base:
     from app.models.proveedor import Proveedor
     from app.models.item_inventario import ItemInventario
     from app.models.movimiento_inventario import MovimientoInventario
+    from app.models.snapshot_inventario import SnapshotInventario
     from app.models.historial_costo_inventario import HistorialCostoInventario
-    from app.models.receta import Receta, IngredienteReceta
+    from app.models.receta import Receta, IngredienteReceta, ComponenteReceta
     from app.models.version_receta import VersionReceta
     from app.models.venta import Venta, ItemVenta
     from app.models.promocion import Promocion, DescuentoVenta
@@ -21,6 +22,10 @@ if Base:
     from app.models.rol import Rol, Permiso, PermisoRol, UsuarioRol
     from app.models.caja import CajaSesion
     from app.models.configuracion import Configuracion
+    from app.models.resumen_venta import ResumenVentaDiario
+    from app.models.token_refresco import TokenRefresco
+    from app.models.clave_idempotencia import ClaveIdempotencia
+    from app.models.secuencia_venta import SecuenciaVenta
     # from app.models.chatbot_log import ChatbotLog # Pendiente
 
 __all__ = [
@@ -31,9 +36,11 @@ __all__ = [
     "Proveedor",
     "ItemInventario",
     "MovimientoInventario",
+    "SnapshotInventario",
     "HistorialCostoInventario",
     "Receta",
     "IngredienteReceta",
+    "ComponenteReceta",
     "VersionReceta",
     "Venta",
     "ItemVenta",
@@ -46,5 +53,9 @@ __all__ = [
     "PermisoRol",
     "UsuarioRol",
     "CajaSesion",
-    "Configuracion"
+    "Configuracion",
+    "ResumenVentaDiario",
+    "TokenRefresco",
+    "ClaveIdempotencia",
+    "SecuenciaVenta"
 ]
@@ -1,7 +1,7 @@
 """
 Modelo de Gestión de Caja en Español
 """
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Enum, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -30,3 +30,12 @@ class CajaSesion(Base):
     # Relaciones
     sucursal = relationship("Sucursal", back_populates="sesiones_caja")
     usuario = relationship("Usuario")
+    
+    # Caja abierta del usuario en la sucursal: se consulta en cada venta
+    __table_args__ = (
+        Index(
+            "ix_caja_sesiones_abiertas", "usuario_id", "sucursal_id",
+            postgresql_where=text("estado = 'ABIERTA'"),
+            sqlite_where=text("estado = 'ABIERTA'")
+        ),
+    )
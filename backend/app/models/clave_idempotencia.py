@@ -0,0 +1,22 @@
+"""
+Modelo de Clave de Idempotencia (cabecera Idempotency-Key)
+"""
+from sqlalchemy import Column, String, Integer, DateTime, JSON
+from datetime import datetime
+from app.core.database import Base
+
+class ClaveIdempotencia(Base):
+    """
+    Respuesta guardada de un POST enviado con Idempotency-Key, por usuario.
+    Se inserta en la misma transacción que el recurso creado: si la clave existe,
+    la operación se confirmó y un reintento recibe la misma respuesta.
+    """
+    __tablename__ = "claves_idempotencia"
+
+    usuario_id = Column(String, primary_key=True)
+    clave = Column(String, primary_key=True)
+    endpoint = Column(String, nullable=False)
+    hash_peticion = Column(String, nullable=False)  # SHA-256 del cuerpo: la clave no se reutiliza con otro contenido
+    codigo_estado = Column(Integer, nullable=False, default=200)
+    respuesta = Column(JSON, nullable=False)
+    creado_en = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,7 +1,7 @@
 """
 Modelo de Item de Inventario en Español
 """
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, JSON, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -38,3 +38,14 @@ class ItemInventario(Base):
     movimientos = relationship("MovimientoInventario", back_populates="item_inventario")
     ingredientes_receta = relationship("IngredienteReceta", back_populates="item_inventario")
     items_orden_compra = relationship("ItemOrdenCompra", back_populates="item_inventario")
+    
+    # Listado paginado por (nombre, id) filtrado por sucursal,
+    # e items críticos del dashboard (índice parcial: solo los que están bajo el mínimo)
+    __table_args__ = (
+        Index("ix_items_inventario_sucursal_nombre", "sucursal_id", "nombre", "id"),
+        Index(
+            "ix_items_inventario_criticos", "sucursal_id",
+            postgresql_where=text("cantidad <= stock_minimo"),
+            sqlite_where=text("cantidad <= stock_minimo")
+        ),
+    )
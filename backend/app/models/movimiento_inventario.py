@@ -1,7 +1,7 @@
 """
 Modelo de Movimiento de Inventario en Español
 """
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -15,6 +15,8 @@ class MovimientoInventario(Base):
     tipo_movimiento = Column(String, nullable=False)  # ENTRADA, SALIDA, AJUSTE, MERMA, CADUCIDAD, ROBO, TRANSFERENCIA
     cantidad = Column(Float, nullable=False)
     unidad = Column(String, nullable=False)
+    delta = Column(Float, nullable=False, default=0.0)  # Variación firmada, en la unidad del item
+    saldo = Column(Float)  # Stock del item después del movimiento
     costo_unitario = Column(Float)
     referencia_id = Column(String)
     tipo_referencia = Column(String)
@@ -25,3 +27,10 @@ class MovimientoInventario(Base):
     # Relaciones
     item_inventario = relationship("ItemInventario", back_populates="movimientos")
     sucursal = relationship("Sucursal", back_populates="movimientos_inventario")
+    
+    # Listados paginados por (fecha_creacion, id) con filtros por sucursal/tipo/item
+    __table_args__ = (
+        Index("ix_movimientos_sucursal_fecha", "sucursal_id", "fecha_creacion", "id"),
+        Index("ix_movimientos_sucursal_tipo_fecha", "sucursal_id", "tipo_movimiento", "fecha_creacion", "id"),
+        Index("ix_movimientos_item_fecha", "item_inventario_id", "fecha_creacion", "id"),
+    )
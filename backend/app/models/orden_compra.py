@@ -1,7 +1,7 @@
 """
 Modelo de Orden de Compra en Español
 """
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -28,12 +28,18 @@ class OrdenCompra(Base):
     items = relationship("ItemOrdenCompra", back_populates="orden_compra", cascade="all, delete-orphan")
     creador = relationship("Usuario", foreign_keys=[creado_por_id])
     aprobador = relationship("Usuario", foreign_keys=[aprobado_por_id])
+    
+    # Listados paginados por (fecha_creacion, id) con filtros por sucursal/estado
+    __table_args__ = (
+        Index("ix_ordenes_compra_sucursal_fecha", "sucursal_id", "fecha_creacion", "id"),
+        Index("ix_ordenes_compra_sucursal_estado_fecha", "sucursal_id", "estado", "fecha_creacion", "id"),
+    )
 
 class ItemOrdenCompra(Base):
     __tablename__ = "items_orden_compra"
     
     id = Column(String, primary_key=True, index=True)
-    orden_compra_id = Column(String, ForeignKey("ordenes_compra.id"), nullable=False)
+    orden_compra_id = Column(String, ForeignKey("ordenes_compra.id"), nullable=False, index=True)
     item_inventario_id = Column(String, ForeignKey("items_inventario.id"))
     nombre_item = Column(String, nullable=False)  # Por si no existe en inventario
     cantidad = Column(Float, nullable=False)
@@ -32,8 +32,8 @@ class Receta(Base):
     # Relaciones
     sucursal = relationship("Sucursal", back_populates="recetas")
     ingredientes = relationship("IngredienteReceta", back_populates="receta", cascade="all, delete-orphan")
-    # componentes = relationship("ComponenteReceta", foreign_keys="ComponenteReceta.receta_id", back_populates="receta")
-    # usado_en_recetas = relationship("ComponenteReceta", foreign_keys="ComponenteReceta.subreceta_id", back_populates="subreceta")
+    componentes = relationship("ComponenteReceta", foreign_keys="ComponenteReceta.receta_id", back_populates="receta", cascade="all, delete-orphan")
+    usado_en_recetas = relationship("ComponenteReceta", foreign_keys="ComponenteReceta.subreceta_id", back_populates="subreceta")
     versiones = relationship("VersionReceta", back_populates="receta")
     items_venta = relationship("ItemVenta", back_populates="receta")
 
@@ -41,8 +41,8 @@ class IngredienteReceta(Base):
     __tablename__ = "ingredientes_receta"
     
     id = Column(String, primary_key=True, index=True)
-    receta_id = Column(String, ForeignKey("recetas.id"), nullable=False)
-    item_inventario_id = Column(String, ForeignKey("items_inventario.id"))
+    receta_id = Column(String, ForeignKey("recetas.id"), nullable=False, index=True)
+    item_inventario_id = Column(String, ForeignKey("items_inventario.id"), index=True)
     nombre_ingrediente = Column(String, nullable=False)  # Nombre si no está en inventario
     cantidad = Column(Float, nullable=False)
     unidad = Column(String, nullable=False)
@@ -53,3 +53,16 @@ class IngredienteReceta(Base):
     receta = relationship("Receta", back_populates="ingredientes")
     item_inventario = relationship("ItemInventario", back_populates="ingredientes_receta")
     unidad_ref = relationship("Unidad", back_populates="ingredientes_receta")
+
+class ComponenteReceta(Base):
+    """Subreceta (salsa, marinado, masa) usada dentro de otra receta"""
+    __tablename__ = "componentes_receta"
+    
+    id = Column(String, primary_key=True, index=True)
+    receta_id = Column(String, ForeignKey("recetas.id", ondelete="CASCADE"), nullable=False, index=True)
+    subreceta_id = Column(String, ForeignKey("recetas.id"), nullable=False, index=True)
+    cantidad = Column(Float, nullable=False)  # porciones de la subreceta
+    
+    # Relaciones
+    receta = relationship("Receta", foreign_keys=[receta_id], back_populates="componentes")
+    subreceta = relationship("Receta", foreign_keys=[subreceta_id], back_populates="usado_en_recetas")
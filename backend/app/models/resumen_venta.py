@@ -0,0 +1,32 @@
+"""
+Modelo de Resumen Diario de Ventas (tabla de agregados)
+"""
+from sqlalchemy import Column, String, Float, Integer, Date, DateTime, ForeignKey, UniqueConstraint
+from datetime import datetime
+from app.core.database import Base
+
+# receta_id usado para la fila de totales del día (nivel ticket)
+RESUMEN_TOTAL_DIA = ""
+
+class ResumenVentaDiario(Base):
+    """
+    Agregado por (sucursal, día, receta) mantenido al registrar ventas.
+
+    La fila con receta_id == RESUMEN_TOTAL_DIA guarda los totales del ticket
+    (Venta.total, número de tickets, todas las unidades y el costo total), que
+    no se pueden obtener sumando las filas por receta.
+    """
+    __tablename__ = "resumen_ventas_diario"
+
+    id = Column(String, primary_key=True, index=True)
+    sucursal_id = Column(String, ForeignKey("sucursales.id"), nullable=False)
+    fecha = Column(Date, nullable=False, index=True)
+    receta_id = Column(String, nullable=False, default=RESUMEN_TOTAL_DIA)  # Sin FK: el histórico sobrevive a recetas eliminadas
+    nombre_item = Column(String)
+    ingresos = Column(Float, nullable=False, default=0.0)
+    unidades = Column(Integer, nullable=False, default=0)
+    costo = Column(Float, nullable=False, default=0.0)
+    tickets = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (UniqueConstraint('sucursal_id', 'fecha', 'receta_id'),)
@@ -0,0 +1,16 @@
+"""
+Modelo de Secuencia de Ventas (numeración por sucursal fuera de PostgreSQL)
+"""
+from sqlalchemy import Column, String, Integer, ForeignKey
+from app.core.database import Base
+
+class SecuenciaVenta(Base):
+    """
+    Último número de venta emitido por sucursal. En PostgreSQL se usa una SEQUENCE
+    por sucursal (ver NumeracionVentasService); esta tabla es el equivalente para
+    SQLite, que no tiene secuencias.
+    """
+    __tablename__ = "secuencias_venta"
+
+    sucursal_id = Column(String, ForeignKey("sucursales.id"), primary_key=True)
+    ultimo = Column(Integer, nullable=False, default=0)
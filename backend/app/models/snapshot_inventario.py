@@ -0,0 +1,26 @@
+"""
+Modelo de Snapshot de Inventario (cortes del libro de stock)
+"""
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Index
+from datetime import datetime
+from app.core.database import Base
+
+class SnapshotInventario(Base):
+    """
+    Stock de un item al corte `fecha`: incluye todos los movimientos con
+    fecha_creacion <= fecha. El stock en cualquier momento posterior es el último
+    snapshot más la suma de los deltas de los movimientos siguientes.
+    """
+    __tablename__ = "snapshots_inventario"
+
+    id = Column(String, primary_key=True, index=True)
+    item_inventario_id = Column(String, ForeignKey("items_inventario.id"), nullable=False)
+    sucursal_id = Column(String, ForeignKey("sucursales.id"), nullable=False)
+    cantidad = Column(Float, nullable=False)
+    fecha = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Último snapshot de un item anterior a una fecha
+    __table_args__ = (
+        Index("ix_snapshots_item_fecha", "item_inventario_id", "fecha"),
+    )
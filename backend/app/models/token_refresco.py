@@ -0,0 +1,23 @@
+"""
+Modelo de Token de Refresco (sesiones de larga duración)
+"""
+from sqlalchemy import Column, String, DateTime, ForeignKey
+from datetime import datetime
+from app.core.database import Base
+
+class TokenRefresco(Base):
+    """
+    Refresh token rotativo. Se guarda solo el SHA-256 del secreto; el cliente recibe
+    "<id>.<secreto>". Cada uso lo marca como usado y emite otro de la misma familia
+    (la sesión iniciada en un login); presentar uno ya usado revoca la familia entera.
+    """
+    __tablename__ = "tokens_refresco"
+
+    id = Column(String, primary_key=True, index=True)
+    usuario_id = Column(String, ForeignKey("usuarios.id", ondelete="CASCADE"), nullable=False, index=True)
+    familia_id = Column(String, nullable=False, index=True)
+    token_hash = Column(String, nullable=False)
+    creado_en = Column(DateTime, default=datetime.utcnow)
+    expira_en = Column(DateTime, nullable=False)  # Heredada de la familia: la sesión no se extiende al rotar
+    usado_en = Column(DateTime)
+    revocado_en = Column(DateTime, index=True)
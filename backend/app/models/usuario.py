@@ -49,9 +49,9 @@ class Usuario(Base):
         
         for usuario_rol in self.roles:
             if usuario_rol.rol:
-                for permiso_rol in usuario_rol.rol.permisos:
-                    if permiso_rol.permiso:
-                        perms.add(permiso_rol.permiso.nombre)
+                # Rol.permisos es la relación directa (secondary) a Permiso
+                for permiso in usuario_rol.rol.permisos:
+                    perms.add(permiso.nombre)
         return list(perms)
 
     @property
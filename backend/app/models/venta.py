@@ -1,7 +1,7 @@
 """
 Modelo de Venta en Español
 """
-from sqlalchemy import Column, String, Float, Integer, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Float, Integer, DateTime, ForeignKey, Text, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -10,7 +10,7 @@ class Venta(Base):
     __tablename__ = "ventas"
     
     id = Column(String, primary_key=True, index=True)
-    numero_venta = Column(String, unique=True, index=True)  # Número legible
+    numero_venta = Column(String, index=True)  # Número legible, correlativo por sucursal
     sucursal_id = Column(String, ForeignKey("sucursales.id"), nullable=False)
     numero_mesa = Column(String)
     mesero_id = Column(String, ForeignKey("usuarios.id"))
@@ -27,23 +27,33 @@ class Venta(Base):
     estado = Column(String, default="COMPLETADA")  # COMPLETADA, CANCELADA, REEMBOLSADA
     fecha_creacion = Column(DateTime, default=datetime.utcnow, index=True)
     usuario_id = Column(String, ForeignKey("usuarios.id"))
+    clave_idempotencia = Column(String, unique=True, index=True)  # Generada por el POS (sincronización sin conexión)
     
     # Relaciones
     sucursal = relationship("Sucursal", back_populates="ventas")
     mesero = relationship("Usuario", foreign_keys=[mesero_id])
     items = relationship("ItemVenta", back_populates="venta", cascade="all, delete-orphan")
     descuentos = relationship("DescuentoVenta", back_populates="venta")
+    
+    # Listados paginados por (fecha_creacion, id) con filtros por sucursal/estado
+    __table_args__ = (
+        Index("ix_ventas_sucursal_fecha", "sucursal_id", "fecha_creacion", "id"),
+        Index("ix_ventas_sucursal_estado_fecha", "sucursal_id", "estado", "fecha_creacion", "id"),
+        UniqueConstraint("sucursal_id", "numero_venta", name="uq_ventas_sucursal_numero_venta"),
+    )
 
 class ItemVenta(Base):
     __tablename__ = "items_venta"
     
     id = Column(String, primary_key=True, index=True)
-    venta_id = Column(String, ForeignKey("ventas.id"), nullable=False)
-    receta_id = Column(String, ForeignKey("recetas.id"))
+    venta_id = Column(String, ForeignKey("ventas.id"), nullable=False, index=True)
+    receta_id = Column(String, ForeignKey("recetas.id"), index=True)
     nombre_item = Column(String, nullable=False)
     cantidad = Column(Integer, nullable=False, default=1)
     precio_unitario = Column(Float, nullable=False)
     total = Column(Float, nullable=False)
+    costo_unitario = Column(Float)  # Costo por porción de la receta al momento de la venta
+    receta_version = Column(Integer)  # Receta.version_actual al momento de la venta
     
     # Relaciones
     venta = relationship("Venta", back_populates="items")
@@ -18,8 +18,15 @@ class MovimientoInventarioCreate(MovimientoInventarioBase):
 class MovimientoInventarioResponse(MovimientoInventarioBase):
     id: str
     sucursal_id: str
+    delta: Optional[float] = None
+    saldo: Optional[float] = None
     fecha_creacion: datetime
     usuario_id: Optional[str]
 
     class Config:
         from_attributes = True
+
+class StockEnFechaResponse(BaseModel):
+    """Stock de un item reconstruido desde el libro de movimientos"""
+    item_inventario_id: str
+    cantidad: float
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
@@ -20,6 +20,20 @@ class IngredienteRecetaResponse(IngredienteRecetaBase):
     class Config:
         from_attributes = True
 
+class ComponenteRecetaBase(BaseModel):
+    subreceta_id: str
+    cantidad: float = Field(..., gt=0)  # porciones de la subreceta
+
+class ComponenteRecetaCreate(ComponenteRecetaBase):
+    pass
+
+class ComponenteRecetaResponse(ComponenteRecetaBase):
+    id: str
+    receta_id: str
+
+    class Config:
+        from_attributes = True
+
 class RecetaBase(BaseModel):
     nombre: str
     descripcion: Optional[str] = None
@@ -38,6 +52,7 @@ class RecetaBase(BaseModel):
 class RecetaCreate(RecetaBase):
     sucursal_id: str
     ingredientes: List[IngredienteRecetaCreate]
+    componentes: List[ComponenteRecetaCreate] = []
 
 class RecetaUpdate(RecetaBase):
     nombre: Optional[str] = None
@@ -45,6 +60,7 @@ class RecetaUpdate(RecetaBase):
     precio: Optional[float] = None
     imagen_url: Optional[str] = None
     ingredientes: Optional[List[IngredienteRecetaCreate]] = None
+    componentes: Optional[List[ComponenteRecetaCreate]] = None
 
 class RecetaResponse(RecetaBase):
     id: str
@@ -54,6 +70,13 @@ class RecetaResponse(RecetaBase):
     updated_at: datetime
     usuario_id: Optional[str]
     ingredientes: List[IngredienteRecetaResponse] = []
+    componentes: List[ComponenteRecetaResponse] = []
 
     class Config:
         from_attributes = True
+
+class DisponibilidadRecetaResponse(BaseModel):
+    receta_id: str
+    nombre: str
+    porciones_disponibles: Optional[int] = None  # None: no descuenta inventario
+    disponible: bool
@@ -1,11 +1,21 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 from app.schemas.usuario import UsuarioResponse
 
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
     usuario: Optional[UsuarioResponse] = None
 
 class TokenPayload(BaseModel):
     sub: Optional[str] = None
+    roles: Optional[List[str]] = None
+    permisos: Optional[List[str]] = None
+    su: bool = False
+    pv: Optional[str] = None
+    jti: Optional[str] = None
+    fam: Optional[str] = None
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
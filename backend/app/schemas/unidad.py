@@ -1,13 +1,13 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 
 class UnidadBase(BaseModel):
     codigo: str
     nombre: str
-    tipo: str
+    tipo: str  # peso, volumen, unidad
     unidad_base_id: Optional[str] = None
-    factor_conversion: float = 1.0
+    factor_conversion: float = Field(1.0, gt=0)  # cuántas unidades base equivale una de esta
     activa: bool = True
 
 class UnidadCreate(UnidadBase):
@@ -17,6 +17,8 @@ class UnidadUpdate(UnidadBase):
     codigo: Optional[str] = None
     nombre: Optional[str] = None
     tipo: Optional[str] = None
+    factor_conversion: Optional[float] = Field(None, gt=0)
+    activa: Optional[bool] = None
 
 class UnidadResponse(UnidadBase):
     id: str
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
@@ -15,6 +15,8 @@ class ItemVentaCreate(ItemVentaBase):
 class ItemVentaResponse(ItemVentaBase):
     id: str
     venta_id: str
+    costo_unitario: Optional[float] = None
+    receta_version: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -51,3 +53,26 @@ class VentaResponse(VentaBase):
 
     class Config:
         from_attributes = True
+
+# Máximo de ventas por POST /ventas/batch
+MAX_VENTAS_LOTE = 1000
+
+class VentaLoteItem(VentaCreate):
+    clave_idempotencia: str = Field(..., min_length=1, max_length=100, description="Generada por el POS; repetirla no duplica la venta")
+    fecha_creacion: Optional[datetime] = Field(None, description="Hora de la venta en el POS (si se registró sin conexión)")
+
+class VentaLoteCreate(BaseModel):
+    ventas: List[VentaLoteItem] = Field(..., min_length=1, max_length=MAX_VENTAS_LOTE)
+
+class ResultadoVentaLote(BaseModel):
+    clave_idempotencia: str
+    estado: str  # CREADA, DUPLICADA, RECHAZADA
+    venta_id: Optional[str] = None
+    numero_venta: Optional[str] = None
+    detalle: Optional[str] = None
+
+class VentaLoteResponse(BaseModel):
+    creadas: int
+    duplicadas: int
+    rechazadas: int
+    resultados: List[ResultadoVentaLote]
@@ -0,0 +1,111 @@
+"""
+Costos Recetas Service - Recálculo incremental del costo y margen de las recetas
+
+Cuando cambia el costo_unitario de un item (recepción de una orden de compra o edición
+del item) se recalculan solo las recetas que lo usan, encontradas por el índice
+ix_ingredientes_receta_item_inventario_id (item -> ingredientes -> recetas):
+
+- cada ingrediente con item de inventario vale cantidad × factor de unidad × costo_unitario
+  (los ingredientes sin item conservan el costo cargado a mano);
+- Receta.costo es la suma de sus ingredientes más el costo por porción de sus
+  subrecetas, y margen = (precio - costo) / precio × 100, el mismo cálculo que hace
+  el formulario de recetas;
+- las recetas que usan una receta recalculada como subreceta se recalculan después.
+
+Los ingredientes se actualizan con un UPDATE por clave primaria en lote y las recetas
+con un UPDATE por nivel de subrecetas que suma sus componentes en la base.
+"""
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session, aliased
+
+from app.core.conversion_unidades import conversion_unidades
+from app.models.item_inventario import ItemInventario
+from app.models.receta import Receta, IngredienteReceta, ComponenteReceta
+from app.services.subrecetas_service import SubrecetasService
+
+class CostosRecetasService:
+    """Costo y margen de las recetas derivados del costo de sus insumos"""
+
+    @staticmethod
+    def recalcular_por_items(db: Session, item_ids: Iterable[str]) -> int:
+        """
+        Recalcula los ingredientes y las recetas que usan alguno de los items.
+        Se ejecuta dentro de la transacción que cambió el costo.
+
+        Returns:
+            Cantidad de recetas actualizadas.
+        """
+        ids = list(set(item_ids))
+        if not ids:
+            return 0
+        # Los costos nuevos pueden estar solo en la sesión (autoflush desactivado)
+        db.flush()
+
+        filas = db.query(
+            IngredienteReceta.id,
+            IngredienteReceta.receta_id,
+            IngredienteReceta.cantidad,
+            IngredienteReceta.unidad_id,
+            IngredienteReceta.unidad,
+            ItemInventario.unidad_id.label("item_unidad_id"),
+            ItemInventario.unidad.label("item_unidad"),
+            ItemInventario.costo_unitario
+        ).join(
+            ItemInventario, ItemInventario.id == IngredienteReceta.item_inventario_id
+        ).filter(
+            IngredienteReceta.item_inventario_id.in_(ids)
+        ).all()
+        if not filas:
+            return 0
+
+        db.execute(update(IngredienteReceta), [
+            {
+                "id": fila.id,
+                "costo": fila.cantidad * fila.costo_unitario * conversion_unidades.factor(
+                    db, fila.unidad_id, fila.unidad, fila.item_unidad_id, fila.item_unidad
+                ),
+            }
+            for fila in filas
+        ])
+        return CostosRecetasService.recalcular_recetas(db, {fila.receta_id for fila in filas})
+
+    @staticmethod
+    def recalcular_recetas(db: Session, receta_ids: Iterable[str]) -> int:
+        """
+        costo = ingredientes + porciones usadas de cada subreceta × su costo por porción,
+        y margen sobre el precio. Las recetas que usan estas como subreceta también se
+        recalculan, de abajo hacia arriba: un UPDATE por nivel del árbol.
+
+        Returns:
+            Cantidad de recetas actualizadas.
+        """
+        subreceta = aliased(Receta)
+        costo_ingredientes = select(
+            func.coalesce(func.sum(IngredienteReceta.costo), 0.0)
+        ).where(
+            IngredienteReceta.receta_id == Receta.id
+        ).scalar_subquery()
+        costo_subrecetas = select(
+            func.coalesce(func.sum(
+                ComponenteReceta.cantidad * subreceta.costo
+                / case((subreceta.porciones > 0, subreceta.porciones), else_=1)
+            ), 0.0)
+        ).select_from(ComponenteReceta).join(
+            subreceta, subreceta.id == ComponenteReceta.subreceta_id
+        ).where(
+            ComponenteReceta.receta_id == Receta.id
+        ).scalar_subquery()
+        costo = costo_ingredientes + costo_subrecetas
+
+        actualizadas = 0
+        for nivel in SubrecetasService.niveles_hacia_arriba(db, receta_ids):
+            stmt = update(Receta).where(Receta.id.in_(nivel)).values(
+                costo=costo,
+                margen=case((Receta.precio > 0, (Receta.precio - costo) / Receta.precio * 100), else_=0.0),
+                updated_at=datetime.utcnow()
+            )
+            actualizadas += db.execute(stmt.execution_options(synchronize_session=False)).rowcount
+        return actualizadas
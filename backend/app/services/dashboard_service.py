@@ -0,0 +1,162 @@
+"""
+Dashboard Service - Estadísticas del dashboard con un número fijo de consultas
+"""
+from datetime import datetime, timedelta, date
+from typing import Optional
+
+from sqlalchemy import func, case, desc
+from sqlalchemy.orm import Session
+
+from app.schemas.dashboard import DashboardResponse, EstadisticasDashboard, PlatoTop, Alerta
+from app.models.item_inventario import ItemInventario
+from app.models.receta import Receta
+from app.models.resumen_venta import ResumenVentaDiario, RESUMEN_TOTAL_DIA
+from app.models.venta import Venta, ItemVenta
+
+
+class DashboardService:
+    """Estadísticas del dashboard (síncrono; el endpoint lo ejecuta con run_sync)"""
+
+    @staticmethod
+    def estadisticas(db: Session, sucursal_id: Optional[str] = None) -> DashboardResponse:
+        """Ventas de hoy/ayer, últimos 7 días, platos top, alertas y márgenes"""
+        hoy = date.today()
+        inicio_dia = datetime.combine(hoy, datetime.min.time())
+        hace_una_semana = inicio_dia - timedelta(days=7)
+        ayer = hoy - timedelta(days=1)
+
+        filtro_sucursal = [ResumenVentaDiario.sucursal_id == sucursal_id] if sucursal_id else []
+
+        # Ventas y platos de los últimos 7 días (incluye hoy y ayer) desde el resumen diario
+        por_dia = db.query(
+            ResumenVentaDiario.fecha,
+            func.sum(ResumenVentaDiario.ingresos).label('ventas'),
+            func.sum(ResumenVentaDiario.unidades).label('platos')
+        ).filter(
+            ResumenVentaDiario.receta_id == RESUMEN_TOTAL_DIA,
+            ResumenVentaDiario.fecha >= hoy - timedelta(days=6),
+            *filtro_sucursal
+        ).group_by(ResumenVentaDiario.fecha).all()
+        resumen_dia = {
+            row.fecha: (float(row.ventas or 0), int(row.platos or 0))
+            for row in por_dia
+        }
+
+        total_ventas_hoy, platos_vendidos_hoy = resumen_dia.get(hoy, (0.0, 0))
+        total_ventas_ayer, platos_vendidos_ayer = resumen_dia.get(ayer, (0.0, 0))
+        cambio_ventas = ((total_ventas_hoy - total_ventas_ayer) / total_ventas_ayer * 100) if total_ventas_ayer > 0 else 0
+        cambio_platos = ((platos_vendidos_hoy - platos_vendidos_ayer) / platos_vendidos_ayer * 100) if platos_vendidos_ayer > 0 else 0
+
+        # Items críticos de inventario
+        # Asumimos que stock_minimo es el umbral; solo se cargan los 4 que se muestran como alerta
+        query_criticos = db.query(
+            ItemInventario.nombre,
+            ItemInventario.cantidad,
+            ItemInventario.unidad,
+            ItemInventario.stock_minimo,
+            func.count().over().label('total')
+        ).filter(ItemInventario.cantidad <= ItemInventario.stock_minimo)
+        if sucursal_id:
+            query_criticos = query_criticos.filter(ItemInventario.sucursal_id == sucursal_id)
+        items_criticos = query_criticos.limit(4).all()
+        count_criticos = items_criticos[0].total if items_criticos else 0
+
+        # Margen promedio y recetas por categoría en una sola consulta agregada
+        es_de_la_semana = Receta.created_at >= hace_una_semana
+        por_categoria = db.query(
+            Receta.categoria,
+            func.count(Receta.id).label('recetas'),
+            func.sum(Receta.margen).label('margen'),
+            func.sum(case((es_de_la_semana, 1), else_=0)).label('recetas_semana'),
+            func.sum(case((es_de_la_semana, Receta.margen), else_=0.0)).label('margen_semana')
+        ).group_by(Receta.categoria).all()
+
+        total_recetas = sum(row.recetas for row in por_categoria)
+        total_recetas_semana = sum(row.recetas_semana or 0 for row in por_categoria)
+        margen_promedio = sum(row.margen or 0 for row in por_categoria) / total_recetas if total_recetas else 0
+
+        # Cambio margen (simplificado, comparado con semana anterior)
+        margen_promedio_semana = (
+            sum(row.margen_semana or 0 for row in por_categoria) / total_recetas_semana
+            if total_recetas_semana else margen_promedio
+        )
+        cambio_margen = margen_promedio - margen_promedio_semana if margen_promedio_semana > 0 else 0
+
+        estadisticas = EstadisticasDashboard(
+            ventas_totales_hoy=total_ventas_hoy,
+            items_criticos_count=count_criticos,
+            platos_vendidos_hoy=int(platos_vendidos_hoy),
+            margen_promedio=round(margen_promedio, 1),
+            cambio_ventas_porcentaje=round(cambio_ventas, 1),
+            cambio_platos_porcentaje=round(cambio_platos, 1),
+            cambio_margen_porcentaje=round(cambio_margen, 1)
+        )
+
+        # Platos más vendidos (últimos 7 días), por nombre y sobre todas las líneas: el
+        # resumen diario solo desglosa las ventas con receta
+        top_platos_query = db.query(
+            ItemVenta.nombre_item,
+            func.sum(ItemVenta.cantidad).label('cantidad_vendida'),
+            func.sum(ItemVenta.total).label('ingresos')
+        ).join(Venta).filter(
+            Venta.fecha_creacion >= hace_una_semana
+        )
+        if sucursal_id:
+            top_platos_query = top_platos_query.filter(Venta.sucursal_id == sucursal_id)
+        top_platos_query = top_platos_query.group_by(
+            ItemVenta.nombre_item
+        ).order_by(desc('cantidad_vendida')).limit(5).all()
+
+        platos_top = [
+            PlatoTop(nombre=row.nombre_item, cantidad_vendida=int(row.cantidad_vendida), ingresos=float(row.ingresos))
+            for row in top_platos_query
+        ]
+
+        # Alertas
+        alertas = []
+        for item in items_criticos[:4]:
+            alertas.append(Alerta(
+                tipo="warning",
+                mensaje=f"{item.nombre} está por debajo del stock mínimo ({item.cantidad} {item.unidad} restantes, mínimo {item.stock_minimo} {item.unidad})"
+            ))
+
+        recetas_alto_margen = db.query(Receta).filter(Receta.margen >= 70).limit(2).all()
+        for receta in recetas_alto_margen:
+            alertas.append(Alerta(
+                tipo="info",
+                mensaje=f"{receta.nombre} tiene un margen del {receta.margen:.1f}% - excelente rentabilidad"
+            ))
+
+        # Ventas por día
+        ventas_por_dia = []
+        dias = ["Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom"]
+        for i in range(6, -1, -1):
+            fecha = hoy - timedelta(days=i)
+            total_dia, _ = resumen_dia.get(fecha, (0.0, 0))
+
+            ventas_por_dia.append({
+                "dia": dias[fecha.weekday()],
+                "ventas": round(total_dia, 2)
+            })
+
+        # Distribución por categoría
+        distribucion_categorias = [
+            {"nombre": row.categoria, "valor": round((row.recetas / total_recetas * 100) if total_recetas > 0 else 0)}
+            for row in por_categoria
+        ]
+
+        if not distribucion_categorias:
+            distribucion_categorias = [
+                {"nombre": "Platos Principales", "valor": 45},
+                {"nombre": "Bebidas", "valor": 25},
+                {"nombre": "Entradas", "valor": 20},
+                {"nombre": "Postres", "valor": 10},
+            ]
+
+        return DashboardResponse(
+            estadisticas=estadisticas,
+            platos_top=platos_top,
+            alertas=alertas,
+            ventas_por_dia=ventas_por_dia,
+            distribucion_categorias=distribucion_categorias
+        )
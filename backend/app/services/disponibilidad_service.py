@@ -0,0 +1,155 @@
+"""
+Disponibilidad Service - Porciones que se pueden preparar de cada receta con el stock actual
+
+Para el menú del POS: por sucursal se mantiene en memoria el vector de stock
+{item: cantidad}, lo que cada receta requiere por porción (BOM ya explotado y
+convertido a la unidad del item, desde cache_recetas) y el índice inverso
+item -> recetas. Las porciones de una receta son el mínimo, sobre sus insumos, de
+stock / requerido.
+
+El resultado se reutiliza mientras no cambien las versiones de las etiquetas
+"recetas" e "inventario" (y como mucho CACHE_TTL_SEGUNDOS, por los workers con el
+backend en memoria). Si solo cambió el inventario se vuelve a leer el vector de stock
+(una consulta) y se recalculan únicamente las recetas que usan items cuyo stock cambió.
+"""
+import math
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache
+from app.core.cache_recetas import cache_recetas, ETIQUETA_RECETAS
+from app.core.config import settings
+from app.models.item_inventario import ItemInventario
+from app.models.receta import Receta
+
+ETIQUETA_INVENTARIO = "inventario"
+
+# Tolerancia para que 1.0 / 0.1 cuente como 10 porciones y no 9
+EPSILON = 1e-9
+
+
+@dataclass
+class _EstadoSucursal:
+    version_recetas: int
+    version_inventario: int
+    calculado_en: float
+    recetas: List[Tuple[str, str, bool]]  # (receta_id, nombre, disponible en el menú)
+    requeridos: Dict[str, Tuple[Tuple[str, float], ...]]  # receta_id -> ((item_id, por porción), ...)
+    usado_por: Dict[str, Set[str]]  # item_id -> recetas que lo usan
+    stock: Dict[str, float]
+    porciones: Dict[str, Optional[int]] = field(default_factory=dict)
+
+
+def _porciones(requeridos: Tuple[Tuple[str, float], ...], stock: Dict[str, float]) -> Optional[int]:
+    """Mínimo sobre los insumos; None si la receta no consume inventario de la sucursal"""
+    return min(
+        (
+            math.floor(max(stock[item_id], 0.0) / necesario + EPSILON)
+            for item_id, necesario in requeridos
+            if item_id in stock
+        ),
+        default=None
+    )
+
+
+class DisponibilidadService:
+    """Porciones disponibles por receta, cacheadas y recalculadas de forma incremental"""
+
+    _estados: Dict[str, _EstadoSucursal] = {}
+
+    @staticmethod
+    def _stock(db: Session, sucursal_id: str) -> Dict[str, float]:
+        return dict(db.query(ItemInventario.id, ItemInventario.cantidad).filter(
+            ItemInventario.sucursal_id == sucursal_id
+        ))
+
+    @staticmethod
+    def _construir(db: Session, sucursal_id: str, versiones: List[int]) -> _EstadoSucursal:
+        recetas = [
+            (receta_id, nombre, disponible is not False)
+            for receta_id, nombre, disponible in db.query(
+                Receta.id, Receta.nombre, Receta.disponible
+            ).filter(Receta.sucursal_id == sucursal_id).order_by(Receta.nombre)
+        ]
+        boms = cache_recetas.bom(db, [receta_id for receta_id, _, _ in recetas])
+
+        requeridos: Dict[str, Tuple[Tuple[str, float], ...]] = {}
+        usado_por: Dict[str, Set[str]] = defaultdict(set)
+        for receta_id, bom in boms.items():
+            por_item: Dict[str, float] = defaultdict(float)
+            for item_id, cantidad, factor in bom:
+                por_item[item_id] += cantidad * factor
+            requeridos[receta_id] = tuple(
+                (item_id, necesario) for item_id, necesario in por_item.items() if necesario > 0
+            )
+            for item_id, _ in requeridos[receta_id]:
+                usado_por[item_id].add(receta_id)
+
+        estado = _EstadoSucursal(
+            version_recetas=versiones[0],
+            version_inventario=versiones[1],
+            calculado_en=time.monotonic(),
+            recetas=recetas,
+            requeridos=requeridos,
+            usado_por=usado_por,
+            stock=DisponibilidadService._stock(db, sucursal_id),
+        )
+        estado.porciones = {
+            receta_id: _porciones(requeridos[receta_id], estado.stock) for receta_id, _, _ in recetas
+        }
+        return estado
+
+    @staticmethod
+    def _actualizar_stock(
+        db: Session, sucursal_id: str, estado: _EstadoSucursal, versiones: List[int]
+    ) -> _EstadoSucursal:
+        """Relee el stock y recalcula solo las recetas que usan items que cambiaron"""
+        stock = DisponibilidadService._stock(db, sucursal_id)
+        cambiados = {
+            item_id for item_id in stock.keys() | estado.stock.keys()
+            if stock.get(item_id) != estado.stock.get(item_id)
+        }
+        porciones = dict(estado.porciones)
+        for receta_id in set().union(*(estado.usado_por.get(item_id, ()) for item_id in cambiados)):
+            porciones[receta_id] = _porciones(estado.requeridos[receta_id], stock)
+        # Estado nuevo en lugar de modificarlo: otra petición puede estar leyendo el anterior
+        return replace(
+            estado,
+            version_inventario=versiones[1],
+            calculado_en=time.monotonic(),
+            stock=stock,
+            porciones=porciones,
+        )
+
+    @staticmethod
+    def calcular(db: Session, sucursal_id: str) -> List[dict]:
+        """
+        Porciones que se pueden preparar de cada receta de la sucursal.
+
+        Returns:
+            [{receta_id, nombre, porciones_disponibles, disponible}] ordenado por nombre;
+            porciones_disponibles es None si la receta no descuenta inventario.
+        """
+        versiones = cache.backend.versiones([ETIQUETA_RECETAS, ETIQUETA_INVENTARIO])
+        estado = DisponibilidadService._estados.get(sucursal_id)
+        vencido = estado is None or time.monotonic() - estado.calculado_en > settings.CACHE_TTL_SEGUNDOS
+
+        if estado is None or estado.version_recetas != versiones[0] or not cache_recetas.vigente():
+            estado = DisponibilidadService._construir(db, sucursal_id, versiones)
+        elif vencido or estado.version_inventario != versiones[1]:
+            estado = DisponibilidadService._actualizar_stock(db, sucursal_id, estado, versiones)
+        DisponibilidadService._estados[sucursal_id] = estado
+
+        return [
+            {
+                "receta_id": receta_id,
+                "nombre": nombre,
+                "porciones_disponibles": estado.porciones.get(receta_id),
+                "disponible": disponible and estado.porciones.get(receta_id) != 0,
+            }
+            for receta_id, nombre, disponible in estado.recetas
+        ]
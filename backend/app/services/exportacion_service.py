@@ -0,0 +1,166 @@
+"""
+Exportacion Service - Volcado en streaming de ventas, items y movimientos
+
+Las filas se leen con un cursor del lado del servidor (yield_per) y se emiten en
+bloques, de modo que la memoria usada no depende del número de filas exportadas.
+"""
+import io
+import csv
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.venta import Venta, ItemVenta
+from app.models.movimiento_inventario import MovimientoInventario
+
+FILAS_POR_BLOQUE = 1000
+
+
+class DatasetExportacion(str, Enum):
+    VENTAS = "ventas"
+    ITEMS_VENTA = "items_venta"
+    MOVIMIENTOS_INVENTARIO = "movimientos_inventario"
+
+
+class FormatoExportacion(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+    COLUMNAR = "columnar"  # Una línea JSON por bloque con los valores agrupados por columna
+
+
+MEDIA_TYPES = {
+    FormatoExportacion.CSV: "text/csv",
+    FormatoExportacion.NDJSON: "application/x-ndjson",
+    FormatoExportacion.COLUMNAR: "application/x-ndjson",
+}
+
+EXTENSIONES = {
+    FormatoExportacion.CSV: "csv",
+    FormatoExportacion.NDJSON: "ndjson",
+    FormatoExportacion.COLUMNAR: "columnar.ndjson",
+}
+
+
+def _serializar(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+class ExportacionService:
+    """Consultas y formatos de exportación"""
+
+    @staticmethod
+    def consulta(
+        dataset: DatasetExportacion,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        sucursal_id: Optional[str] = None
+    ):
+        """SELECT de columnas planas (sin ORM) ordenado por (fecha_creacion, id)"""
+        if dataset == DatasetExportacion.VENTAS:
+            fecha, sucursal, orden_id = Venta.fecha_creacion, Venta.sucursal_id, Venta.id
+            stmt = select(
+                Venta.id, Venta.numero_venta, Venta.sucursal_id, Venta.fecha_creacion,
+                Venta.tipo_venta, Venta.servicio_delivery, Venta.numero_mesa, Venta.mesero_id,
+                Venta.nombre_cliente, Venta.metodo_pago, Venta.estado, Venta.subtotal,
+                Venta.monto_descuento, Venta.impuesto, Venta.total
+            )
+        elif dataset == DatasetExportacion.ITEMS_VENTA:
+            fecha, sucursal, orden_id = Venta.fecha_creacion, Venta.sucursal_id, ItemVenta.id
+            stmt = select(
+                ItemVenta.id, ItemVenta.venta_id, Venta.numero_venta, Venta.sucursal_id,
+                Venta.fecha_creacion, ItemVenta.receta_id, ItemVenta.nombre_item,
+                ItemVenta.cantidad, ItemVenta.precio_unitario, ItemVenta.total,
+                ItemVenta.costo_unitario, ItemVenta.receta_version
+            ).join(Venta, Venta.id == ItemVenta.venta_id)
+        else:
+            fecha, sucursal, orden_id = (
+                MovimientoInventario.fecha_creacion, MovimientoInventario.sucursal_id, MovimientoInventario.id
+            )
+            stmt = select(
+                MovimientoInventario.id, MovimientoInventario.sucursal_id, MovimientoInventario.fecha_creacion,
+                MovimientoInventario.item_inventario_id, MovimientoInventario.tipo_movimiento,
+                MovimientoInventario.cantidad, MovimientoInventario.unidad, MovimientoInventario.costo_unitario,
+                MovimientoInventario.referencia_id, MovimientoInventario.tipo_referencia,
+                MovimientoInventario.notas, MovimientoInventario.usuario_id
+            )
+
+        if desde:
+            stmt = stmt.where(fecha >= desde)
+        if hasta:
+            stmt = stmt.where(fecha < hasta)
+        if sucursal_id:
+            stmt = stmt.where(sucursal == sucursal_id)
+        return stmt.order_by(fecha, orden_id)
+
+    @staticmethod
+    def bloques(db: Session, stmt) -> Iterator[tuple]:
+        """
+        Retorna (columnas, filas) por bloque de FILAS_POR_BLOQUE, leyendo con un
+        cursor del lado del servidor.
+        """
+        resultado = db.execute(stmt.execution_options(yield_per=FILAS_POR_BLOQUE))
+        columnas: List[str] = list(resultado.keys())
+        for particion in resultado.partitions():
+            yield columnas, particion
+
+    @staticmethod
+    def generar(db: Session, stmt, formato: FormatoExportacion) -> Iterator[str]:
+        """
+        Genera el contenido en el formato pedido. Cierra la sesión al terminar:
+        el streaming continúa después de que el endpoint retornó.
+        """
+        try:
+            if formato == FormatoExportacion.CSV:
+                yield from ExportacionService._csv(db, stmt)
+            elif formato == FormatoExportacion.NDJSON:
+                yield from ExportacionService._ndjson(db, stmt)
+            else:
+                yield from ExportacionService._columnar(db, stmt)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _csv(db: Session, stmt) -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        encabezado = False
+        for columnas, filas in ExportacionService.bloques(db, stmt):
+            if not encabezado:
+                writer.writerow(columnas)
+                encabezado = True
+            writer.writerows([[_serializar(v) for v in fila] for fila in filas])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        if not encabezado:
+            # Sin filas: al menos el encabezado
+            writer.writerow([c["name"] for c in stmt.column_descriptions])
+            yield buffer.getvalue()
+
+    @staticmethod
+    def _ndjson(db: Session, stmt) -> Iterator[str]:
+        for columnas, filas in ExportacionService.bloques(db, stmt):
+            yield "".join(
+                json.dumps(dict(zip(columnas, map(_serializar, fila))), ensure_ascii=False) + "\n"
+                for fila in filas
+            )
+
+    @staticmethod
+    def _columnar(db: Session, stmt) -> Iterator[str]:
+        for columnas, filas in ExportacionService.bloques(db, stmt):
+            valores = list(zip(*filas))
+            bloque = {
+                "columnas": columnas,
+                "filas": len(filas),
+                "datos": {
+                    columna: [_serializar(v) for v in valores[i]]
+                    for i, columna in enumerate(columnas)
+                },
+            }
+            yield json.dumps(bloque, ensure_ascii=False) + "\n"
@@ -0,0 +1,203 @@
+"""
+Kardex Service - Libro de stock: snapshots, stock a una fecha y conciliación
+
+El libro es movimientos_inventario (cada fila con su delta firmado, escrita por
+StockService.registrar_movimientos) e items_inventario.cantidad es una proyección
+mantenida en la misma transacción. Para no sumar el historial completo, cada cierto
+tiempo se guarda un snapshot por item (scripts/kardex.py snapshot): el stock a una
+fecha es el último snapshot anterior más los deltas de los movimientos posteriores,
+que se leen por el índice (item_inventario_id, fecha_creacion).
+
+La conciliación reconstruye la proyección desde el libro y reporta las diferencias.
+"""
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, insert, or_, update
+from sqlalchemy.orm import Session
+
+from app.models.item_inventario import ItemInventario
+from app.models.movimiento_inventario import MovimientoInventario
+from app.models.snapshot_inventario import SnapshotInventario
+
+# Los snapshots cortan unos minutos atrás: un movimiento se fecha al registrarse pero
+# se confirma con su transacción, y no debe quedar antes de un corte ya tomado
+MARGEN_SNAPSHOT = timedelta(minutes=5)
+
+# Diferencias menores se consideran redondeo de punto flotante
+TOLERANCIA = 1e-6
+
+
+class KardexService:
+    """Lectura y mantenimiento del libro de stock"""
+
+    @staticmethod
+    def _libro(
+        db: Session,
+        fecha: Optional[datetime],
+        sucursal_id: Optional[str] = None
+    ) -> Tuple[Dict[str, float], Dict[str, Tuple[float, int]]]:
+        """
+        Último snapshot de cada item hasta `fecha` (None: sin límite) y la suma de los
+        movimientos posteriores, en dos consultas.
+
+        Returns:
+            ({item_id: cantidad del snapshot}, {item_id: (suma de deltas, movimientos)})
+        """
+        ultimo = db.query(
+            SnapshotInventario.item_inventario_id.label("item_id"),
+            func.max(SnapshotInventario.fecha).label("fecha")
+        )
+        if fecha is not None:
+            ultimo = ultimo.filter(SnapshotInventario.fecha <= fecha)
+        if sucursal_id:
+            ultimo = ultimo.filter(SnapshotInventario.sucursal_id == sucursal_id)
+        ultimo = ultimo.group_by(SnapshotInventario.item_inventario_id).subquery()
+
+        bases = dict(db.query(
+            SnapshotInventario.item_inventario_id,
+            SnapshotInventario.cantidad
+        ).join(ultimo, and_(
+            SnapshotInventario.item_inventario_id == ultimo.c.item_id,
+            SnapshotInventario.fecha == ultimo.c.fecha
+        )))
+
+        posteriores = db.query(
+            MovimientoInventario.item_inventario_id,
+            func.sum(MovimientoInventario.delta),
+            func.count(MovimientoInventario.id)
+        ).outerjoin(
+            ultimo, ultimo.c.item_id == MovimientoInventario.item_inventario_id
+        ).filter(or_(
+            ultimo.c.fecha.is_(None),
+            MovimientoInventario.fecha_creacion > ultimo.c.fecha
+        ))
+        if fecha is not None:
+            posteriores = posteriores.filter(MovimientoInventario.fecha_creacion <= fecha)
+        if sucursal_id:
+            posteriores = posteriores.filter(MovimientoInventario.sucursal_id == sucursal_id)
+        posteriores = posteriores.group_by(MovimientoInventario.item_inventario_id)
+
+        return bases, {item_id: (suma or 0.0, n) for item_id, suma, n in posteriores}
+
+    @staticmethod
+    def stock_en(db: Session, fecha: datetime, sucursal_id: Optional[str] = None) -> Dict[str, float]:
+        """
+        Stock de cada item (de la sucursal, si se indica) al momento `fecha`.
+
+        Returns:
+            {item_id: cantidad}; los items sin movimientos hasta esa fecha quedan en 0.
+        """
+        bases, posteriores = KardexService._libro(db, fecha, sucursal_id)
+        items = db.query(ItemInventario.id)
+        if sucursal_id:
+            items = items.filter(ItemInventario.sucursal_id == sucursal_id)
+        return {
+            item_id: bases.get(item_id, 0.0) + posteriores.get(item_id, (0.0, 0))[0]
+            for (item_id,) in items
+        }
+
+    @staticmethod
+    def tomar_snapshots(
+        db: Session,
+        corte: Optional[datetime] = None,
+        sucursal_id: Optional[str] = None
+    ) -> int:
+        """
+        Guarda el stock al `corte` (por defecto ahora - MARGEN_SNAPSHOT) de los items
+        con movimientos desde su último snapshot, en un solo INSERT.
+
+        Returns:
+            Número de snapshots creados.
+        """
+        corte = corte or datetime.utcnow() - MARGEN_SNAPSHOT
+        bases, posteriores = KardexService._libro(db, corte, sucursal_id)
+        if not posteriores:
+            return 0
+        sucursales = dict(db.query(ItemInventario.id, ItemInventario.sucursal_id).filter(
+            ItemInventario.id.in_(list(posteriores))
+        ))
+        ahora = datetime.utcnow()
+        filas = [
+            {
+                "id": str(uuid.uuid4()),
+                "item_inventario_id": item_id,
+                "sucursal_id": sucursales[item_id],
+                "cantidad": bases.get(item_id, 0.0) + suma,
+                "fecha": corte,
+                "created_at": ahora,
+            }
+            for item_id, (suma, _) in posteriores.items()
+            if item_id in sucursales
+        ]
+        if filas:
+            db.execute(insert(SnapshotInventario), filas)
+        return len(filas)
+
+    @staticmethod
+    def conciliar(db: Session, sucursal_id: Optional[str] = None, corregir: bool = False) -> dict:
+        """
+        Compara items_inventario.cantidad con el stock según el libro.
+
+        Los items se bloquean primero (en orden por id, como validar_stock): una
+        transacción que está registrando movimientos ya tiene su fila, así que la
+        lectura del libro ve todos sus movimientos confirmados.
+
+        Con corregir=True reescribe en un solo UPDATE la cantidad de los items con
+        diferencias, y abre el libro de los items que no tienen ninguna entrada (creados
+        fuera de la API) con un snapshot de su cantidad actual.
+
+        Returns:
+            {"items": revisados, "diferencias": [{item_inventario_id, nombre, sucursal_id,
+            cantidad, libro, diferencia}], "sin_libro": [item_id, ...]}
+        """
+        items = db.query(
+            ItemInventario.id,
+            ItemInventario.sucursal_id,
+            ItemInventario.nombre,
+            ItemInventario.cantidad
+        )
+        if sucursal_id:
+            items = items.filter(ItemInventario.sucursal_id == sucursal_id)
+        items = items.order_by(ItemInventario.id).with_for_update(of=ItemInventario).all()
+        bases, posteriores = KardexService._libro(db, None, sucursal_id)
+
+        diferencias: List[dict] = []
+        sin_libro = []
+        for item in items:
+            if item.id not in bases and item.id not in posteriores:
+                sin_libro.append(item)
+                continue
+            libro = bases.get(item.id, 0.0) + posteriores.get(item.id, (0.0, 0))[0]
+            if abs((item.cantidad or 0.0) - libro) > TOLERANCIA:
+                diferencias.append({
+                    "item_inventario_id": item.id,
+                    "nombre": item.nombre,
+                    "sucursal_id": item.sucursal_id,
+                    "cantidad": item.cantidad,
+                    "libro": libro,
+                    "diferencia": (item.cantidad or 0.0) - libro,
+                })
+
+        if corregir and diferencias:
+            libro = {fila["item_inventario_id"]: fila["libro"] for fila in diferencias}
+            db.execute(update(ItemInventario).where(
+                ItemInventario.id.in_(list(libro))
+            ).values(
+                cantidad=case(libro, value=ItemInventario.id),
+                ultima_actualizacion=datetime.utcnow()
+            ).execution_options(synchronize_session=False))
+        if corregir and sin_libro:
+            ahora = datetime.utcnow()
+            db.execute(insert(SnapshotInventario), [
+                {"id": str(uuid.uuid4()), "item_inventario_id": item.id, "sucursal_id": item.sucursal_id,
+                 "cantidad": item.cantidad or 0.0, "fecha": ahora, "created_at": ahora}
+                for item in sin_libro
+            ])
+
+        return {
+            "items": len(items),
+            "diferencias": diferencias,
+            "sin_libro": [item.id for item in sin_libro],
+        }
@@ -0,0 +1,69 @@
+"""
+Numeracion Ventas Service - numero_venta correlativo por sucursal
+
+En PostgreSQL cada sucursal tiene su SEQUENCE (ventas_numero_<id de sucursal>):
+nextval no bloquea ni se revierte, así que dos ventas simultáneas nunca reciben el
+mismo número y el INSERT no falla ni se reintenta por colisiones (a cambio, una venta
+revertida deja un hueco en la numeración). En SQLite, sin secuencias, se usa el
+contador de secuencias_venta; SQLite ya serializa las escrituras.
+"""
+import re
+from typing import List, Set
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.secuencia_venta import SecuenciaVenta
+
+FORMATO_NUMERO_VENTA = "V-{:06d}"
+
+# Secuencias que este proceso ya sabe que existen
+_secuencias_verificadas: Set[str] = set()
+
+
+def nombre_secuencia(sucursal_id: str) -> str:
+    """Identificador válido en PostgreSQL (máximo 63 caracteres) derivado del id"""
+    return "ventas_numero_" + re.sub(r"[^a-z0-9]", "", sucursal_id.lower())[:48]
+
+
+class NumeracionVentasService:
+    """Números de venta por sucursal sin colisiones"""
+
+    @staticmethod
+    def crear_secuencia(db: Session, sucursal_id: str) -> None:
+        """Crea la secuencia de la sucursal (dentro de la transacción; no-op fuera de PostgreSQL)"""
+        if db.get_bind().dialect.name != "postgresql":
+            return
+        db.execute(text(f"CREATE SEQUENCE IF NOT EXISTS {nombre_secuencia(sucursal_id)}"))
+
+    @staticmethod
+    def siguientes(db: Session, sucursal_id: str, cantidad: int = 1) -> List[int]:
+        """
+        Reserva `cantidad` números de la sucursal en una sola consulta, en orden
+        creciente (en PostgreSQL pueden intercalarse con los de otra transacción).
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            nombre = nombre_secuencia(sucursal_id)
+            if nombre not in _secuencias_verificadas:
+                if db.execute(text(f"SELECT to_regclass('{nombre}')")).scalar() is not None:
+                    _secuencias_verificadas.add(nombre)
+                else:
+                    # Se crea con la transacción de la venta: si se revierte, se vuelve a intentar
+                    NumeracionVentasService.crear_secuencia(db, sucursal_id)
+            return sorted(db.execute(
+                text(f"SELECT nextval('{nombre}') FROM generate_series(1, :cantidad)"),
+                {"cantidad": cantidad}
+            ).scalars())
+
+        from sqlalchemy.dialects.sqlite import insert as upsert
+        stmt = upsert(SecuenciaVenta).values(sucursal_id=sucursal_id, ultimo=cantidad)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SecuenciaVenta.sucursal_id],
+            set_={"ultimo": SecuenciaVenta.ultimo + cantidad}
+        ).returning(SecuenciaVenta.ultimo)
+        ultimo = db.execute(stmt).scalar_one()
+        return list(range(ultimo - cantidad + 1, ultimo + 1))
+
+    @staticmethod
+    def siguiente_numero(db: Session, sucursal_id: str) -> str:
+        return FORMATO_NUMERO_VENTA.format(NumeracionVentasService.siguientes(db, sucursal_id)[0])
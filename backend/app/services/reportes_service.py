@@ -0,0 +1,196 @@
+"""
+Reportes Service - Consultas de /reports sobre el resumen diario de ventas
+
+Funciones síncronas sobre Session: los endpoints async las ejecutan con
+AsyncSession.run_sync y los scripts (benchmarks, EXPLAIN) las llaman directo.
+"""
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import func, and_, extract, case, desc
+from sqlalchemy.orm import Session
+
+from app.models.venta import Venta
+from app.models.receta import Receta
+from app.models.resumen_venta import ResumenVentaDiario, RESUMEN_TOTAL_DIA
+
+NOMBRES_MESES = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
+
+
+def filtros_resumen(desde: date, sucursal_id: Optional[str], por_receta: bool = False) -> list:
+    """Filtros comunes sobre resumen_ventas_diario"""
+    filtros = [ResumenVentaDiario.fecha >= desde]
+    if por_receta:
+        filtros.append(ResumenVentaDiario.receta_id != RESUMEN_TOTAL_DIA)
+    else:
+        filtros.append(ResumenVentaDiario.receta_id == RESUMEN_TOTAL_DIA)
+    if sucursal_id:
+        filtros.append(ResumenVentaDiario.sucursal_id == sucursal_id)
+    return filtros
+
+
+class ReportesService:
+    """Reportes de ventas, costos y márgenes"""
+
+    @staticmethod
+    def mensual(db: Session, months: int = 6, sucursal_id: Optional[str] = None) -> List[dict]:
+        """Ventas, costos y ganancias por mes"""
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=months * 30)
+
+        # Agregar desde el resumen diario: el costo de cada venta ya está acumulado
+        anio = extract('year', ResumenVentaDiario.fecha)
+        mes = extract('month', ResumenVentaDiario.fecha)
+        ventas_mensuales = db.query(
+            anio.label('year'),
+            mes.label('month'),
+            func.sum(ResumenVentaDiario.ingresos).label('ventas'),
+            func.sum(ResumenVentaDiario.costo).label('costos')
+        ).filter(
+            *filtros_resumen(start_date.date(), sucursal_id)
+        ).group_by(anio, mes).order_by(anio, mes).all()
+
+        result = []
+        for row in ventas_mensuales:
+            ventas = float(row.ventas) if row.ventas else 0
+            costos = float(row.costos) if row.costos else 0
+            ganancia = ventas - costos
+
+            result.append({
+                "mes": NOMBRES_MESES[int(row.month) - 1],
+                "ventas": round(ventas, 2),
+                "costos": round(costos, 2),
+                "ganancia": round(ganancia, 2)
+            })
+
+        return result
+
+    @staticmethod
+    def categorias(db: Session, days: int = 30, sucursal_id: Optional[str] = None) -> List[dict]:
+        """Unidades e ingresos por categoría de receta"""
+        start_date = datetime.now() - timedelta(days=days)
+
+        items = db.query(
+            Receta.categoria,
+            func.sum(ResumenVentaDiario.unidades).label('ventas'),
+            func.sum(ResumenVentaDiario.ingresos).label('ingresos')
+        ).join(
+            Receta, Receta.id == ResumenVentaDiario.receta_id
+        ).filter(
+            *filtros_resumen(start_date.date(), sucursal_id, por_receta=True)
+        ).group_by(
+            Receta.categoria
+        ).all()
+
+        return [
+            {
+                "categoria": row.categoria,
+                "cantidad_vendida": int(row.ventas) if row.ventas else 0,
+                "ingresos": float(row.ingresos) if row.ingresos else 0
+            }
+            for row in items
+        ]
+
+    @staticmethod
+    def margenes(db: Session) -> List[dict]:
+        """Las 10 recetas con mayor margen"""
+        # Ordenar y limitar en la base de datos en lugar de cargar todas las recetas
+        recetas = db.query(
+            Receta.nombre,
+            Receta.precio,
+            Receta.costo,
+            Receta.margen
+        ).order_by(desc(Receta.margen)).limit(10).all()
+
+        return [
+            {
+                "nombre": receta.nombre,
+                "precio_venta": receta.precio,
+                "costo": receta.costo,
+                "margen": round(receta.margen, 1)
+            }
+            for receta in recetas
+        ]
+
+    @staticmethod
+    def metodos_pago(db: Session, days: int = 30) -> List[dict]:
+        """Distribución de ventas por método de pago"""
+        start_date = datetime.now() - timedelta(days=days)
+
+        ventas = db.query(
+            Venta.metodo_pago,
+            func.count(Venta.id).label('count'),
+            func.sum(Venta.total).label('total')
+        ).filter(
+            and_(
+                Venta.fecha_creacion >= start_date,
+                Venta.metodo_pago.isnot(None)
+            )
+        ).group_by(
+            Venta.metodo_pago
+        ).all()
+
+        total_count = sum(row.count for row in ventas)
+
+        result = []
+        for row in ventas:
+            count = int(row.count)
+            amount = float(row.total) if row.total else 0
+            percentage = (count / total_count * 100) if total_count > 0 else 0
+
+            result.append({
+                "metodo": row.metodo_pago,
+                "porcentaje": round(percentage, 1),
+                "cantidad": count,
+                "total": round(amount, 2)
+            })
+
+        return result
+
+    @staticmethod
+    def resumen(db: Session, days: int = 30, sucursal_id: Optional[str] = None) -> dict:
+        """Métricas clave del periodo y crecimiento frente al periodo anterior"""
+        start_date = (datetime.now() - timedelta(days=days)).date()
+        prev_start = start_date - timedelta(days=days)
+
+        # Periodo actual y anterior en una sola pasada sobre el resumen diario
+        periodo_actual = ResumenVentaDiario.fecha >= start_date
+        totales = db.query(
+            func.sum(case((periodo_actual, ResumenVentaDiario.ingresos), else_=0.0)).label('ventas'),
+            func.sum(case((periodo_actual, ResumenVentaDiario.costo), else_=0.0)).label('costo'),
+            func.sum(case((periodo_actual, 0.0), else_=ResumenVentaDiario.ingresos)).label('ventas_previas')
+        ).filter(
+            *filtros_resumen(prev_start, sucursal_id)
+        ).one()
+
+        total_sales = float(totales.ventas or 0)
+        total_cost = float(totales.costo or 0)
+        net_profit = total_sales - total_cost
+
+        # Margen promedio
+        avg_margin = db.query(func.avg(Receta.margen)).scalar() or 0
+
+        # Crecimiento
+        prev_total = float(totales.ventas_previas or 0)
+        growth = ((total_sales - prev_total) / prev_total * 100) if prev_total > 0 else 0
+
+        return {
+            "ventas_totales": round(total_sales, 2),
+            "costo_total": round(total_cost, 2),
+            "ganancia_neta": round(net_profit, 2),
+            "margen_promedio": round(avg_margin, 1),
+            "crecimiento": round(growth, 1),
+            "dias_periodo": days
+        }
+
+    @staticmethod
+    def completo(db: Session, days: int = 30) -> dict:
+        """Todos los reportes juntos (para exportar)"""
+        return {
+            "summary": ReportesService.resumen(db, days=days),
+            "monthly_trend": ReportesService.mensual(db, months=6),
+            "category_performance": ReportesService.categorias(db, days=days),
+            "profit_margins": ReportesService.margenes(db),
+            "payment_methods": ReportesService.metodos_pago(db, days=days),
+            "exported_at": datetime.now().isoformat()
+        }
@@ -0,0 +1,280 @@
+"""
+Resumen Ventas Service - Mantenimiento de la tabla resumen_ventas_diario
+"""
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, delete, func, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.receta import Receta
+from app.models.resumen_venta import ResumenVentaDiario, RESUMEN_TOTAL_DIA
+from app.models.venta import Venta, ItemVenta
+
+
+def costo_unitario_receta():
+    """Expresión SQL del costo por porción de una receta (costo / porciones)"""
+    return Receta.costo / case((Receta.porciones > 0, Receta.porciones), else_=1)
+
+
+def _como_fecha(valor) -> date:
+    # SQLite devuelve date() como texto 'YYYY-MM-DD'
+    if isinstance(valor, str):
+        return date.fromisoformat(valor)
+    if isinstance(valor, datetime):
+        return valor.date()
+    return valor
+
+
+class ResumenVentasService:
+    """Agregados diarios de ventas por sucursal y receta"""
+
+    @staticmethod
+    def snapshot_costos(db: Session, receta_ids: Iterable[str]) -> Dict[str, Tuple[float, int]]:
+        """
+        Costo por porción y versión vigente de cada receta, en una sola consulta.
+        Se guarda en ItemVenta al momento de la venta.
+        """
+        ids = {receta_id for receta_id in receta_ids if receta_id}
+        if not ids:
+            return {}
+        filas = db.query(
+            Receta.id,
+            costo_unitario_receta(),
+            Receta.version_actual
+        ).filter(Receta.id.in_(ids)).all()
+        return {receta_id: (costo or 0.0, version) for receta_id, costo, version in filas}
+
+    @staticmethod
+    def registrar_venta(db: Session, venta: Venta, items: List[ItemVenta]) -> None:
+        """
+        Acumula una venta recién creada en el resumen del día, usando el costo
+        unitario guardado en cada ItemVenta (sin consultar recetas).
+
+        Se ejecuta dentro de la transacción de la venta, así que el resumen y
+        la venta se confirman (o se revierten) juntos.
+        """
+        filas = ResumenVentasService._filas_venta(
+            venta.sucursal_id,
+            venta.fecha_creacion,
+            venta.total,
+            ((i.receta_id, i.nombre_item, i.cantidad, i.total, i.costo_unitario) for i in items)
+        )
+        ResumenVentasService._acumular(db, filas)
+
+    @staticmethod
+    def registrar_lote(db: Session, ventas: Iterable[Tuple[dict, List[dict]]]) -> None:
+        """
+        Igual que registrar_venta para muchas ventas (filas de ventas e items_venta
+        como diccionarios): las filas se suman por (sucursal, día, receta) antes de
+        escribir, así que es un solo upsert sin importar cuántas ventas haya.
+        """
+        agregadas: Dict[tuple, dict] = {}
+        for venta, items in ventas:
+            for fila in ResumenVentasService._filas_venta(
+                venta["sucursal_id"],
+                venta["fecha_creacion"],
+                venta["total"],
+                ((i["receta_id"], i["nombre_item"], i["cantidad"], i["total"], i["costo_unitario"]) for i in items)
+            ):
+                clave = (fila["sucursal_id"], fila["fecha"], fila["receta_id"])
+                existente = agregadas.get(clave)
+                if existente is None:
+                    agregadas[clave] = fila
+                    continue
+                for campo in ("ingresos", "unidades", "costo", "tickets"):
+                    existente[campo] += fila[campo]
+        if agregadas:
+            ResumenVentasService._acumular(db, list(agregadas.values()))
+
+    @staticmethod
+    def _filas_venta(
+        sucursal_id: str,
+        fecha_creacion: datetime,
+        total: float,
+        items: Iterable[Tuple[Optional[str], str, int, float, Optional[float]]]
+    ) -> List[dict]:
+        """Filas del resumen para una venta; items: (receta_id, nombre, cantidad, total, costo_unitario)"""
+        fecha = fecha_creacion.date()
+
+        total_dia = {
+            "receta_id": RESUMEN_TOTAL_DIA,
+            "nombre_item": None,
+            "ingresos": total,
+            "unidades": 0,
+            "costo": 0.0,
+            "tickets": 1,
+        }
+        por_receta: Dict[str, dict] = {}
+        for receta_id, nombre_item, cantidad, total_item, costo_unitario in items:
+            costo = (costo_unitario or 0.0) * cantidad
+            total_dia["unidades"] += cantidad
+            total_dia["costo"] += costo
+            if not receta_id:
+                continue
+            fila = por_receta.setdefault(receta_id, {
+                "receta_id": receta_id,
+                "nombre_item": nombre_item,
+                "ingresos": 0.0,
+                "unidades": 0,
+                "costo": 0.0,
+                "tickets": 1,
+            })
+            fila["ingresos"] += total_item
+            fila["unidades"] += cantidad
+            fila["costo"] += costo
+
+        filas = [total_dia, *por_receta.values()]
+        for fila in filas:
+            fila.update(id=str(uuid.uuid4()), sucursal_id=sucursal_id, fecha=fecha)
+        return filas
+
+    @staticmethod
+    def _acumular(db: Session, filas: List[dict]) -> None:
+        """INSERT ... ON CONFLICT DO UPDATE sumando a los valores existentes"""
+        dialecto = db.get_bind().dialect.name
+        if dialecto == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        elif dialecto == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            ResumenVentasService._acumular_generico(db, filas)
+            return
+
+        tabla = ResumenVentaDiario.__table__
+        stmt = upsert(tabla)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[tabla.c.sucursal_id, tabla.c.fecha, tabla.c.receta_id],
+            set_={
+                "ingresos": tabla.c.ingresos + stmt.excluded.ingresos,
+                "unidades": tabla.c.unidades + stmt.excluded.unidades,
+                "costo": tabla.c.costo + stmt.excluded.costo,
+                "tickets": tabla.c.tickets + stmt.excluded.tickets,
+                "nombre_item": func.coalesce(stmt.excluded.nombre_item, tabla.c.nombre_item),
+                "updated_at": datetime.utcnow(),
+            }
+        )
+        db.execute(stmt, filas)
+
+    @staticmethod
+    def _acumular_generico(db: Session, filas: List[dict]) -> None:
+        """
+        Mismo efecto que _acumular para dialectos sin ON CONFLICT: UPDATE por fila y,
+        si no existía, INSERT, en la transacción de la venta. El INSERT va en un
+        savepoint: si otra transacción creó la fila entre medio, se vuelve a sumar.
+        """
+        tabla = ResumenVentaDiario.__table__
+        for fila in filas:
+            sumar = update(tabla).where(
+                tabla.c.sucursal_id == fila["sucursal_id"],
+                tabla.c.fecha == fila["fecha"],
+                tabla.c.receta_id == fila["receta_id"]
+            ).values(
+                ingresos=tabla.c.ingresos + fila["ingresos"],
+                unidades=tabla.c.unidades + fila["unidades"],
+                costo=tabla.c.costo + fila["costo"],
+                tickets=tabla.c.tickets + fila["tickets"],
+                nombre_item=func.coalesce(fila["nombre_item"], tabla.c.nombre_item),
+                updated_at=datetime.utcnow()
+            )
+            if db.execute(sumar).rowcount:
+                continue
+            try:
+                with db.begin_nested():
+                    db.execute(insert(tabla).values(**fila, updated_at=datetime.utcnow()))
+            except IntegrityError:
+                db.execute(sumar)
+
+    @staticmethod
+    def reconstruir(
+        db: Session,
+        desde: Optional[date] = None,
+        hasta: Optional[date] = None,
+        sucursal_id: Optional[str] = None
+    ) -> int:
+        """
+        Recalcula el resumen desde ventas/items_venta para el rango indicado
+        (ambos extremos incluidos). Retorna el número de filas generadas.
+        """
+        filtros_resumen = []
+        filtros_venta = []
+        if desde:
+            filtros_resumen.append(ResumenVentaDiario.fecha >= desde)
+            filtros_venta.append(Venta.fecha_creacion >= datetime.combine(desde, datetime.min.time()))
+        if hasta:
+            filtros_resumen.append(ResumenVentaDiario.fecha <= hasta)
+            filtros_venta.append(Venta.fecha_creacion < datetime.combine(hasta + timedelta(days=1), datetime.min.time()))
+        if sucursal_id:
+            filtros_resumen.append(ResumenVentaDiario.sucursal_id == sucursal_id)
+            filtros_venta.append(Venta.sucursal_id == sucursal_id)
+
+        db.execute(delete(ResumenVentaDiario).where(*filtros_resumen))
+
+        dia = func.date(Venta.fecha_creacion)
+        costo_item = ItemVenta.cantidad * func.coalesce(ItemVenta.costo_unitario, 0.0)
+
+        # Totales a nivel ticket (Venta.total incluye impuestos y descuentos)
+        tickets = db.query(
+            Venta.sucursal_id,
+            dia.label("fecha"),
+            func.sum(Venta.total).label("ingresos"),
+            func.count(Venta.id).label("tickets")
+        ).filter(*filtros_venta).group_by(Venta.sucursal_id, dia).all()
+
+        # Unidades y costo por receta desde el snapshot de items_venta
+        # (items sin receta se agrupan con receta_id NULL)
+        lineas = db.query(
+            Venta.sucursal_id,
+            dia.label("fecha"),
+            ItemVenta.receta_id,
+            func.max(ItemVenta.nombre_item).label("nombre_item"),
+            func.sum(ItemVenta.total).label("ingresos"),
+            func.sum(ItemVenta.cantidad).label("unidades"),
+            func.sum(costo_item).label("costo"),
+            func.count(func.distinct(Venta.id)).label("tickets")
+        ).join(
+            ItemVenta, ItemVenta.venta_id == Venta.id
+        ).filter(*filtros_venta).group_by(Venta.sucursal_id, dia, ItemVenta.receta_id).all()
+
+        totales: Dict[tuple, dict] = {}
+        for row in tickets:
+            clave = (row.sucursal_id, _como_fecha(row.fecha))
+            totales[clave] = {
+                "receta_id": RESUMEN_TOTAL_DIA,
+                "nombre_item": None,
+                "ingresos": row.ingresos or 0.0,
+                "unidades": 0,
+                "costo": 0.0,
+                "tickets": row.tickets,
+            }
+
+        filas: List[dict] = []
+        for row in lineas:
+            clave = (row.sucursal_id, _como_fecha(row.fecha))
+            total = totales[clave]
+            total["unidades"] += row.unidades or 0
+            total["costo"] += row.costo or 0.0
+            if row.receta_id is None:
+                continue
+            filas.append({
+                "sucursal_id": clave[0],
+                "fecha": clave[1],
+                "receta_id": row.receta_id,
+                "nombre_item": row.nombre_item,
+                "ingresos": row.ingresos or 0.0,
+                "unidades": row.unidades or 0,
+                "costo": row.costo or 0.0,
+                "tickets": row.tickets,
+            })
+        for (sucursal, fecha), total in totales.items():
+            filas.append({"sucursal_id": sucursal, "fecha": fecha, **total})
+
+        ahora = datetime.utcnow()
+        for fila in filas:
+            fila.update(id=str(uuid.uuid4()), updated_at=ahora)
+        if filas:
+            db.execute(insert(ResumenVentaDiario), filas)
+        return len(filas)
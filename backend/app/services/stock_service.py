@@ -0,0 +1,323 @@
+"""
+Stock Service - Descuento de inventario basado en conjuntos
+
+Todo cambio de stock pasa por registrar_movimientos: el libro
+(movimientos_inventario) es la fuente de verdad e items_inventario.cantidad su
+proyección, mantenida en la misma transacción. Ver KardexService para snapshots,
+stock a una fecha y conciliación.
+"""
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, insert, update
+from sqlalchemy.orm import Session
+
+from app.core.cache_recetas import Bom, cache_recetas
+from app.models.item_inventario import ItemInventario
+from app.models.movimiento_inventario import MovimientoInventario
+
+# Sentido de cada tipo de movimiento; en AJUSTE la cantidad ya viene con signo
+TIPOS_ENTRADA = ("ENTRADA", "COMPRA", "DEVOLUCION")
+TIPOS_SALIDA = ("SALIDA", "VENTA", "MERMA", "ROBO", "CADUCIDAD")
+
+
+class StockInsuficienteError(Exception):
+    """Se lanza cuando un item no tiene stock suficiente y no se permite stock negativo"""
+
+    def __init__(self, nombre: str, disponible: float, necesario: float):
+        self.nombre = nombre
+        self.disponible = disponible
+        self.necesario = necesario
+        super().__init__(
+            f"Stock insuficiente para '{nombre}'. Disponible: {disponible}, Necesario: {necesario}"
+        )
+
+
+class StockService:
+    """
+    Descuento de inventario para ventas con un número fijo de consultas,
+    sin importar cuántas líneas tenga el ticket.
+    """
+
+    @staticmethod
+    def calcular_consumo(
+        db: Session,
+        lineas: Iterable[Tuple[Optional[str], float]]
+    ) -> Dict[str, float]:
+        """
+        Suma la cantidad requerida por item_inventario_id para todas las líneas.
+
+        Args:
+            lineas: pares (receta_id, cantidad vendida)
+
+        Returns:
+            {item_inventario_id: cantidad total a descontar}
+        """
+        unidades_por_receta: Dict[str, float] = defaultdict(float)
+        for receta_id, cantidad in lineas:
+            if receta_id:
+                unidades_por_receta[receta_id] += cantidad
+
+        if not unidades_por_receta:
+            return {}
+
+        ingredientes = StockService.ingredientes_por_receta(db, unidades_por_receta)
+        consumo: Dict[str, float] = defaultdict(float)
+        for receta_id, unidades in unidades_por_receta.items():
+            for item_inventario_id, cantidad, factor in ingredientes.get(receta_id, ()):
+                consumo[item_inventario_id] += cantidad * factor * unidades
+        return dict(consumo)
+
+    @staticmethod
+    def ingredientes_por_receta(
+        db: Session,
+        receta_ids: Iterable[str]
+    ) -> Dict[str, Bom]:
+        """
+        Ingredientes de inventario de las recetas, desde la caché de BOM del proceso
+        (solo las recetas que no están en memoria se leen, en una consulta).
+
+        Returns:
+            {receta_id: ((item_inventario_id, cantidad por unidad vendida, factor), ...)}
+        """
+        return cache_recetas.bom(db, receta_ids)
+
+    @staticmethod
+    def bloquear_stock(db: Session, item_ids: Iterable[str]) -> Dict[str, Tuple[str, str, float]]:
+        """
+        Stock de varios items (de cualquier sucursal) bloqueado hasta el commit,
+        en orden por id igual que validar_stock.
+
+        Returns:
+            {item_id: (sucursal_id, nombre, cantidad)}
+        """
+        ids = list(item_ids)
+        if not ids:
+            return {}
+        items = db.query(
+            ItemInventario.id,
+            ItemInventario.sucursal_id,
+            ItemInventario.nombre,
+            ItemInventario.cantidad
+        ).filter(
+            ItemInventario.id.in_(ids)
+        ).order_by(
+            ItemInventario.id
+        ).with_for_update(of=ItemInventario).all()
+        return {item.id: (item.sucursal_id, item.nombre, item.cantidad) for item in items}
+
+    @staticmethod
+    def validar_stock(
+        db: Session,
+        sucursal_id: str,
+        consumo: Dict[str, float],
+        permitir_stock_negativo: bool = True
+    ) -> Dict[str, float]:
+        """
+        Carga el stock de todos los items en una consulta y valida el consumo.
+
+        Los items que no pertenecen a la sucursal se ignoran, igual que antes.
+
+        Returns:
+            El consumo filtrado a los items existentes en la sucursal.
+
+        Raises:
+            StockInsuficienteError: si algún item quedaría negativo y no está permitido.
+        """
+        if not consumo:
+            return {}
+
+        # Bloquear filas en orden determinista (por id) para que dos ventas
+        # concurrentes nunca se esperen mutuamente en orden inverso (deadlock)
+        items = db.query(
+            ItemInventario.id,
+            ItemInventario.nombre,
+            ItemInventario.cantidad
+        ).filter(
+            ItemInventario.id.in_(list(consumo)),
+            ItemInventario.sucursal_id == sucursal_id
+        ).order_by(
+            ItemInventario.id
+        ).with_for_update(of=ItemInventario).all()
+
+        if not permitir_stock_negativo:
+            for item in items:
+                necesario = consumo[item.id]
+                if item.cantidad - necesario < 0:
+                    raise StockInsuficienteError(item.nombre, item.cantidad, necesario)
+
+        return {item.id: consumo[item.id] for item in items}
+
+    @staticmethod
+    def delta_por_tipo(tipo_movimiento: str, cantidad: float) -> float:
+        """Variación firmada de un movimiento según su tipo (0 si el tipo no mueve stock)"""
+        if tipo_movimiento in TIPOS_ENTRADA:
+            return cantidad
+        if tipo_movimiento in TIPOS_SALIDA:
+            return -cantidad
+        if tipo_movimiento == "AJUSTE":
+            return cantidad
+        return 0.0
+
+    @staticmethod
+    def aplicar_descuento(
+        db: Session,
+        consumo: Dict[str, float],
+        permitir_stock_negativo: bool = True,
+        movimiento: Optional[dict] = None
+    ) -> None:
+        """
+        Aplica todos los descuentos con un único UPDATE ... CASE y los registra
+        en el libro de movimientos (ver registrar_movimientos).
+
+        El descuento se calcula en la base de datos (cantidad = cantidad - n), así
+        que dos ventas simultáneas nunca pisan el valor leído por la otra. Si no se
+        permite stock negativo, la condición se repite en el WHERE: cualquier fila
+        que no se actualice indica que otra transacción consumió el stock primero.
+
+        Args:
+            movimiento: campos comunes de los movimientos (tipo_movimiento,
+                referencia_id, tipo_referencia, usuario_id, notas). Por defecto SALIDA.
+
+        Raises:
+            StockInsuficienteError: si alguna fila no pudo descontarse.
+        """
+        StockService.registrar_movimientos(
+            db,
+            [
+                {"tipo_movimiento": "SALIDA", **(movimiento or {}),
+                 "item_inventario_id": item_id, "delta": -cantidad}
+                for item_id, cantidad in consumo.items()
+            ],
+            permitir_stock_negativo
+        )
+
+    @staticmethod
+    def ajustar_stock(
+        db: Session,
+        item_inventario_id: str,
+        delta: float,
+        movimiento: Optional[dict] = None
+    ) -> None:
+        """Suma delta (positivo o negativo) a la cantidad sin leerla primero; por defecto un AJUSTE"""
+        StockService.registrar_movimientos(db, [
+            {"tipo_movimiento": "AJUSTE", **(movimiento or {}),
+             "item_inventario_id": item_inventario_id, "delta": delta}
+        ])
+
+    @staticmethod
+    def registrar_movimientos(
+        db: Session,
+        movimientos: List[dict],
+        permitir_stock_negativo: bool = True
+    ) -> List[dict]:
+        """
+        Único punto de escritura del stock: cada cambio queda como una fila de
+        movimientos_inventario y items_inventario.cantidad es su proyección.
+
+        Los deltas se agregan por item y se aplican con un UPDATE ... RETURNING;
+        luego se insertan todas las filas del libro en un solo INSERT, con el delta
+        firmado en la unidad del item y el saldo resultante. fecha_creacion es siempre
+        el momento del registro (los snapshots cortan por esa fecha).
+
+        Args:
+            movimientos: dicts con item_inventario_id, delta y tipo_movimiento; opcionales
+                id, cantidad y unidad (por defecto |delta| en la unidad del item),
+                costo_unitario, referencia_id, tipo_referencia, notas y usuario_id.
+                Los items inexistentes se ignoran.
+
+        Returns:
+            Las filas insertadas.
+
+        Raises:
+            StockInsuficienteError: si alguna fila no pudo descontarse.
+        """
+        deltas: Dict[str, float] = defaultdict(float)
+        for movimiento in movimientos:
+            deltas[movimiento["item_inventario_id"]] += movimiento["delta"]
+        if not deltas:
+            return []
+
+        actualizados = StockService._actualizar_cantidades(db, deltas, permitir_stock_negativo)
+        if len(actualizados) < len(deltas) and not permitir_stock_negativo:
+            StockService._reportar_faltante(db, deltas)
+
+        # Saldo después de cada movimiento: se parte del final y se retrocede
+        saldos = {item_id: cantidad for item_id, (_, _, cantidad) in actualizados.items()}
+        saldo_movimiento: List[Optional[float]] = [None] * len(movimientos)
+        for posicion in range(len(movimientos) - 1, -1, -1):
+            item_id = movimientos[posicion]["item_inventario_id"]
+            if item_id in saldos:
+                saldo_movimiento[posicion] = saldos[item_id]
+                saldos[item_id] -= movimientos[posicion]["delta"]
+
+        ahora = datetime.utcnow()
+        filas = [
+            {
+                "id": movimiento.get("id") or str(uuid.uuid4()),
+                "item_inventario_id": movimiento["item_inventario_id"],
+                "sucursal_id": actualizados[movimiento["item_inventario_id"]][0],
+                "tipo_movimiento": movimiento["tipo_movimiento"],
+                "cantidad": movimiento.get("cantidad", abs(movimiento["delta"])),
+                "unidad": movimiento.get("unidad") or actualizados[movimiento["item_inventario_id"]][1],
+                "delta": movimiento["delta"],
+                "saldo": saldo,
+                "costo_unitario": movimiento.get("costo_unitario"),
+                "referencia_id": movimiento.get("referencia_id"),
+                "tipo_referencia": movimiento.get("tipo_referencia"),
+                "notas": movimiento.get("notas"),
+                "usuario_id": movimiento.get("usuario_id"),
+                "fecha_creacion": ahora,
+            }
+            for movimiento, saldo in zip(movimientos, saldo_movimiento)
+            if saldo is not None
+        ]
+        if filas:
+            db.execute(insert(MovimientoInventario), filas)
+        return filas
+
+    @staticmethod
+    def _reportar_faltante(db: Session, deltas: Dict[str, float]) -> None:
+        """Reporta el item más comprometido con el stock ya visible para esta transacción"""
+        items = db.query(
+            ItemInventario.id,
+            ItemInventario.nombre,
+            ItemInventario.cantidad
+        ).filter(
+            ItemInventario.id.in_(list(deltas))
+        ).all()
+        item = min(items, key=lambda i: i.cantidad + deltas[i.id])
+        raise StockInsuficienteError(item.nombre, item.cantidad, -deltas[item.id])
+
+    @staticmethod
+    def _actualizar_cantidades(
+        db: Session,
+        deltas: Dict[str, float],
+        permitir_stock_negativo: bool = True
+    ) -> Dict[str, Tuple[str, str, float]]:
+        """
+        UPDATE atómico cantidad = cantidad + delta.
+
+        Returns:
+            {item_id: (sucursal_id, unidad, cantidad nueva)} de las filas afectadas.
+        """
+        delta = case(deltas, value=ItemInventario.id, else_=0.0)
+        stmt = update(ItemInventario).where(
+            ItemInventario.id.in_(list(deltas))
+        ).values(
+            cantidad=ItemInventario.cantidad + delta,
+            ultima_actualizacion=datetime.utcnow()
+        ).returning(
+            ItemInventario.id,
+            ItemInventario.sucursal_id,
+            ItemInventario.unidad,
+            ItemInventario.cantidad
+        )
+        if not permitir_stock_negativo:
+            stmt = stmt.where(ItemInventario.cantidad + delta >= 0)
+
+        # Los items no se cargan en la sesión, no hay nada que sincronizar
+        result = db.execute(stmt.execution_options(synchronize_session=False))
+        return {fila.id: (fila.sucursal_id, fila.unidad, fila.cantidad) for fila in result}
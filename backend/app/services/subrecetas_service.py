@@ -0,0 +1,114 @@
+"""
+Subrecetas Service - Grafo de recetas compuestas (salsas, marinados, masas)
+
+Las recetas y sus componentes forman un grafo dirigido sin ciclos: se valida al
+guardar, antes del commit. El grafo completo se lee en una consulta (son pocas filas)
+y se recorre en memoria.
+
+La explosión a insumos para descontar stock vive en app/core/cache_recetas.py y el
+costo acumulado en CostosRecetasService; aquí solo el grafo.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.models.receta import Receta, ComponenteReceta
+
+
+class CicloRecetasError(Exception):
+    """Se lanza cuando una receta terminaría usándose a sí misma"""
+
+    def __init__(self, nombres: List[str]):
+        self.nombres = nombres
+        super().__init__(f"Las subrecetas forman un ciclo: {' → '.join(nombres)}")
+
+
+class SubrecetasService:
+    """Validación y recorridos del grafo receta -> subrecetas"""
+
+    @staticmethod
+    def grafo(db: Session) -> Dict[str, Set[str]]:
+        """{receta_id: {subreceta_id, ...}} de todas las recetas, en una consulta"""
+        grafo: Dict[str, Set[str]] = defaultdict(set)
+        for receta_id, subreceta_id in db.query(ComponenteReceta.receta_id, ComponenteReceta.subreceta_id):
+            grafo[receta_id].add(subreceta_id)
+        return grafo
+
+    @staticmethod
+    def validar_componentes(db: Session, receta_id: str, subreceta_ids: Iterable[str]) -> None:
+        """
+        Verifica que la receta pueda usar esas subrecetas (reemplazando las que tenía).
+
+        Raises:
+            CicloRecetasError: si alguna subreceta es la propia receta o la usa, directa
+                o indirectamente.
+        """
+        grafo = SubrecetasService.grafo(db)
+        grafo[receta_id] = set(subreceta_ids)
+        camino = SubrecetasService._buscar_ciclo(grafo, receta_id)
+        if camino:
+            nombres = dict(db.query(Receta.id, Receta.nombre).filter(Receta.id.in_(set(camino))))
+            raise CicloRecetasError([nombres.get(nodo, nodo) for nodo in camino])
+
+    @staticmethod
+    def _buscar_ciclo(grafo: Dict[str, Set[str]], origen: str) -> Optional[List[str]]:
+        """Camino origen -> ... -> origen si existe (DFS iterativo, sin recursión)"""
+        pila = [(origen, iter(sorted(grafo.get(origen, ()))))]
+        camino = [origen]
+        visitados = {origen}
+        while pila:
+            _, hijos = pila[-1]
+            hijo = next(hijos, None)
+            if hijo is None:
+                pila.pop()
+                camino.pop()
+                continue
+            if hijo == origen:
+                return camino + [origen]
+            if hijo not in visitados:
+                visitados.add(hijo)
+                camino.append(hijo)
+                pila.append((hijo, iter(sorted(grafo.get(hijo, ())))))
+        return None
+
+    @staticmethod
+    def niveles_hacia_arriba(db: Session, receta_ids: Iterable[str]) -> List[Set[str]]:
+        """
+        Las recetas dadas más todas las que las usan (directa o indirectamente),
+        agrupadas en niveles: cada receta aparece después de todas sus subrecetas
+        afectadas, así que recalcular nivel por nivel ve siempre costos ya actualizados.
+        """
+        ids = set(receta_ids)
+        if not ids:
+            return []
+        usado_en: Dict[str, Set[str]] = defaultdict(set)
+        for receta_id, subrecetas in SubrecetasService.grafo(db).items():
+            for subreceta_id in subrecetas:
+                usado_en[subreceta_id].add(receta_id)
+
+        afectadas = set(ids)
+        pendientes = list(ids)
+        while pendientes:
+            for padre in usado_en.get(pendientes.pop(), ()):
+                if padre not in afectadas:
+                    afectadas.add(padre)
+                    pendientes.append(padre)
+
+        # Orden topológico por niveles (Kahn) dentro del subgrafo afectado
+        hijos_pendientes = {receta_id: 0 for receta_id in afectadas}
+        for hijo in afectadas:
+            for padre in usado_en.get(hijo, ()):
+                hijos_pendientes[padre] += 1
+        niveles: List[Set[str]] = []
+        nivel = {receta_id for receta_id, n in hijos_pendientes.items() if n == 0}
+        while nivel:
+            niveles.append(nivel)
+            siguiente = set()
+            for hijo in nivel:
+                for padre in usado_en.get(hijo, ()):
+                    hijos_pendientes[padre] -= 1
+                    if hijos_pendientes[padre] == 0:
+                        siguiente.add(padre)
+            nivel = siguiente
+        return niveles
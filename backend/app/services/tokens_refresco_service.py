@@ -0,0 +1,145 @@
+"""
+Tokens Refresco Service - Emisión, rotación y revocación de refresh tokens
+
+El login (bcrypt) se hace una vez por turno: emite un refresh token que dura
+REFRESH_TOKEN_EXPIRE_HORAS y con el que el POS obtiene access tokens nuevos en
+/login/refresh, sin volver a pedir la contraseña.
+"""
+import hmac
+import uuid
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from typing import Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.revocacion_tokens import revocacion_tokens
+from app.models.token_refresco import TokenRefresco
+from app.models.usuario import Usuario
+
+
+class TokenRefrescoInvalidoError(Exception):
+    """Token inexistente, expirado, revocado o reutilizado"""
+    pass
+
+
+def _hash(secreto: str) -> str:
+    # El secreto es aleatorio (256 bits): SHA-256 basta, no hace falta un hash lento
+    return hashlib.sha256(secreto.encode("utf-8")).hexdigest()
+
+
+def _nuevo_token(db: Session, usuario_id: str, familia_id: str, expira_en: datetime) -> str:
+    secreto = secrets.token_urlsafe(32)
+    token = TokenRefresco(
+        id=str(uuid.uuid4()),
+        usuario_id=usuario_id,
+        familia_id=familia_id,
+        token_hash=_hash(secreto),
+        expira_en=expira_en
+    )
+    db.add(token)
+    return f"{token.id}.{secreto}"
+
+
+class TokensRefrescoService:
+    """Sesiones de larga duración con refresh tokens rotativos"""
+
+    @staticmethod
+    def emitir(db: Session, usuario_id: str) -> Tuple[str, str]:
+        """Nueva familia al iniciar sesión; retorna (refresh_token, familia_id)"""
+        ahora = datetime.utcnow()
+        # De paso, limpiar las sesiones expiradas del usuario
+        db.query(TokenRefresco).filter(
+            TokenRefresco.usuario_id == usuario_id,
+            TokenRefresco.expira_en < ahora
+        ).delete(synchronize_session=False)
+        familia_id = str(uuid.uuid4())
+        token = _nuevo_token(
+            db, usuario_id, familia_id, ahora + timedelta(hours=settings.REFRESH_TOKEN_EXPIRE_HORAS)
+        )
+        db.commit()
+        return token, familia_id
+
+    @staticmethod
+    def rotar(db: Session, token: str) -> Tuple[str, str, str]:
+        """
+        Consume el refresh token y emite el siguiente de la familia.
+        Retorna (refresh_token, usuario_id, familia_id).
+        """
+        token_id, _, secreto = token.partition(".")
+        fila = db.query(TokenRefresco).filter(TokenRefresco.id == token_id).first()
+        if fila is None or not hmac.compare_digest(fila.token_hash, _hash(secreto)):
+            raise TokenRefrescoInvalidoError("Refresh token inválido")
+        ahora = datetime.utcnow()
+        if fila.revocado_en is not None or fila.expira_en <= ahora:
+            raise TokenRefrescoInvalidoError("Refresh token expirado o revocado")
+
+        # Marcar como usado de forma atómica: de dos peticiones con el mismo token solo una gana
+        usado = db.execute(
+            update(TokenRefresco).where(
+                TokenRefresco.id == fila.id,
+                TokenRefresco.usado_en.is_(None),
+                TokenRefresco.revocado_en.is_(None)
+            ).values(usado_en=ahora)
+        ).rowcount
+        if not usado:
+            # Un token ya rotado se presentó otra vez: puede haberlo copiado un tercero
+            db.rollback()
+            TokensRefrescoService.revocar_familia(db, fila.familia_id)
+            raise TokenRefrescoInvalidoError("Refresh token reutilizado: sesión revocada")
+
+        activo = db.query(Usuario.activo).filter(Usuario.id == fila.usuario_id).scalar()
+        if not activo:
+            db.rollback()
+            raise TokenRefrescoInvalidoError("Usuario inactivo")
+
+        nuevo = _nuevo_token(db, fila.usuario_id, fila.familia_id, fila.expira_en)
+        db.commit()
+        return nuevo, fila.usuario_id, fila.familia_id
+
+    @staticmethod
+    def revocar_familia(db: Session, familia_id: str) -> None:
+        """Cierra la sesión: refresh tokens de la familia y sus access tokens vigentes"""
+        db.execute(
+            update(TokenRefresco).where(
+                TokenRefresco.familia_id == familia_id,
+                TokenRefresco.revocado_en.is_(None)
+            ).values(revocado_en=datetime.utcnow())
+        )
+        db.commit()
+        revocacion_tokens.registrar([familia_id])
+
+    @staticmethod
+    def revocar_token(db: Session, token: str) -> None:
+        """Logout: revoca la familia del token si es válido (si no, no hay nada que cerrar)"""
+        token_id, _, secreto = token.partition(".")
+        fila = db.query(TokenRefresco.familia_id, TokenRefresco.token_hash).filter(
+            TokenRefresco.id == token_id
+        ).first()
+        if fila is not None and hmac.compare_digest(fila.token_hash, _hash(secreto)):
+            TokensRefrescoService.revocar_familia(db, fila.familia_id)
+
+    @staticmethod
+    def revocar_usuario(db: Session, usuario_id: str) -> None:
+        """Todas las sesiones abiertas del usuario (cambio de contraseña, desactivación)"""
+        ahora = datetime.utcnow()
+        familias = [
+            familia_id for (familia_id,) in db.query(TokenRefresco.familia_id).filter(
+                TokenRefresco.usuario_id == usuario_id,
+                TokenRefresco.revocado_en.is_(None),
+                TokenRefresco.expira_en > ahora
+            ).distinct()
+        ]
+        if not familias:
+            return
+        db.execute(
+            update(TokenRefresco).where(
+                TokenRefresco.usuario_id == usuario_id,
+                TokenRefresco.revocado_en.is_(None)
+            ).values(revocado_en=ahora)
+        )
+        db.commit()
+        revocacion_tokens.registrar(familias)
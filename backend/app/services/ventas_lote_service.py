@@ -0,0 +1,229 @@
+"""
+Ventas Lote Service - Registro masivo de ventas (sincronización del POS sin conexión)
+
+Cuando se cae la red, el POS guarda las ventas y luego las envía todas juntas a
+POST /ventas/batch. En lugar de repetir por venta las consultas de crear_venta
+(caja, sucursal, configuración, ingredientes, stock, costos) se hacen una vez para
+el lote completo, las filas se insertan con un INSERT por tabla y el inventario se
+descuenta con un único UPDATE agregado (más un INSERT con los movimientos del libro).
+"""
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.venta import Venta, ItemVenta
+from app.models.sucursal import Sucursal
+from app.models.caja import CajaSesion
+from app.models.configuracion import Configuracion
+from app.schemas.venta import VentaLoteItem
+from app.services.stock_service import StockService, StockInsuficienteError
+from app.services.resumen_ventas_service import ResumenVentasService
+from app.services.numeracion_ventas_service import NumeracionVentasService, FORMATO_NUMERO_VENTA
+
+VENTA_CREADA = "CREADA"
+VENTA_DUPLICADA = "DUPLICADA"
+VENTA_RECHAZADA = "RECHAZADA"
+
+# Tamaño de los IN (...) al buscar claves ya registradas
+TAMANO_BLOQUE_CLAVES = 500
+
+
+def _fecha_venta(venta: VentaLoteItem, ahora: datetime) -> datetime:
+    """Hora informada por el POS en UTC sin zona (como el resto de columnas), nunca futura"""
+    fecha = venta.fecha_creacion
+    if fecha is None:
+        return ahora
+    if fecha.tzinfo is not None:
+        fecha = fecha.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(fecha, ahora)
+
+
+def _resultado(venta: VentaLoteItem, estado: str, venta_id: Optional[str] = None,
+               numero_venta: Optional[str] = None, detalle: Optional[str] = None) -> dict:
+    return {
+        "clave_idempotencia": venta.clave_idempotencia,
+        "estado": estado,
+        "venta_id": venta_id,
+        "numero_venta": numero_venta,
+        "detalle": detalle,
+    }
+
+
+class VentasLoteService:
+    """Registro de muchas ventas con un número fijo de consultas"""
+
+    @staticmethod
+    def ventas_existentes(db: Session, claves: List[str]) -> Dict[str, tuple]:
+        """{clave_idempotencia: (venta_id, numero_venta)} de las claves ya registradas"""
+        existentes: Dict[str, tuple] = {}
+        for inicio in range(0, len(claves), TAMANO_BLOQUE_CLAVES):
+            bloque = claves[inicio:inicio + TAMANO_BLOQUE_CLAVES]
+            for clave, venta_id, numero_venta in db.query(
+                Venta.clave_idempotencia, Venta.id, Venta.numero_venta
+            ).filter(Venta.clave_idempotencia.in_(bloque)):
+                existentes[clave] = (venta_id, numero_venta)
+        return existentes
+
+    @staticmethod
+    def registrar(db: Session, usuario_id: str, ventas: List[VentaLoteItem]) -> List[dict]:
+        """
+        Valida y registra las ventas en orden, en una sola transacción.
+
+        Cada venta se resuelve por separado: CREADA, DUPLICADA (clave ya registrada,
+        se retorna la venta existente) o RECHAZADA (sin caja abierta, sucursal
+        inexistente o stock insuficiente). Una venta rechazada no afecta a las demás.
+        El stock se asigna en el orden del lote, como si se hubieran enviado una a una.
+
+        Returns:
+            Un resultado por venta, en el mismo orden.
+        """
+        ahora = datetime.utcnow()
+        resultados: List[Optional[dict]] = [None] * len(ventas)
+
+        existentes = VentasLoteService.ventas_existentes(
+            db, list({venta.clave_idempotencia for venta in ventas})
+        )
+        sucursal_ids = list({venta.sucursal_id for venta in ventas})
+        sucursales = {
+            sucursal_id for (sucursal_id,) in
+            db.query(Sucursal.id).filter(Sucursal.id.in_(sucursal_ids))
+        }
+        cajas_abiertas = {
+            sucursal_id for (sucursal_id,) in db.query(CajaSesion.sucursal_id).filter(
+                CajaSesion.usuario_id == usuario_id,
+                CajaSesion.sucursal_id.in_(sucursal_ids),
+                CajaSesion.estado == "ABIERTA"
+            )
+        }
+        config = db.query(Configuracion.permitir_stock_negativo).first()
+        permitir_stock_negativo = config.permitir_stock_negativo if config else True
+
+        receta_ids = {item.receta_id for venta in ventas for item in venta.items if item.receta_id}
+        ingredientes = StockService.ingredientes_por_receta(db, receta_ids)
+        costos = ResumenVentasService.snapshot_costos(db, receta_ids)
+        stock = StockService.bloquear_stock(
+            db, {item_id for lista in ingredientes.values() for item_id, _, _ in lista}
+        )
+        disponible = {item_id: cantidad for item_id, (_, _, cantidad) in stock.items()}
+
+        movimientos: List[dict] = []
+        filas_ventas: List[dict] = []
+        filas_items: List[dict] = []
+        registradas: List[tuple] = []
+        en_lote: Dict[str, int] = {}
+        creadas_por_sucursal: Dict[str, List[int]] = defaultdict(list)
+
+        for indice, venta in enumerate(ventas):
+            clave = venta.clave_idempotencia
+            if clave in existentes:
+                venta_id, numero_venta = existentes[clave]
+                resultados[indice] = _resultado(venta, VENTA_DUPLICADA, venta_id, numero_venta)
+                continue
+            if clave in en_lote:
+                # Repetida dentro del mismo lote: se resuelve con el resultado de la primera
+                continue
+            en_lote[clave] = indice
+
+            if venta.sucursal_id not in sucursales:
+                resultados[indice] = _resultado(venta, VENTA_RECHAZADA, detalle="Sucursal no encontrada")
+                continue
+            if venta.sucursal_id not in cajas_abiertas:
+                resultados[indice] = _resultado(
+                    venta, VENTA_RECHAZADA, detalle="No tienes una caja abierta en esta sucursal."
+                )
+                continue
+
+            # Consumo de la venta, limitado a los items de su sucursal (igual que validar_stock)
+            consumo: Dict[str, float] = defaultdict(float)
+            for item in venta.items:
+                for item_id, cantidad, factor in ingredientes.get(item.receta_id, ()):
+                    if item_id in stock and stock[item_id][0] == venta.sucursal_id:
+                        consumo[item_id] += cantidad * factor * item.cantidad
+            if not permitir_stock_negativo:
+                try:
+                    for item_id, necesario in consumo.items():
+                        if disponible[item_id] - necesario < 0:
+                            raise StockInsuficienteError(stock[item_id][1], disponible[item_id], necesario)
+                except StockInsuficienteError as e:
+                    resultados[indice] = _resultado(venta, VENTA_RECHAZADA, detalle=str(e))
+                    continue
+            venta_id = str(uuid.uuid4())
+            for item_id, necesario in consumo.items():
+                disponible[item_id] -= necesario
+                movimientos.append({
+                    "item_inventario_id": item_id,
+                    "delta": -necesario,
+                    "tipo_movimiento": "VENTA",
+                    "referencia_id": venta_id,
+                    "tipo_referencia": "venta",
+                    "usuario_id": usuario_id,
+                })
+
+            fila_venta = {
+                "id": venta_id,
+                "numero_venta": None,  # Se asigna al final, un rango por sucursal
+                "sucursal_id": venta.sucursal_id,
+                "numero_mesa": venta.numero_mesa,
+                "mesero_id": usuario_id,
+                "tipo_venta": venta.tipo_venta,
+                "servicio_delivery": venta.servicio_delivery,
+                "nombre_cliente": venta.nombre_cliente,
+                "telefono_cliente": venta.telefono_cliente,
+                "subtotal": venta.subtotal,
+                "monto_descuento": venta.monto_descuento,
+                "impuesto": venta.impuesto,
+                "total": venta.total,
+                "metodo_pago": venta.metodo_pago,
+                "notas": venta.notas,
+                "estado": venta.estado,
+                "fecha_creacion": _fecha_venta(venta, ahora),
+                "clave_idempotencia": clave,
+            }
+            items = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "venta_id": fila_venta["id"],
+                    "receta_id": item.receta_id,
+                    "nombre_item": item.nombre_item,
+                    "cantidad": item.cantidad,
+                    "precio_unitario": item.precio_unitario,
+                    "total": item.total,
+                    "costo_unitario": costos.get(item.receta_id, (None, None))[0],
+                    "receta_version": costos.get(item.receta_id, (None, None))[1],
+                }
+                for item in venta.items
+            ]
+            filas_ventas.append(fila_venta)
+            filas_items.extend(items)
+            registradas.append((fila_venta, items))
+            resultados[indice] = _resultado(venta, VENTA_CREADA, fila_venta["id"])
+            creadas_por_sucursal[venta.sucursal_id].append(indice)
+
+        # Números correlativos por sucursal en el orden del lote (una consulta por sucursal)
+        filas_por_id = {fila["id"]: fila for fila in filas_ventas}
+        for sucursal_id, indices in creadas_por_sucursal.items():
+            numeros = NumeracionVentasService.siguientes(db, sucursal_id, len(indices))
+            for indice, numero in zip(indices, numeros):
+                resultado = resultados[indice]
+                resultado["numero_venta"] = FORMATO_NUMERO_VENTA.format(numero)
+                filas_por_id[resultado["venta_id"]]["numero_venta"] = resultado["numero_venta"]
+
+        if filas_ventas:
+            db.execute(insert(Venta), filas_ventas)
+            if filas_items:
+                db.execute(insert(ItemVenta), filas_items)
+            # Las filas ya están bloqueadas y validadas: el UPDATE agregado no puede fallar.
+            # El libro guarda un movimiento por venta e item.
+            StockService.registrar_movimientos(db, movimientos, permitir_stock_negativo)
+            ResumenVentasService.registrar_lote(db, registradas)
+
+        for indice, venta in enumerate(ventas):
+            if resultados[indice] is None:
+                primera = resultados[en_lote[venta.clave_idempotencia]]
+                estado = VENTA_DUPLICADA if primera["estado"] == VENTA_CREADA else primera["estado"]
+                resultados[indice] = {**primera, "estado": estado}
+        return resultados
@@ -0,0 +1,41 @@
+"""
+Reconstruye la tabla resumen_ventas_diario a partir de ventas/items_venta.
+
+Uso:
+    python scripts/backfill_resumen_ventas.py                      # todo el histórico
+    python scripts/backfill_resumen_ventas.py --desde 2025-01-01   # desde una fecha
+    python scripts/backfill_resumen_ventas.py --desde 2025-01-01 --hasta 2025-01-31 --sucursal <id>
+"""
+import sys
+import os
+import argparse
+from datetime import date
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.models import *
+from app.services.resumen_ventas_service import ResumenVentasService
+
+def backfill(desde=None, hasta=None, sucursal_id=None):
+    print("📊 Reconstruyendo resumen diario de ventas...")
+    db = SessionLocal()
+    try:
+        filas = ResumenVentasService.reconstruir(db, desde=desde, hasta=hasta, sucursal_id=sucursal_id)
+        db.commit()
+        print(f"✅ {filas} filas de resumen generadas.")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error reconstruyendo resumen: {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstruir resumen_ventas_diario")
+    parser.add_argument("--desde", type=date.fromisoformat, help="Fecha inicial (YYYY-MM-DD), incluida")
+    parser.add_argument("--hasta", type=date.fromisoformat, help="Fecha final (YYYY-MM-DD), incluida")
+    parser.add_argument("--sucursal", dest="sucursal_id", help="Limitar a una sucursal")
+    args = parser.parse_args()
+    backfill(args.desde, args.hasta, args.sucursal_id)
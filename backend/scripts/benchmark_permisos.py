@@ -0,0 +1,88 @@
+"""
+Microbenchmark del costo de verificar un permiso.
+
+Compara, para un usuario con varios roles:
+- Usuario.permisos: recorre roles → rol → permisos_rol → permiso (relaciones ya cargadas)
+  y arma un set en cada llamada.
+- Set de nombres de UsuarioActual (claims del token).
+- Máscara de bits: PermisosCompilados.mascara(roles) & bit(permiso).
+- permite() completo, incluida la comprobación de versión de los roles.
+
+Uso:
+    python scripts/benchmark_permisos.py
+    python scripts/benchmark_permisos.py --permisos 120 --roles 5 --iteraciones 500000
+"""
+import sys
+import os
+import uuid
+import timeit
+import argparse
+import tempfile
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import *
+from app.core.cache_usuarios import cargar_usuario_actual
+from app.core.permisos import PermisosCompilados
+
+def seed(db, n_permisos: int, n_roles: int) -> str:
+    permisos = [
+        Permiso(id=str(uuid.uuid4()), nombre=f"recurso{i}.accion", recurso=f"recurso{i}", accion="accion")
+        for i in range(n_permisos)
+    ]
+    db.add_all(permisos)
+    usuario = Usuario(id=str(uuid.uuid4()), email="bench@example.com", nombre_usuario="bench",
+                      contrasena_hash="x", activo=True)
+    db.add(usuario)
+    por_rol = n_permisos // n_roles
+    for r in range(n_roles):
+        rol = Rol(id=str(uuid.uuid4()), nombre=f"rol{r}")
+        db.add(rol)
+        db.add(UsuarioRol(id=str(uuid.uuid4()), usuario_id=usuario.id, rol_id=rol.id))
+        for permiso in permisos[r * por_rol:(r + 1) * por_rol]:
+            db.add(PermisoRol(id=str(uuid.uuid4()), rol_id=rol.id, permiso_id=permiso.id))
+    db.commit()
+    return usuario.id
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo de verificar un permiso")
+    parser.add_argument("--permisos", type=int, default=60)
+    parser.add_argument("--roles", type=int, default=3)
+    parser.add_argument("--iteraciones", type=int, default=200_000)
+    args = parser.parse_args()
+
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'permisos.db')}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    usuario_id = seed(db, args.permisos, args.roles)
+
+    usuario = db.query(Usuario).filter(Usuario.id == usuario_id).one()
+    usuario.permisos  # Cargar las relaciones: se mide solo el recorrido
+    actual = cargar_usuario_actual(db, usuario_id)
+    compilados = PermisosCompilados()
+    compilados.compilar(db)
+
+    # El último permiso del último rol: el peor caso para el recorrido
+    permiso = f"recurso{(args.permisos // args.roles) * args.roles - 1}.accion"
+    assert permiso in usuario.permisos and compilados.permite(db, actual.roles, permiso)
+
+    casos = [
+        ("Usuario.permisos (ORM)", lambda: permiso in usuario.permisos),
+        ("set de claims", lambda: permiso in actual.permisos),
+        ("máscara & bit", lambda: compilados.mascara(actual.roles) & compilados.bit(permiso)),
+        ("permite() con versión", lambda: compilados.permite(db, actual.roles, permiso)),
+    ]
+    print(f"⏱️  {args.permisos} permisos, {args.roles} roles, {args.iteraciones:,} verificaciones:")
+    for nombre, funcion in casos:
+        iteraciones = args.iteraciones if "ORM" not in nombre else max(args.iteraciones // 20, 1)
+        segundos = min(timeit.repeat(funcion, number=iteraciones, repeat=3))
+        print(f"   {nombre:<26} {segundos / iteraciones * 1e9:>10.0f} ns/verificación")
+    db.close()
+
+if __name__ == "__main__":
+    main()
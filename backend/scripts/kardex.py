@@ -0,0 +1,73 @@
+"""
+Mantenimiento del libro de stock (movimientos_inventario + snapshots_inventario).
+
+Uso:
+    python scripts/kardex.py snapshot                      # corte de todos los items (cron, p. ej. cada noche)
+    python scripts/kardex.py conciliar                     # reporta diferencias entre stock y libro
+    python scripts/kardex.py conciliar --corregir          # y reescribe el stock desde el libro
+    python scripts/kardex.py conciliar --sucursal <id>
+"""
+import sys
+import os
+import argparse
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.core.cache import cache
+from app.models import *
+from app.services.kardex_service import KardexService
+
+def snapshot(sucursal_id=None):
+    print("📒 Tomando snapshots de stock...")
+    db = SessionLocal()
+    try:
+        creados = KardexService.tomar_snapshots(db, sucursal_id=sucursal_id)
+        db.commit()
+        print(f"✅ {creados} snapshots creados.")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error tomando snapshots: {e}")
+        raise
+    finally:
+        db.close()
+
+def conciliar(sucursal_id=None, corregir=False):
+    print("🔎 Conciliando stock con el libro de movimientos...")
+    db = SessionLocal()
+    try:
+        reporte = KardexService.conciliar(db, sucursal_id=sucursal_id, corregir=corregir)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error conciliando: {e}")
+        raise
+    finally:
+        db.close()
+
+    for fila in reporte["diferencias"]:
+        print(f"  ⚠️  {fila['nombre']} ({fila['item_inventario_id']}): stock {fila['cantidad']}, "
+              f"libro {fila['libro']}, diferencia {fila['diferencia']:+}")
+    if reporte["sin_libro"]:
+        accion = "libro abierto con su stock actual" if corregir else "sin movimientos ni snapshots"
+        print(f"  ℹ️  {len(reporte['sin_libro'])} items {accion}.")
+    print(f"✅ {reporte['items']} items revisados, {len(reporte['diferencias'])} con diferencias"
+          f"{' (corregidas)' if corregir and reporte['diferencias'] else ''}.")
+    if corregir and (reporte["diferencias"] or reporte["sin_libro"]):
+        cache.invalidar("inventario")
+    return reporte
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Libro de stock: snapshots y conciliación")
+    parser.add_argument("accion", choices=["snapshot", "conciliar"])
+    parser.add_argument("--sucursal", dest="sucursal_id", help="Limitar a una sucursal")
+    parser.add_argument("--corregir", action="store_true",
+                        help="Reescribir items_inventario.cantidad desde el libro (solo conciliar)")
+    args = parser.parse_args()
+    if args.accion == "snapshot":
+        snapshot(args.sucursal_id)
+    else:
+        reporte = conciliar(args.sucursal_id, args.corregir)
+        # Código de salida distinto de cero si hay diferencias sin corregir (para alertas del cron)
+        sys.exit(1 if reporte["diferencias"] and not args.corregir else 0)
@@ -0,0 +1,139 @@
+"""
+Prueba de carga del login y del hash de contraseñas con bcrypt.
+
+Igual que load_test_async.py: la app en proceso, N peticiones con C concurrentes y
+una sonda contra /health. Un cambio de turno son decenas de logins casi simultáneos.
+
+- Login anterior (endpoint síncrono): bcrypt en los hilos de anyio, sin límite propio,
+  reteniendo la conexión a la base mientras calcula.
+- Login actual: bcrypt en el pool de hashing (HASH_MAX_HILOS), conexión liberada.
+- Hash en línea dentro de async def (como crear_usuario antes) frente al pool.
+
+Uso:
+    python scripts/load_test_login.py
+    python scripts/load_test_login.py --peticiones 200 --concurrencia 50 --rounds 12
+"""
+import sys
+import os
+import uuid
+import asyncio
+import argparse
+import tempfile
+import threading
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import Depends, Form, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from passlib.hash import bcrypt
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.main import app
+from app.core import security
+from app.core.config import settings
+from app.core.database import Base, get_db
+from app.models import *
+from load_test_async import carga, imprimir
+
+RUTA_LOGIN = f"{settings.API_V1_PREFIX}/login/access-token"
+
+class ConexionesEnUso:
+    """Máximo de conexiones del pool en uso a la vez"""
+
+    def __init__(self, engine):
+        self.actuales = 0
+        self.maximo = 0
+        self._lock = threading.Lock()
+        event.listen(engine, "checkout", self._checkout)
+        event.listen(engine, "checkin", self._checkin)
+
+    def _checkout(self, *args):
+        with self._lock:
+            self.actuales += 1
+            self.maximo = max(self.maximo, self.actuales)
+
+    def _checkin(self, *args):
+        with self._lock:
+            self.actuales -= 1
+
+    def reiniciar(self):
+        with self._lock:
+            self.maximo = self.actuales
+
+def registrar_rutas_anteriores():
+    # Login anterior: endpoint síncrono con bcrypt en línea
+    def login_anterior(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+        usuario = db.query(Usuario).filter(Usuario.email == form_data.username).first()
+        if not usuario or not security.verify_password(form_data.password, usuario.contrasena_hash):
+            raise HTTPException(status_code=400, detail="Incorrect email or password")
+        return {"access_token": security.create_access_token(usuario.id), "token_type": "bearer"}
+
+    # crear_usuario anterior: hash en línea dentro de async def
+    async def hash_en_linea(password: str = Form(...)):
+        return {"hash": security.get_password_hash(password)}
+
+    async def hash_en_pool(password: str = Form(...)):
+        return {"hash": await security.get_password_hash_async(password)}
+
+    app.add_api_route("/anterior/login", login_anterior, methods=["POST"])
+    app.add_api_route("/anterior/hash", hash_en_linea, methods=["POST"])
+    app.add_api_route("/pool/hash", hash_en_pool, methods=["POST"])
+
+async def ejecutar(args, conexiones: ConexionesEnUso):
+    registrar_rutas_anteriores()
+    login = {"username": "carga@example.com", "password": "secreto"}
+    hash_ = {"password": "secreto"}
+
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://loadtest") as cliente:
+        print(f"⏱️  {args.peticiones} peticiones, {args.concurrencia} concurrentes, "
+              f"bcrypt {args.rounds} rounds, {settings.HASH_MAX_HILOS} hilos de hashing:")
+        for nombre, ruta, formulario in [
+            ("Login anterior (def, bcrypt en hilos de anyio)", "/anterior/login", login),
+            ("Login actual (pool de hashing)", RUTA_LOGIN, login),
+        ]:
+            conexiones.reiniciar()
+            imprimir(nombre, *await carga(cliente, ruta, args.peticiones, args.concurrencia, formulario), etiqueta="login")
+            print(f"      conexiones en uso (máx.) {conexiones.maximo}")
+        for nombre, ruta in [
+            ("Hash en línea en async def (crear_usuario anterior)", "/anterior/hash"),
+            ("Hash en el pool de hashing", "/pool/hash"),
+        ]:
+            imprimir(nombre, *await carga(cliente, ruta, args.peticiones, args.concurrencia, hash_), etiqueta="hash")
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del login")
+    parser.add_argument("--peticiones", type=int, default=100)
+    parser.add_argument("--concurrencia", type=int, default=25)
+    parser.add_argument("--rounds", type=int, default=settings.BCRYPT_ROUNDS)
+    args = parser.parse_args()
+
+    # Pool holgado: se mide cuántas conexiones retiene cada variante, no el timeout
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'login.db')}",
+                           pool_size=args.concurrencia, max_overflow=0)
+    Base.metadata.create_all(bind=engine)
+    SessionPrueba = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = SessionPrueba()
+    # Hash con el costo configurado para no medir el rehash del primer login
+    db.add(Usuario(id=str(uuid.uuid4()), email="carga@example.com", nombre_usuario="carga",
+                   contrasena_hash=bcrypt.using(rounds=args.rounds).hash("secreto"), activo=True))
+    db.commit()
+    db.close()
+    security.pwd_context.update(bcrypt__rounds=args.rounds)
+    conexiones = ConexionesEnUso(engine)
+
+    def db_prueba():
+        sesion = SessionPrueba()
+        try:
+            yield sesion
+        finally:
+            sesion.close()
+    app.dependency_overrides[get_db] = db_prueba
+
+    asyncio.run(ejecutar(args, conexiones))
+
+if __name__ == "__main__":
+    main()
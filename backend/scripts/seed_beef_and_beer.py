@@ -11,6 +11,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.core.database import SessionLocal, engine, Base
 from app.models import *
+from app.services.resumen_ventas_service import ResumenVentasService
 from sqlalchemy import text
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -467,7 +468,9 @@ def seed_data():
                     nombre_item=plato.nombre,
                     cantidad=cantidad,
                     precio_unitario=precio,
-                    total=subtotal_item
+                    total=subtotal_item,
+                    costo_unitario=plato.costo / plato.porciones if plato.porciones else plato.costo,
+                    receta_version=plato.version_actual
                 )
                 db.add(item_venta)
             
@@ -486,6 +489,13 @@ def seed_data():
                 print(f"   ... {ventas_count} ventas procesadas")
         
         db.commit()
+        
+        # 9. Resumen diario para reportes y dashboard
+        print("9️⃣  Calculando resumen diario de ventas...")
+        filas_resumen = ResumenVentasService.reconstruir(db)
+        db.commit()
+        print(f"   ✅ {filas_resumen} filas de resumen generadas.")
+        
         print(f"✅ Seed completado! {ventas_count} ventas generadas.")
         print(f"💰 Ingresos aproximados generados: Bs. {total_ingresos:,.2f}")
         
@@ -0,0 +1,151 @@
+import uuid
+import bcrypt as libbcrypt
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from jose import jwt
+from passlib.hash import bcrypt
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user
+from app.core import security
+from app.core.cache_usuarios import cache_usuarios
+from app.core.config import settings
+from app.models.usuario import Usuario
+from app.models.rol import Rol, Permiso, PermisoRol, UsuarioRol
+
+
+def test_permisos_en_token_y_revalidacion_al_cambiar_rol(client: TestClient, db: Session):
+    sufijo = uuid.uuid4().hex[:8]
+    usuario = Usuario(
+        id=str(uuid.uuid4()),
+        email=f"cajero_{sufijo}@example.com",
+        nombre_usuario=f"cajero_{sufijo}",
+        contrasena_hash=security.get_password_hash("secreto"),
+        activo=True
+    )
+    rol = Rol(id=str(uuid.uuid4()), nombre=f"cajero_{sufijo}")
+    permiso = Permiso(id=str(uuid.uuid4()), nombre=f"ventas.crear.{sufijo}", recurso="ventas", accion="crear")
+    db.add_all([usuario, rol, permiso])
+    db.add(PermisoRol(id=str(uuid.uuid4()), rol_id=rol.id, permiso_id=permiso.id))
+    db.add(UsuarioRol(id=str(uuid.uuid4()), usuario_id=usuario.id, rol_id=rol.id))
+    db.commit()
+
+    response = client.post(
+        f"{settings.API_V1_PREFIX}/login/access-token",
+        data={"username": usuario.email, "password": "secreto"}
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[security.ALGORITHM])
+    assert claims["permisos"] == [permiso.nombre]
+
+    # Camino caliente: sin sesión de base de datos
+    actual = get_current_user(db=None, token=token)
+    assert actual.id == usuario.id
+    assert actual.tiene_permiso(permiso.nombre)
+    # Con el backend en memoria los claims solo se confían durante el TTL desde la emisión
+    viejo = {**claims, "iat": claims["iat"] - settings.AUTH_CACHE_TTL_SEGUNDOS - 1}
+    assert cache_usuarios.desde_claims(viejo) is None
+
+    # Quitar los permisos del rol invalida los claims del token ya emitido
+    response = client.put(f"{settings.API_V1_PREFIX}/roles/{rol.id}", json={"permisos": []})
+    assert response.status_code == 200
+    actual = get_current_user(db=db, token=token)
+    assert not actual.tiene_permiso(permiso.nombre)
+
+    # Desactivar al usuario cierra además su sesión: el token se rechaza
+    response = client.put(f"{settings.API_V1_PREFIX}/usuarios/{usuario.id}", json={"activo": False})
+    assert response.status_code == 200
+    with pytest.raises(HTTPException):
+        get_current_user(db=db, token=token)
+
+
+def test_login_actualiza_hash_con_otro_costo(client: TestClient, db: Session):
+    sufijo = uuid.uuid4().hex[:8]
+    usuario = Usuario(
+        id=str(uuid.uuid4()),
+        email=f"rehash_{sufijo}@example.com",
+        nombre_usuario=f"rehash_{sufijo}",
+        contrasena_hash=bcrypt.using(rounds=4).hash("secreto"),
+        activo=True
+    )
+    db.add(usuario)
+    db.commit()
+
+    response = client.post(
+        f"{settings.API_V1_PREFIX}/login/access-token",
+        data={"username": usuario.email, "password": "secreto"}
+    )
+    assert response.status_code == 200
+    db.refresh(usuario)
+    assert bcrypt.from_string(usuario.contrasena_hash).rounds == settings.BCRYPT_ROUNDS
+    assert security.verify_password("secreto", usuario.contrasena_hash)
+
+
+def test_contrasena_larga_multibyte_verifica_hash_previo():
+    # Hash como lo generaba usuarios.py antes: los 72 primeros bytes, aunque corten la "ñ"
+    contrasena = "a" * 71 + "ñandú"
+    hash_previo = libbcrypt.hashpw(contrasena.encode("utf-8")[:72], libbcrypt.gensalt(4)).decode()
+    assert security.verify_password(contrasena, hash_previo)
+    assert not security.verify_password("a" * 71, hash_previo)
+    assert security.verify_password(contrasena, security.get_password_hash(contrasena))
+
+
+def test_refresh_token_rota_y_reutilizacion_revoca_la_sesion(client: TestClient, db: Session):
+    sufijo = uuid.uuid4().hex[:8]
+    usuario = Usuario(
+        id=str(uuid.uuid4()),
+        email=f"turno_{sufijo}@example.com",
+        nombre_usuario=f"turno_{sufijo}",
+        contrasena_hash=security.get_password_hash("secreto"),
+        activo=True
+    )
+    db.add(usuario)
+    db.commit()
+
+    login = client.post(
+        f"{settings.API_V1_PREFIX}/login/access-token",
+        data={"username": usuario.email, "password": "secreto"}
+    ).json()
+    refresh_inicial = login["refresh_token"]
+
+    response = client.post(f"{settings.API_V1_PREFIX}/login/refresh", json={"refresh_token": refresh_inicial})
+    assert response.status_code == 200
+    renovado = response.json()
+    assert renovado["refresh_token"] != refresh_inicial
+    assert get_current_user(db=db, token=renovado["access_token"]).id == usuario.id
+
+    # Presentar otra vez el token ya rotado revoca toda la sesión
+    response = client.post(f"{settings.API_V1_PREFIX}/login/refresh", json={"refresh_token": refresh_inicial})
+    assert response.status_code == 401
+    response = client.post(f"{settings.API_V1_PREFIX}/login/refresh", json={"refresh_token": renovado["refresh_token"]})
+    assert response.status_code == 401
+    with pytest.raises(HTTPException) as error:
+        get_current_user(db=db, token=renovado["access_token"])
+    assert error.value.status_code == 403
+
+
+def test_eliminar_usuario_revoca_sus_sesiones(client: TestClient, db: Session):
+    sufijo = uuid.uuid4().hex[:8]
+    usuario = Usuario(
+        id=str(uuid.uuid4()),
+        email=f"baja_{sufijo}@example.com",
+        nombre_usuario=f"baja_{sufijo}",
+        contrasena_hash=security.get_password_hash("secreto"),
+        activo=True
+    )
+    db.add(usuario)
+    db.commit()
+
+    login = client.post(
+        f"{settings.API_V1_PREFIX}/login/access-token",
+        data={"username": usuario.email, "password": "secreto"}
+    ).json()
+    assert get_current_user(db=db, token=login["access_token"]).id == usuario.id
+
+    response = client.delete(f"{settings.API_V1_PREFIX}/usuarios/{usuario.id}")
+    assert response.status_code == 204
+    with pytest.raises(HTTPException) as error:
+        get_current_user(db=db, token=login["access_token"])
+    assert error.value.status_code == 403
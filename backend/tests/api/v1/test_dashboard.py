@@ -0,0 +1,51 @@
+import uuid
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.item_inventario import ItemInventario
+from app.models.venta import Venta, ItemVenta
+
+
+def test_dashboard_cuenta_todos_los_criticos_y_muestra_cuatro(client: TestClient, db: Session):
+    sucursal_id = str(uuid.uuid4())
+    db.add_all([
+        ItemInventario(
+            id=str(uuid.uuid4()),
+            nombre=f"Insumo {i}",
+            categoria="General",
+            cantidad=1.0 if i < 6 else 50.0,
+            unidad="kg",
+            stock_minimo=5.0,
+            costo_unitario=1.0,
+            sucursal_id=sucursal_id
+        )
+        for i in range(8)
+    ])
+    db.commit()
+
+    response = client.get(f"{settings.API_V1_PREFIX}/dashboard/stats", params={"sucursal_id": sucursal_id})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["estadisticas"]["items_criticos_count"] == 6
+    assert len([a for a in data["alertas"] if a["tipo"] == "warning"]) == 4
+    assert len(data["ventas_por_dia"]) == 7
+
+
+def test_platos_top_incluye_items_sin_receta(client: TestClient, db: Session):
+    sucursal_id = str(uuid.uuid4())
+    venta = Venta(id=str(uuid.uuid4()), numero_venta=f"T-{uuid.uuid4().hex[:10]}", sucursal_id=sucursal_id,
+                  subtotal=30.0, total=30.0, fecha_creacion=datetime.utcnow())
+    db.add(venta)
+    db.add_all([
+        ItemVenta(id=str(uuid.uuid4()), venta_id=venta.id, receta_id=None, nombre_item="Agua",
+                  cantidad=3, precio_unitario=5.0, total=15.0),
+        ItemVenta(id=str(uuid.uuid4()), venta_id=venta.id, receta_id=str(uuid.uuid4()), nombre_item="Lomo",
+                  cantidad=1, precio_unitario=15.0, total=15.0),
+    ])
+    db.commit()
+
+    response = client.get(f"{settings.API_V1_PREFIX}/dashboard/stats", params={"sucursal_id": sucursal_id})
+    assert response.status_code == 200
+    assert [(p["nombre"], p["cantidad_vendida"]) for p in response.json()["platos_top"]] == [("Agua", 3), ("Lomo", 1)]
@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.venta import Venta, ItemVenta
+from app.services import exportacion_service
+
+
+def test_exportar_items_venta_en_streaming(client: TestClient, db: Session, monkeypatch):
+    monkeypatch.setattr(exportacion_service, "FILAS_POR_BLOQUE", 4)
+    sucursal_id = str(uuid.uuid4())
+    inicio = datetime(2026, 2, 1, 10, 0)
+    for n in range(5):
+        venta = Venta(
+            id=str(uuid.uuid4()),
+            numero_venta=f"EXP-{uuid.uuid4().hex[:8]}",
+            sucursal_id=sucursal_id,
+            subtotal=30.0,
+            total=30.0,
+            fecha_creacion=inicio + timedelta(days=n)
+        )
+        db.add(venta)
+        db.add_all([
+            ItemVenta(
+                id=str(uuid.uuid4()),
+                venta_id=venta.id,
+                nombre_item=f"Item {i}",
+                cantidad=1,
+                precio_unitario=10.0,
+                total=10.0,
+                costo_unitario=4.0
+            )
+            for i in range(3)
+        ])
+    db.commit()
+
+    url = f"{settings.API_V1_PREFIX}/reports/export/items_venta"
+    params = {"sucursal_id": sucursal_id, "hasta": (inicio + timedelta(days=4)).isoformat()}
+
+    response = client.get(url, params={**params, "formato": "csv"})
+    assert response.status_code == 200
+    filas = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(filas) == 12
+    assert filas[0]["costo_unitario"] == "4.0"
+
+    response = client.get(url, params={**params, "formato": "ndjson"})
+    lineas = [json.loads(linea) for linea in response.text.splitlines()]
+    assert len(lineas) == 12
+    assert lineas[0]["fecha_creacion"] == inicio.isoformat()
+
+    response = client.get(url, params={**params, "formato": "columnar"})
+    bloques = [json.loads(linea) for linea in response.text.splitlines()]
+    assert [b["filas"] for b in bloques] == [4, 4, 4]
+    assert sum(bloques[0]["datos"]["total"]) == 40.0
+
+
+def test_exportar_reporte_csv(client: TestClient):
+    response = client.get(f"{settings.API_V1_PREFIX}/reports/export", params={"format": "csv"})
+    assert response.status_code == 200
+    assert "RESUMEN" in response.text
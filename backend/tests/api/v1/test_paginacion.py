@@ -0,0 +1,84 @@
+import uuid
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.movimiento_inventario import MovimientoInventario
+from app.models.sucursal import Sucursal
+from app.models.item_inventario import ItemInventario
+from app.services.stock_service import StockService
+
+
+def test_movimientos_paginados_por_cursor(client: TestClient, db: Session):
+    sucursal_id = str(uuid.uuid4())
+    base = datetime(2026, 3, 1, 12, 0)
+    # Dos movimientos por instante para probar el desempate por id
+    movimientos = [
+        MovimientoInventario(
+            id=str(uuid.uuid4()),
+            item_inventario_id=str(uuid.uuid4()),
+            sucursal_id=sucursal_id,
+            tipo_movimiento="MERMA" if i % 3 == 0 else "ENTRADA",
+            cantidad=1.0,
+            unidad="kg",
+            fecha_creacion=base + timedelta(minutes=i // 2)
+        )
+        for i in range(7)
+    ]
+    db.add_all(movimientos)
+    db.commit()
+    esperados = [m.id for m in sorted(movimientos, key=lambda m: (m.fecha_creacion, m.id), reverse=True)]
+
+    url = f"{settings.API_V1_PREFIX}/movimientos-inventario/"
+    vistos, cursor = [], None
+    while True:
+        params = {"sucursal_id": sucursal_id, "limite": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        vistos += [m["id"] for m in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert vistos == esperados
+
+    response = client.get(url, params={"sucursal_id": sucursal_id, "tipo_movimiento": "MERMA"})
+    assert len(response.json()) == 3
+    assert "X-Next-Cursor" not in response.headers
+
+    assert client.get(url, params={"cursor": "no-es-un-cursor"}).status_code == 400
+
+
+def test_inventario_paginado_no_salta_items_actualizados(client: TestClient, db: Session):
+    sucursal = Sucursal(id=str(uuid.uuid4()), nombre="Sucursal Páginas", direccion="Av. Test",
+                        restaurante_id=str(uuid.uuid4()))
+    db.add(sucursal)
+    items = [
+        ItemInventario(id=str(uuid.uuid4()), nombre=f"Insumo {i // 2}", categoria="Otros", cantidad=10.0,
+                       unidad="kg", stock_minimo=0, costo_unitario=1.0, sucursal_id=sucursal.id)
+        for i in range(7)
+    ]
+    db.add_all(items)
+    db.commit()
+    esperados = [item.id for item in sorted(items, key=lambda item: (item.nombre, item.id))]
+
+    url = f"{settings.API_V1_PREFIX}/inventario/"
+    vistos, cursor = [], None
+    while True:
+        params = {"sucursal_id": sucursal.id, "limite": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        vistos += [item["id"] for item in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        # Entre páginas se vende un item ya listado y otro que falta: ni se repite ni se salta
+        pendiente = next(item_id for item_id in reversed(esperados) if item_id not in vistos)
+        StockService.ajustar_stock(db, vistos[0], -1.0)
+        StockService.ajustar_stock(db, pendiente, -1.0)
+        db.commit()
+    assert vistos == esperados
@@ -0,0 +1,96 @@
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core import security
+from app.core.config import settings
+from app.core.permisos import permisos_compilados
+from app.models.usuario import Usuario
+from app.models.rol import Permiso, UsuarioRol
+from tests.conftest import crear_usuario_test
+
+
+def test_require_permission_por_router(client: TestClient, db: Session, normal_user_token_headers: str):
+    cajero = {"Authorization": f"Bearer {normal_user_token_headers}"}
+
+    assert client.get(f"{settings.API_V1_PREFIX}/reports/margins", headers={"Authorization": ""}).status_code == 401
+    assert client.get(f"{settings.API_V1_PREFIX}/reports/margins", headers=cajero).status_code == 403
+    # Métricas internas de health: solo administradores; el health básico es público
+    for ruta in ("/health/pool", "/health/replica", "/health/cache"):
+        assert client.get(f"{settings.API_V1_PREFIX}{ruta}", headers={"Authorization": ""}).status_code == 401
+        assert client.get(f"{settings.API_V1_PREFIX}{ruta}", headers=cajero).status_code == 403
+    assert client.get(f"{settings.API_V1_PREFIX}/health/", headers={"Authorization": ""}).status_code == 200
+    # Catálogo: el POS lo lee, pero solo quien tiene gestionar_recetas lo modifica
+    assert client.get(f"{settings.API_V1_PREFIX}/recetas/", headers=cajero).status_code == 200
+    assert client.post(f"{settings.API_V1_PREFIX}/recetas/", headers=cajero, json={}).status_code == 403
+
+    # Agregar ver_reportes al rol del cajero recompila las máscaras
+    usuario = db.query(Usuario).filter(Usuario.email == "test_user@example.com").one()
+    rol_id = db.query(UsuarioRol.rol_id).filter(UsuarioRol.usuario_id == usuario.id).scalar()
+    ids = [p.id for p in db.query(Permiso).filter(Permiso.nombre == "gestionar_ventas")]
+    reportes = Permiso(id=str(uuid.uuid4()), nombre="ver_reportes", recurso="reportes", accion="read")
+    db.add(reportes)
+    db.commit()
+    response = client.put(f"{settings.API_V1_PREFIX}/roles/{rol_id}", json={"permisos": ids + [reportes.id]})
+    assert response.status_code == 200
+
+    assert client.get(f"{settings.API_V1_PREFIX}/reports/margins", headers=cajero).status_code == 200
+
+
+# Roles de scripts/seed_beef_and_beer.py
+PERMISOS_SEED = [
+    "ver_dashboard", "gestionar_usuarios", "gestionar_inventario", "ver_reportes", "gestionar_ventas",
+    "gestionar_configuracion", "gestionar_sucursales", "gestionar_proveedores", "gestionar_roles",
+    "gestionar_promociones", "gestionar_recetas", "gestionar_compras",
+]
+ROLES_SEED = {
+    "Administrador": PERMISOS_SEED,
+    "Gerente": [p for p in PERMISOS_SEED if p != "gestionar_configuracion"],
+    "Chef Parrillero": ["gestionar_inventario", "gestionar_recetas", "gestionar_compras"],
+    "Bartender": ["gestionar_inventario"],
+    "Mesero": ["gestionar_ventas"],
+    "Cajero": ["gestionar_ventas", "ver_reportes"],
+}
+
+# Páginas de frontend/src/App.tsx: permiso de su ProtectedRoute y lo que cargan o envían
+PAGINAS = {
+    "/dashboard": (None, [("get", "/dashboard/stats")]),
+    "/inventory": ("gestionar_inventario", [
+        ("get", "/inventario/"), ("get", "/proveedores/"), ("get", "/sucursales/"),
+        ("get", "/movimientos-inventario/"), ("post", "/inventario/"), ("post", "/movimientos-inventario/"),
+    ]),
+    "/recipes": ("gestionar_recetas", [
+        ("get", "/recetas/"), ("get", "/inventario/"), ("get", "/sucursales/"), ("post", "/recetas/"),
+    ]),
+    "/sales": ("gestionar_ventas", [
+        ("get", "/ventas/"), ("get", "/recetas/"), ("get", "/promociones/"), ("get", "/sucursales/"),
+        ("post", "/ventas/"),
+    ]),
+    "/reports": ("ver_reportes", [("get", "/reports/margins")]),
+    "/suppliers": ("gestionar_proveedores", [("get", "/proveedores/"), ("post", "/proveedores/")]),
+    "/promotions": ("gestionar_promociones", [("get", "/promociones/"), ("post", "/promociones/")]),
+    "/purchase-orders": ("gestionar_compras", [
+        ("get", "/ordenes-compra/"), ("get", "/proveedores/"), ("get", "/inventario/"),
+        ("get", "/sucursales/"), ("post", "/ordenes-compra/"),
+    ]),
+}
+
+
+@pytest.mark.parametrize("rol", ROLES_SEED)
+def test_roles_seed_pueden_usar_sus_paginas(client: TestClient, db: Session, rol: str):
+    permisos = ROLES_SEED[rol]
+    usuario = crear_usuario_test(db, f"seed_{rol.split()[0].lower()}@example.com", permisos=permisos)
+    # Roles cargados directo en la base, como el seed antes de arrancar el servidor
+    permisos_compilados.invalidar()
+    headers = {"Authorization": f"Bearer {security.create_access_token(usuario.id)}"}
+
+    # El chatbot se muestra en todas las páginas (cuerpo vacío: 422 si el permiso pasa)
+    llamadas = [("post", "/chatbot/chat")]
+    for permiso, endpoints in PAGINAS.values():
+        if permiso is None or permiso in permisos:
+            llamadas.extend(endpoints)
+    for metodo, ruta in llamadas:
+        kwargs = {"json": {}} if metodo == "post" else {}
+        response = getattr(client, metodo)(f"{settings.API_V1_PREFIX}{ruta}", headers=headers, **kwargs)
+        assert response.status_code not in (401, 403), f"{rol}: {metodo.upper()} {ruta} -> {response.status_code}"
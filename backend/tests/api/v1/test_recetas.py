@@ -0,0 +1,112 @@
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.sucursal import Sucursal
+from app.models.receta import Receta
+from app.models.item_inventario import ItemInventario
+from app.services.stock_service import StockService
+
+
+def crear_item(db: Session, sucursal_id: str, nombre: str, costo_unitario: float) -> ItemInventario:
+    item = ItemInventario(
+        id=str(uuid.uuid4()),
+        nombre=nombre,
+        categoria="Otros",
+        cantidad=100.0,
+        unidad="kg",
+        stock_minimo=0,
+        costo_unitario=costo_unitario,
+        sucursal_id=sucursal_id
+    )
+    db.add(item)
+    return item
+
+
+def test_subrecetas_explotan_costo_y_stock(client: TestClient, db: Session):
+    sucursal = Sucursal(id=str(uuid.uuid4()), nombre="Sucursal Subrecetas", direccion="Av. Test",
+                        restaurante_id=str(uuid.uuid4()))
+    db.add(sucursal)
+    tomate = crear_item(db, sucursal.id, "Tomate", 8.0)
+    carne = crear_item(db, sucursal.id, "Carne", 10.0)
+    db.commit()
+
+    def crear(nombre: str, porciones: int, ingredientes, componentes=()) -> dict:
+        response = client.post(f"{settings.API_V1_PREFIX}/recetas/", json={
+            "nombre": nombre, "categoria": "Plato Principal", "precio": 20.0, "porciones": porciones,
+            "sucursal_id": sucursal.id,
+            "costo": sum(costo for _, _, costo in ingredientes),
+            "ingredientes": [
+                {"item_inventario_id": item.id, "nombre_ingrediente": item.nombre, "cantidad": cantidad,
+                 "unidad": "kg", "costo": costo}
+                for item, cantidad, costo in ingredientes
+            ],
+            "componentes": [{"subreceta_id": r_id, "cantidad": cantidad} for r_id, cantidad in componentes],
+        })
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    # Salsa para 4 porciones; el plato usa 1 porción de salsa y 0.2 kg de carne
+    salsa = crear("Salsa", 4, [(tomate, 1.0, 8.0)])
+    plato = crear("Pique", 1, [(carne, 0.2, 2.0)], [(salsa["id"], 1)])
+    assert plato["costo"] == pytest.approx(2.0 + 8.0 / 4)
+    assert plato["margen"] == pytest.approx((20.0 - 4.0) / 20.0 * 100)
+
+    consumo = StockService.calcular_consumo(db, [(plato["id"], 2)])
+    assert consumo == {carne.id: pytest.approx(0.4), tomate.id: pytest.approx(0.5)}
+
+    # Usar el plato dentro de la salsa cerraría un ciclo
+    response = client.put(f"{settings.API_V1_PREFIX}/recetas/{salsa['id']}",
+                          json={"componentes": [{"subreceta_id": plato["id"], "cantidad": 1}]})
+    assert response.status_code == 400
+    assert "ciclo" in response.json()["detail"]
+
+    # Subir el tomate recalcula la salsa y, encima, el plato
+    response = client.put(f"{settings.API_V1_PREFIX}/inventario/{tomate.id}", json={"costo_unitario": 12.0})
+    assert response.status_code == 200
+    db.expire_all()
+    assert db.get(Receta, salsa["id"]).costo == pytest.approx(12.0)
+    assert db.get(Receta, plato["id"]).costo == pytest.approx(2.0 + 12.0 / 4)
+
+    response = client.delete(f"{settings.API_V1_PREFIX}/recetas/{salsa['id']}")
+    assert response.status_code == 400
+
+
+def test_disponibilidad_por_receta_sigue_al_stock(client: TestClient, db: Session):
+    sucursal = Sucursal(id=str(uuid.uuid4()), nombre="Sucursal Menú", direccion="Av. Test",
+                        restaurante_id=str(uuid.uuid4()))
+    db.add(sucursal)
+    carne = crear_item(db, sucursal.id, "Carne", 10.0)
+    carne.cantidad = 1.0
+    db.commit()
+
+    def receta(nombre: str, ingredientes) -> str:
+        response = client.post(f"{settings.API_V1_PREFIX}/recetas/", json={
+            "nombre": nombre, "categoria": "Plato Principal", "precio": 20.0, "sucursal_id": sucursal.id,
+            "ingredientes": [
+                {"item_inventario_id": carne.id, "nombre_ingrediente": "Carne", "cantidad": cantidad,
+                 "unidad": "kg", "costo": 1.0}
+                for cantidad in ingredientes
+            ],
+        })
+        assert response.status_code == 200, response.text
+        return response.json()["id"]
+
+    lomo = receta("Lomo", [0.3])
+    limonada = receta("Limonada", [])
+
+    def disponibilidad() -> dict:
+        response = client.get(f"{settings.API_V1_PREFIX}/recetas/disponibilidad",
+                              params={"sucursal_id": sucursal.id})
+        assert response.status_code == 200
+        return {fila["receta_id"]: fila for fila in response.json()}
+
+    menu = disponibilidad()
+    assert menu[lomo]["porciones_disponibles"] == 3
+    assert menu[limonada]["porciones_disponibles"] is None and menu[limonada]["disponible"]
+
+    client.put(f"{settings.API_V1_PREFIX}/inventario/{carne.id}", json={"cantidad": 0.2})
+    menu = disponibilidad()
+    assert menu[lomo]["porciones_disponibles"] == 0 and not menu[lomo]["disponible"]
@@ -0,0 +1,275 @@
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.usuario import Usuario
+from app.models.sucursal import Sucursal
+from app.models.venta import Venta
+from app.models.caja import CajaSesion
+from app.models.receta import Receta, IngredienteReceta
+from app.models.item_inventario import ItemInventario
+from app.services.stock_service import StockService
+
+
+def crear_item(db: Session, sucursal_id: str, nombre: str, cantidad: float) -> ItemInventario:
+    item = ItemInventario(
+        id=str(uuid.uuid4()),
+        nombre=nombre,
+        categoria="Carnes",
+        cantidad=cantidad,
+        unidad="kg",
+        stock_minimo=0,
+        costo_unitario=10.0,
+        sucursal_id=sucursal_id
+    )
+    db.add(item)
+    return item
+
+
+def crear_receta(db: Session, sucursal_id: str, ingredientes) -> Receta:
+    receta = Receta(
+        id=str(uuid.uuid4()),
+        nombre=f"Receta {uuid.uuid4().hex[:6]}",
+        categoria="Plato Principal",
+        precio=50.0,
+        costo=20.0,
+        porciones=1,
+        sucursal_id=sucursal_id
+    )
+    db.add(receta)
+    for item, cantidad in ingredientes:
+        db.add(IngredienteReceta(
+            id=str(uuid.uuid4()),
+            receta_id=receta.id,
+            item_inventario_id=item.id,
+            nombre_ingrediente=item.nombre,
+            cantidad=cantidad,
+            unidad=item.unidad,
+            costo=1.0
+        ))
+    return receta
+
+
+@pytest.fixture(scope="module")
+def sucursal(db: Session) -> Sucursal:
+    sucursal = Sucursal(
+        id=str(uuid.uuid4()),
+        nombre="Sucursal Test",
+        direccion="Av. Test",
+        restaurante_id=str(uuid.uuid4())
+    )
+    db.add(sucursal)
+    db.commit()
+    return sucursal
+
+
+@pytest.fixture(scope="module")
+def auth_headers(db: Session, normal_user_token_headers: str, sucursal: Sucursal) -> dict:
+    usuario = db.query(Usuario).filter(Usuario.email == "test_user@example.com").first()
+    db.add(CajaSesion(
+        id=str(uuid.uuid4()),
+        sucursal_id=sucursal.id,
+        usuario_id=usuario.id,
+        monto_inicial=0.0,
+        estado="ABIERTA"
+    ))
+    db.commit()
+    return {"Authorization": f"Bearer {normal_user_token_headers}"}
+
+
+def test_crear_venta_descuenta_inventario_agregado(
+    client: TestClient, db: Session, sucursal: Sucursal, auth_headers: dict
+):
+    carne = crear_item(db, sucursal.id, "Carne", 10.0)
+    papa = crear_item(db, sucursal.id, "Papa", 5.0)
+    lomo = crear_receta(db, sucursal.id, [(carne, 0.3), (papa, 0.2)])
+    pique = crear_receta(db, sucursal.id, [(carne, 0.5)])
+    db.commit()
+
+    response = client.post(
+        f"{settings.API_V1_PREFIX}/ventas/",
+        headers=auth_headers,
+        json={
+            "sucursal_id": sucursal.id,
+            "subtotal": 250.0,
+            "total": 250.0,
+            "items": [
+                {"receta_id": lomo.id, "nombre_item": lomo.nombre, "cantidad": 2, "precio_unitario": 50.0, "total": 100.0},
+                {"receta_id": pique.id, "nombre_item": pique.nombre, "cantidad": 1, "precio_unitario": 50.0, "total": 50.0},
+                {"receta_id": lomo.id, "nombre_item": lomo.nombre, "cantidad": 2, "precio_unitario": 50.0, "total": 100.0},
+            ]
+        }
+    )
+
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 3
+    assert all(item["costo_unitario"] == pytest.approx(20.0) for item in response.json()["items"])
+    assert all(item["receta_version"] == 1 for item in response.json()["items"])
+    db.refresh(carne)
+    db.refresh(papa)
+    assert carne.cantidad == pytest.approx(10.0 - 0.3 * 4 - 0.5)
+    assert papa.cantidad == pytest.approx(5.0 - 0.2 * 4)
+
+
+def test_descuento_usa_numero_fijo_de_consultas(db: Session, sucursal: Sucursal):
+    items = [crear_item(db, sucursal.id, f"Insumo {i}", 100.0) for i in range(12)]
+    recetas = [crear_receta(db, sucursal.id, [(item, 1.0), (items[0], 0.5)]) for item in items]
+    db.commit()
+    sucursal_id = sucursal.id
+
+    def contar_consultas(lineas) -> int:
+        engine = db.get_bind()
+        sentencias = []
+        listener = lambda *args: sentencias.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            consumo = StockService.calcular_consumo(db, lineas)
+            consumo = StockService.validar_stock(db, sucursal_id, consumo, False)
+            StockService.aplicar_descuento(db, consumo)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        return len(sentencias)
+
+    una_linea = contar_consultas([(recetas[0].id, 1)])
+    doce_lineas = contar_consultas([(receta.id, 2) for receta in recetas])
+    # Los ingredientes ya están en la caché de BOM: solo bloqueo, UPDATE e INSERT en el libro
+    repetida = contar_consultas([(receta.id, 1) for receta in recetas])
+    db.commit()
+
+    assert una_linea == doce_lineas == 4
+    assert repetida == 3
+    db.refresh(items[0])
+    assert items[0].cantidad == pytest.approx(100.0 - 1.5 - (2.0 + 12 * 1.0) - (1.0 + 12 * 0.5))
+
+
+def test_editar_receta_invalida_bom_en_cache(
+    client: TestClient, db: Session, sucursal: Sucursal, auth_headers: dict
+):
+    carne = crear_item(db, sucursal.id, "Carne BOM", 10.0)
+    lomo = crear_receta(db, sucursal.id, [(carne, 0.5)])
+    db.commit()
+
+    def vender() -> dict:
+        response = client.post(
+            f"{settings.API_V1_PREFIX}/ventas/",
+            headers=auth_headers,
+            json={
+                "sucursal_id": sucursal.id, "subtotal": 50.0, "total": 50.0,
+                "items": [{"receta_id": lomo.id, "nombre_item": lomo.nombre, "cantidad": 1,
+                           "precio_unitario": 50.0, "total": 50.0}]
+            }
+        )
+        assert response.status_code == 200
+        return response.json()["items"][0]
+
+    assert vender()["receta_version"] == 1
+    response = client.put(
+        f"{settings.API_V1_PREFIX}/recetas/{lomo.id}",
+        json={"ingredientes": [{"item_inventario_id": carne.id, "nombre_ingrediente": "Carne",
+                                "cantidad": 2.0, "unidad": "kg", "costo": 1.0}]}
+    )
+    assert response.status_code == 200
+    assert response.json()["version_actual"] == 2
+
+    assert vender()["receta_version"] == 2
+    db.refresh(carne)
+    assert carne.cantidad == pytest.approx(10.0 - 0.5 - 2.0)
+
+
+def test_lote_de_ventas_idempotente_y_descuento_agregado(
+    client: TestClient, db: Session, sucursal: Sucursal, auth_headers: dict
+):
+    carne = crear_item(db, sucursal.id, "Carne lote", 10.0)
+    lomo = crear_receta(db, sucursal.id, [(carne, 0.5)])
+    db.commit()
+
+    def venta(clave: str, cantidad: int) -> dict:
+        return {
+            "clave_idempotencia": clave,
+            "fecha_creacion": "2026-01-15T20:30:00Z",
+            "sucursal_id": sucursal.id,
+            "subtotal": 50.0 * cantidad,
+            "total": 50.0 * cantidad,
+            "items": [{"receta_id": lomo.id, "nombre_item": lomo.nombre, "cantidad": cantidad,
+                       "precio_unitario": 50.0, "total": 50.0 * cantidad}]
+        }
+
+    claves = [uuid.uuid4().hex for _ in range(3)]
+    lote = {"ventas": [venta(claves[0], 2), venta(claves[1], 1), venta(claves[0], 2), venta(claves[2], 3)]}
+    response = client.post(f"{settings.API_V1_PREFIX}/ventas/batch", headers=auth_headers, json=lote)
+    assert response.status_code == 200
+    cuerpo = response.json()
+    assert (cuerpo["creadas"], cuerpo["duplicadas"], cuerpo["rechazadas"]) == (3, 1, 0)
+    assert cuerpo["resultados"][2]["venta_id"] == cuerpo["resultados"][0]["venta_id"]
+    db.refresh(carne)
+    assert carne.cantidad == pytest.approx(10.0 - 0.5 * 6)
+
+    venta_creada = client.get(
+        f"{settings.API_V1_PREFIX}/ventas/{cuerpo['resultados'][0]['venta_id']}", headers=auth_headers
+    ).json()
+    assert venta_creada["fecha_creacion"].startswith("2026-01-15T20:30:00")
+    assert venta_creada["items"][0]["costo_unitario"] == pytest.approx(20.0)
+
+    # Reenviar el lote (el POS no recibió la respuesta) no duplica ventas ni stock
+    response = client.post(f"{settings.API_V1_PREFIX}/ventas/batch", headers=auth_headers, json=lote)
+    assert response.json()["duplicadas"] == 4
+    db.refresh(carne)
+    assert carne.cantidad == pytest.approx(10.0 - 0.5 * 6)
+
+    # Una venta del lote reintentada en POST /ventas: la misma es un reintento, otra un error
+    headers = {**auth_headers, "Idempotency-Key": claves[1]}
+    reintento = client.post(f"{settings.API_V1_PREFIX}/ventas/", headers=headers, json=venta(claves[1], 1))
+    assert reintento.status_code == 200
+    assert reintento.headers["Idempotent-Replayed"] == "true"
+    assert reintento.json()["id"] == cuerpo["resultados"][1]["venta_id"]
+    otra = client.post(f"{settings.API_V1_PREFIX}/ventas/", headers=headers, json=venta(claves[1], 2))
+    assert otra.status_code == 422
+    db.refresh(carne)
+    assert carne.cantidad == pytest.approx(10.0 - 0.5 * 6)
+
+
+def test_idempotency_key_no_duplica_venta_ni_descuento(
+    client: TestClient, db: Session, sucursal: Sucursal, auth_headers: dict
+):
+    carne = crear_item(db, sucursal.id, "Carne idempotente", 10.0)
+    lomo = crear_receta(db, sucursal.id, [(carne, 1.0)])
+    db.commit()
+    venta = {
+        "sucursal_id": sucursal.id,
+        "subtotal": 50.0,
+        "total": 50.0,
+        "items": [{"receta_id": lomo.id, "nombre_item": lomo.nombre, "cantidad": 1, "precio_unitario": 50.0, "total": 50.0}]
+    }
+    headers = {**auth_headers, "Idempotency-Key": uuid.uuid4().hex}
+
+    primera = client.post(f"{settings.API_V1_PREFIX}/ventas/", headers=headers, json=venta)
+    reintento = client.post(f"{settings.API_V1_PREFIX}/ventas/", headers=headers, json=venta)
+    assert primera.status_code == reintento.status_code == 200
+    assert reintento.headers["Idempotent-Replayed"] == "true"
+    assert reintento.json() == primera.json()
+    db.refresh(carne)
+    assert carne.cantidad == pytest.approx(9.0)
+
+    # La misma clave con otro contenido es un error del cliente
+    otra = client.post(f"{settings.API_V1_PREFIX}/ventas/", headers=headers, json={**venta, "notas": "otra"})
+    assert otra.status_code == 422
+
+    # La clave ya la tiene una venta de otro usuario: el índice único la rechaza al
+    # insertar y se responde 422 en lugar de un 500
+    ajena = Venta(id=str(uuid.uuid4()), numero_venta=f"T-{uuid.uuid4().hex[:10]}", sucursal_id=sucursal.id,
+                  subtotal=50.0, total=50.0, clave_idempotencia=uuid.uuid4().hex)
+    db.add(ajena)
+    db.commit()
+    response = client.post(f"{settings.API_V1_PREFIX}/ventas/",
+                           headers={**auth_headers, "Idempotency-Key": ajena.clave_idempotencia}, json=venta)
+    assert response.status_code == 422
+    db.refresh(carne)
+    assert carne.cantidad == pytest.approx(9.0)
+
+    # Sin clave se registra otra venta con el número siguiente de la sucursal
+    segunda = client.post(f"{settings.API_V1_PREFIX}/ventas/", headers=auth_headers, json=venta).json()
+    numero = int(primera.json()["numero_venta"].removeprefix("V-"))
+    assert segunda["numero_venta"] == f"V-{numero + 1:06d}"
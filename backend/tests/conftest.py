@@ -1,18 +1,20 @@
 import pytest
 from typing import Generator
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
-from app.core.database import Base, get_db
+from app.core.database import Base, get_db, get_async_db
 from app.main import app
 from app.core.config import settings
 from app.core import security
 from app.models.usuario import Usuario
+from app.models.rol import Rol, Permiso, PermisoRol, UsuarioRol
 
-# Use an in-memory SQLite database for testing
-SQLALCHEMY_DATABASE_URL = "sqlite://"
+# Use an in-memory SQLite database for testing, shared between the sync and async engines
+SQLALCHEMY_DATABASE_URL = "sqlite:///file:gastrosmart_test?mode=memory&cache=shared&uri=true"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
@@ -21,14 +23,55 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://"),
+    poolclass=StaticPool,
+)
+
+@event.listens_for(async_engine.sync_engine, "connect")
+def _read_uncommitted(dbapi_connection, connection_record):
+    # Behave like the single shared connection: see rows the test session has not committed yet
+    dbapi_connection.execute("PRAGMA read_uncommitted = 1")
+
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
 @pytest.fixture(scope="session")
 def db() -> Generator:
     Base.metadata.create_all(bind=engine)
     yield TestingSessionLocal()
     Base.metadata.drop_all(bind=engine)
 
+def crear_usuario_test(db, email: str, es_superusuario: bool = False, permisos=()) -> Usuario:
+    """Usuario de prueba (idempotente) con un rol que otorga los permisos indicados"""
+    import uuid
+    user = db.query(Usuario).filter(Usuario.email == email).first()
+    if user:
+        return user
+    user = Usuario(
+        id=str(uuid.uuid4()),
+        email=email,
+        nombre_usuario=email.split("@")[0],
+        contrasena_hash=security.get_password_hash("testpassword"),
+        nombre_completo="Test User",
+        activo=True,
+        es_superusuario=es_superusuario
+    )
+    db.add(user)
+    if permisos:
+        rol = Rol(id=str(uuid.uuid4()), nombre=f"rol_{user.nombre_usuario}")
+        db.add(rol)
+        db.add(UsuarioRol(id=str(uuid.uuid4()), usuario_id=user.id, rol_id=rol.id))
+        for nombre in permisos:
+            permiso = db.query(Permiso).filter(Permiso.nombre == nombre).first()
+            if not permiso:
+                permiso = Permiso(id=str(uuid.uuid4()), nombre=nombre, recurso=nombre.split("_")[-1], accion="manage")
+                db.add(permiso)
+            db.add(PermisoRol(id=str(uuid.uuid4()), rol_id=rol.id, permiso_id=permiso.id))
+    db.commit()
+    return user
+
 @pytest.fixture(scope="module")
-def client() -> Generator:
+def client(db: Generator) -> Generator:
     def override_get_db():
         try:
             db = TestingSessionLocal()
@@ -36,26 +79,20 @@ def client() -> Generator:
         finally:
             db.close()
     
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # Por defecto las peticiones van como superusuario; los tests de permisos pasan sus cabeceras
+    admin = crear_usuario_test(db, "test_admin@example.com", es_superusuario=True)
     with TestClient(app) as c:
+        c.headers["Authorization"] = f"Bearer {security.create_access_token(admin.id)}"
         yield c
 
 @pytest.fixture(scope="module")
 def normal_user_token_headers(client: TestClient, db: Generator) -> dict:
-    email = "test_user@example.com"
-    password = "testpassword"
-    user = db.query(Usuario).filter(Usuario.email == email).first()
-    if not user:
-        import uuid
-        user = Usuario(
-            id=str(uuid.uuid4()),
-            email=email,
-            nombre_usuario="test_user",
-            contrasena_hash=security.get_password_hash(password),
-            nombre_completo="Test User",
-            activo=True
-        )
-        db.add(user)
-        db.commit()
-    
+    # Cajero: puede registrar ventas
+    user = crear_usuario_test(db, "test_user@example.com", permisos=["gestionar_ventas"])
     return security.create_access_token(user.id)
@@ -0,0 +1,135 @@
+import uuid
+import asyncio
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.cache import cache, ResponseCache, LRUCacheBackend, RedisCacheBackend
+from app.models.item_inventario import ItemInventario
+from app.models.sucursal import Sucursal
+
+
+class RedisLocal:
+    """Doble en memoria con el subconjunto de comandos que usa RedisCacheBackend"""
+
+    def __init__(self):
+        self.datos = {}
+
+    def get(self, clave):
+        return self.datos.get(clave)
+
+    def setex(self, clave, ttl, valor):
+        self.datos[clave] = valor
+
+    def mget(self, claves):
+        return [self.datos.get(clave) for clave in claves]
+
+    def incr(self, clave):
+        self.datos[clave] = int(self.datos.get(clave, 0)) + 1
+
+    def scan_iter(self, patron):
+        return [clave for clave in list(self.datos) if clave.startswith(patron.rstrip("*"))]
+
+    def delete(self, clave):
+        self.datos.pop(clave, None)
+
+
+def test_dashboard_se_cachea_e_invalida_con_movimiento(client: TestClient, db: Session):
+    sucursal_id = str(uuid.uuid4())
+    db.add(Sucursal(id=sucursal_id, nombre="Sucursal Caché", direccion="Av. Test", restaurante_id=str(uuid.uuid4())))
+    item = ItemInventario(
+        id=str(uuid.uuid4()),
+        nombre="Carbón",
+        categoria="General",
+        cantidad=10.0,
+        unidad="kg",
+        stock_minimo=5.0,
+        costo_unitario=1.0,
+        sucursal_id=sucursal_id
+    )
+    db.add(item)
+    db.commit()
+    url = f"{settings.API_V1_PREFIX}/dashboard/stats"
+    cache.reiniciar_estadisticas()
+
+    assert client.get(url, params={"sucursal_id": sucursal_id}).json()["estadisticas"]["items_criticos_count"] == 0
+    assert client.get(url, params={"sucursal_id": sucursal_id}).json()["estadisticas"]["items_criticos_count"] == 0
+    contadores = client.get(f"{settings.API_V1_PREFIX}/health/cache").json()["endpoints"]["dashboard.obtener_estadisticas_dashboard"]
+    assert contadores == {"hits": 1, "misses": 1}
+
+    response = client.post(f"{settings.API_V1_PREFIX}/movimientos-inventario/", json={
+        "item_inventario_id": item.id,
+        "sucursal_id": sucursal_id,
+        "tipo_movimiento": "MERMA",
+        "cantidad": 8.0,
+        "unidad": "kg"
+    })
+    assert response.status_code == 200
+    assert client.get(url, params={"sucursal_id": sucursal_id}).json()["estadisticas"]["items_criticos_count"] == 1
+
+
+def test_backend_compartido_con_doble_local():
+    compartido = RedisLocal()
+    # Dos workers con su propia instancia pero el mismo backend
+    worker_a = ResponseCache(RedisCacheBackend(cliente=compartido), ttl=60)
+    worker_b = ResponseCache(RedisCacheBackend(cliente=compartido), ttl=60)
+    llamadas = []
+
+    def endpoint(cache_worker):
+        @cache_worker.cachear(etiquetas=["ventas"])
+        async def obtener_total(sucursal_id: str = None, db=None):
+            llamadas.append(sucursal_id)
+            return {"total": len(llamadas)}
+        return obtener_total
+
+    a, b = endpoint(worker_a), endpoint(worker_b)
+    assert asyncio.run(a(sucursal_id="s1", db=object())) == {"total": 1}
+    assert asyncio.run(b(sucursal_id="s1", db=object())) == {"total": 1}
+    assert asyncio.run(b(sucursal_id="s2", db=object())) == {"total": 2}
+
+    worker_a.invalidar("ventas")
+    assert asyncio.run(b(sucursal_id="s1", db=object())) == {"total": 3}
+    assert worker_b.estadisticas()["hits"] == 1
+
+
+def test_lru_descarta_la_entrada_menos_usada():
+    backend = LRUCacheBackend(max_entradas=2)
+    backend.set("a", 1, ttl=60)
+    backend.set("b", 2, ttl=60)
+    backend.get("a")
+    backend.set("c", 3, ttl=60)
+    assert backend.get("a") == 1
+    assert backend.get("c") == 3
+    assert backend.get("b") != 2
+
+
+def test_margenes_se_invalidan_con_recetas_y_costos(client: TestClient, db: Session):
+    sucursal_id = str(uuid.uuid4())
+    db.add(Sucursal(id=sucursal_id, nombre="Sucursal Márgenes", direccion="Av. Test", restaurante_id=str(uuid.uuid4())))
+    item = ItemInventario(id=str(uuid.uuid4()), nombre="Trufa", categoria="General", cantidad=10.0, unidad="kg",
+                          stock_minimo=0, costo_unitario=1.0, sucursal_id=sucursal_id)
+    db.add(item)
+    db.commit()
+    response = client.post(f"{settings.API_V1_PREFIX}/recetas/", json={
+        "nombre": "Plato Margen Caché", "categoria": "Plato Principal", "precio": 1000.0, "costo": 1.0,
+        "sucursal_id": sucursal_id,
+        "ingredientes": [{"item_inventario_id": item.id, "nombre_ingrediente": "Trufa", "cantidad": 1.0,
+                          "unidad": "kg", "costo": 1.0}],
+    })
+    assert response.status_code == 200, response.text
+    receta_id = response.json()["id"]
+    url = f"{settings.API_V1_PREFIX}/reports/margins"
+    cache.reiniciar_estadisticas()
+
+    def contadores() -> dict:
+        client.get(url)
+        return client.get(f"{settings.API_V1_PREFIX}/health/cache").json()["endpoints"]["reports.obtener_margenes_ganancia"]
+
+    assert contadores() == {"hits": 0, "misses": 1}
+    assert contadores() == {"hits": 1, "misses": 1}
+    # El costo del item recalcula la receta (etiqueta "inventario")
+    client.put(f"{settings.API_V1_PREFIX}/inventario/{item.id}", json={"costo_unitario": 0.5})
+    assert contadores() == {"hits": 1, "misses": 2}
+    # Guardar la receta (etiqueta "recetas")
+    client.put(f"{settings.API_V1_PREFIX}/recetas/{receta_id}", json={"precio": 2000.0})
+    assert contadores() == {"hits": 1, "misses": 3}
@@ -0,0 +1,40 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.core.config import settings
+from app.core.database import QueuePoolMedido, instrumentar_pool
+
+
+def test_metricas_de_pool_agotado(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=QueuePoolMedido, pool_size=1, max_overflow=0, pool_timeout=0.05
+    )
+    metricas = instrumentar_pool(engine)
+
+    with engine.connect() as conexion:
+        conexion.execute(text("SELECT 1"))
+        en_uso = metricas.estadisticas()
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+
+    assert en_uso["pool"]["saturacion"] == 1.0
+    estadisticas = metricas.estadisticas()
+    assert estadisticas["pool"]["en_uso"] == 0
+    assert estadisticas["esperas"]["checkouts"] == 1
+    assert estadisticas["esperas"]["timeouts"] == 1
+    assert estadisticas["esperas"]["maxima_ms"] >= 50
+    assert estadisticas["conexiones"]["abiertas"] == 1
+
+    # dispose() recrea el pool sin perder lo acumulado
+    engine.dispose()
+    assert engine.pool.metricas is metricas
+    assert metricas.estadisticas()["conexiones"]["abiertas"] == 0
+
+
+def test_health_pool(client: TestClient):
+    response = client.get(f"{settings.API_V1_PREFIX}/health/pool")
+    assert response.status_code == 200
+    assert set(response.json()["engines"]) == {"sync", "async"}
@@ -0,0 +1,70 @@
+import uuid
+import asyncio
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core import database
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.database import Base, Replica
+from app.models.receta import Receta
+from app.models.venta import Venta
+
+
+def test_lecturas_en_replica_con_respaldo_en_primaria(client: TestClient, db: Session, tmp_path, monkeypatch):
+    # Una segunda base SQLite hace de réplica; solo ella tiene estas filas
+    replica = Replica(f"sqlite:///{tmp_path / 'replica.db'}", max_lag=5, intervalo=0)
+    Base.metadata.create_all(bind=replica.engine)
+    with replica.SessionLocal() as sesion:
+        sesion.add(Receta(id=str(uuid.uuid4()), nombre="Solo en réplica", categoria="Postre",
+                          precio=10.0, margen=99.0))
+        sesion.add(Venta(id=str(uuid.uuid4()), numero_venta="REPLICA-1", sucursal_id=str(uuid.uuid4()),
+                         subtotal=10.0, total=10.0))
+        sesion.commit()
+    monkeypatch.setattr(database, "replica", replica)
+    monkeypatch.setattr(cache, "habilitada", False)
+
+    try:
+        margenes = client.get(f"{settings.API_V1_PREFIX}/reports/margins").json()
+        assert "Solo en réplica" in [m["nombre"] for m in margenes]
+        exportacion = client.get(f"{settings.API_V1_PREFIX}/reports/export/ventas").text
+        assert "REPLICA-1" in exportacion
+
+        # Réplica atrasada: se lee de la primaria
+        monkeypatch.setattr(Replica, "medir_lag", staticmethod(lambda conexion: 30.0))
+        margenes = client.get(f"{settings.API_V1_PREFIX}/reports/margins").json()
+        assert "Solo en réplica" not in [m["nombre"] for m in margenes]
+
+        estado = client.get(f"{settings.API_V1_PREFIX}/health/replica").json()
+        assert estado["lag_s"] == 30.0
+        assert (estado["lecturas_replica"], estado["lecturas_primaria"]) == (2, 1)
+    finally:
+        replica.engine.dispose()
+        asyncio.run(replica.async_engine.dispose())
+
+
+def test_no_cachea_lecturas_de_replica_atrasada(client: TestClient, tmp_path, monkeypatch):
+    replica = Replica(f"sqlite:///{tmp_path / 'replica.db'}", max_lag=5, intervalo=0)
+    Base.metadata.create_all(bind=replica.engine)
+    monkeypatch.setattr(database, "replica", replica)
+    monkeypatch.setattr(cache, "habilitada", True)
+    cache.invalidar("recetas")
+    cache.reiniciar_estadisticas()
+
+    def margenes():
+        assert client.get(f"{settings.API_V1_PREFIX}/reports/margins").status_code == 200
+        return cache.estadisticas()["endpoints"]["reports.obtener_margenes_ganancia"]
+
+    try:
+        # Dentro del retraso tolerado se lee de la réplica, pero sin guardar la respuesta
+        monkeypatch.setattr(Replica, "medir_lag", staticmethod(lambda conexion: 2.0))
+        margenes()
+        assert margenes() == {"hits": 0, "misses": 2}
+
+        # Réplica al día: la respuesta se guarda
+        monkeypatch.setattr(Replica, "medir_lag", staticmethod(lambda conexion: 0.0))
+        margenes()
+        assert margenes() == {"hits": 1, "misses": 3}
+    finally:
+        replica.engine.dispose()
+        asyncio.run(replica.async_engine.dispose())
@@ -0,0 +1,58 @@
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.unidad import Unidad
+from app.models.sucursal import Sucursal
+from app.models.receta import Receta, IngredienteReceta
+from app.models.item_inventario import ItemInventario
+from app.services.stock_service import StockService
+
+
+def test_cambio_de_costo_recalcula_solo_recetas_afectadas(client: TestClient, db: Session):
+    sufijo = uuid.uuid4().hex[:6]
+    kg = client.post(f"{settings.API_V1_PREFIX}/unidades/",
+                     json={"codigo": f"kg-{sufijo}", "nombre": "Kilogramo", "tipo": "peso"})
+    assert kg.status_code == 200, kg.text
+    kg = db.get(Unidad, kg.json()["id"])
+    g = client.post(f"{settings.API_V1_PREFIX}/unidades/",
+                    json={"codigo": f"g-{sufijo}", "nombre": "Gramo", "tipo": "peso",
+                          "unidad_base_id": kg.id, "factor_conversion": 0.001})
+    g = db.get(Unidad, g.json()["id"])
+    sucursal = Sucursal(id=str(uuid.uuid4()), nombre="Sucursal Costos", direccion="Av. Costos",
+                        restaurante_id=str(uuid.uuid4()))
+    carne = ItemInventario(id=str(uuid.uuid4()), nombre="Carne", categoria="Carnes", cantidad=10.0,
+                           unidad=kg.codigo, unidad_id=kg.id, stock_minimo=0, costo_unitario=10.0,
+                           sucursal_id=sucursal.id)
+    arroz = ItemInventario(id=str(uuid.uuid4()), nombre="Arroz", categoria="Granos", cantidad=10.0,
+                           unidad="kg", stock_minimo=0, costo_unitario=2.0, sucursal_id=sucursal.id)
+    lomo = Receta(id=str(uuid.uuid4()), nombre="Lomo", categoria="Plato Principal", precio=20.0,
+                  costo=3.0, margen=85.0, sucursal_id=sucursal.id)
+    guarnicion = Receta(id=str(uuid.uuid4()), nombre="Arroz", categoria="Guarnición", precio=5.0,
+                        costo=1.0, margen=80.0, sucursal_id=sucursal.id)
+    db.add_all([sucursal, carne, arroz, lomo, guarnicion])
+    db.add_all([
+        # 200 g de carne (el item se mide en kg) y una salsa sin item de inventario
+        IngredienteReceta(id=str(uuid.uuid4()), receta_id=lomo.id, item_inventario_id=carne.id,
+                          nombre_ingrediente="Carne", cantidad=200, unidad=g.codigo, costo=2.0),
+        IngredienteReceta(id=str(uuid.uuid4()), receta_id=lomo.id, nombre_ingrediente="Salsa",
+                          cantidad=1, unidad="porción", costo=1.0),
+        IngredienteReceta(id=str(uuid.uuid4()), receta_id=guarnicion.id, item_inventario_id=arroz.id,
+                          nombre_ingrediente="Arroz", cantidad=0.5, unidad="kg", costo=1.0),
+    ])
+    db.commit()
+
+    response = client.put(f"{settings.API_V1_PREFIX}/inventario/{carne.id}", json={"costo_unitario": 25.0})
+    assert response.status_code == 200
+
+    db.refresh(lomo)
+    db.refresh(guarnicion)
+    assert lomo.costo == pytest.approx(0.2 * 25.0 + 1.0)
+    assert lomo.margen == pytest.approx((20.0 - 6.0) / 20.0 * 100)
+    # La guarnición no usa carne: conserva sus valores
+    assert (guarnicion.costo, guarnicion.margen) == (1.0, 80.0)
+
+    # El descuento de stock convierte los 200 g a kg
+    assert StockService.calcular_consumo(db, [(lomo.id, 2)]) == {carne.id: pytest.approx(0.4)}
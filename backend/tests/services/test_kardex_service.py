@@ -0,0 +1,67 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.sucursal import Sucursal
+from app.models.item_inventario import ItemInventario
+from app.models.movimiento_inventario import MovimientoInventario
+from app.services.kardex_service import KardexService
+from app.services.stock_service import StockService
+
+
+def test_libro_de_stock_snapshots_y_conciliacion(client: TestClient, db: Session):
+    sucursal = Sucursal(id=str(uuid.uuid4()), nombre="Sucursal Kardex", direccion="Av. Kardex",
+                        restaurante_id=str(uuid.uuid4()))
+    db.add(sucursal)
+    db.commit()
+
+    # Alta con stock inicial, una merma y una edición de la cantidad: tres movimientos
+    response = client.post(f"{settings.API_V1_PREFIX}/inventario/", json={
+        "nombre": "Carne", "categoria": "Carnes", "cantidad": 10.0, "unidad": "kg",
+        "stock_minimo": 0, "costo_unitario": 10.0, "sucursal_id": sucursal.id,
+    })
+    assert response.status_code == 200, response.text
+    item_id = response.json()["id"]
+    assert response.json()["cantidad"] == pytest.approx(10.0)
+    StockService.registrar_movimientos(db, [
+        {"item_inventario_id": item_id, "delta": -3.0, "tipo_movimiento": "MERMA"}
+    ])
+    db.commit()
+    response = client.put(f"{settings.API_V1_PREFIX}/inventario/{item_id}", json={"cantidad": 5.0})
+    assert response.status_code == 200
+
+    movimientos = db.query(MovimientoInventario).filter(
+        MovimientoInventario.item_inventario_id == item_id
+    ).order_by(MovimientoInventario.fecha_creacion).all()
+    assert [(m.tipo_movimiento, m.delta, m.saldo) for m in movimientos] == [
+        ("AJUSTE", 10.0, 10.0), ("MERMA", -3.0, 7.0), ("AJUSTE", -2.0, 5.0)
+    ]
+
+    # Snapshot al corte actual; el stock posterior es snapshot + movimientos nuevos
+    corte = datetime.utcnow()
+    assert KardexService.tomar_snapshots(db, corte, sucursal.id) == 1
+    StockService.ajustar_stock(db, item_id, 1.5)
+    db.commit()
+    assert KardexService.stock_en(db, corte, sucursal.id) == {item_id: pytest.approx(5.0)}
+    assert KardexService.stock_en(db, datetime.utcnow(), sucursal.id) == {item_id: pytest.approx(6.5)}
+    assert KardexService.stock_en(db, movimientos[0].fecha_creacion - timedelta(seconds=1),
+                                  sucursal.id) == {item_id: 0.0}
+
+    # Una escritura fuera del libro aparece como diferencia y se corrige
+    db.query(ItemInventario).filter(ItemInventario.id == item_id).update({"cantidad": 99.0})
+    reporte = KardexService.conciliar(db, sucursal.id, corregir=True)
+    db.commit()
+    assert [(d["item_inventario_id"], d["diferencia"]) for d in reporte["diferencias"]] == [
+        (item_id, pytest.approx(92.5))
+    ]
+    assert db.query(ItemInventario.cantidad).filter(ItemInventario.id == item_id).scalar() == pytest.approx(6.5)
+    assert KardexService.conciliar(db, sucursal.id)["diferencias"] == []
+
+    # El libro es de solo inserción: un item con historial no se puede eliminar
+    response = client.delete(f"{settings.API_V1_PREFIX}/inventario/{item_id}")
+    assert response.status_code == 409
+    assert db.query(MovimientoInventario).filter(MovimientoInventario.item_inventario_id == item_id).count() == 4
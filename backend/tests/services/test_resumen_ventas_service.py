@@ -0,0 +1,101 @@
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.receta import Receta
+from app.models.venta import Venta, ItemVenta
+from app.models.resumen_venta import ResumenVentaDiario, RESUMEN_TOTAL_DIA
+from app.services.resumen_ventas_service import ResumenVentasService
+
+
+def registrar(db: Session, sucursal_id: str, fecha: datetime, lineas) -> Venta:
+    venta = Venta(
+        id=str(uuid.uuid4()),
+        numero_venta=f"T-{uuid.uuid4().hex[:10]}",
+        sucursal_id=sucursal_id,
+        subtotal=0.0,
+        total=sum(precio * cantidad for _, cantidad, precio in lineas) + 5.0,  # + impuesto
+        fecha_creacion=fecha
+    )
+    items = [
+        ItemVenta(
+            id=str(uuid.uuid4()),
+            venta_id=venta.id,
+            receta_id=receta.id if receta else None,
+            nombre_item=receta.nombre if receta else "Extra",
+            cantidad=cantidad,
+            precio_unitario=precio,
+            total=precio * cantidad,
+            costo_unitario=receta.costo / receta.porciones if receta else None
+        )
+        for receta, cantidad, precio in lineas
+    ]
+    db.add(venta)
+    db.add_all(items)
+    db.flush()
+    ResumenVentasService.registrar_venta(db, venta, items)
+    return venta
+
+
+def snapshot(db: Session, sucursal_id: str):
+    filas = db.query(ResumenVentaDiario).filter(ResumenVentaDiario.sucursal_id == sucursal_id).all()
+    return sorted(
+        (f.fecha, f.receta_id, round(f.ingresos, 6), f.unidades, round(f.costo, 6), f.tickets)
+        for f in filas
+    )
+
+
+def test_resumen_incremental_coincide_con_backfill(client: TestClient, db: Session):
+    sucursal_id = str(uuid.uuid4())
+    lomo = Receta(id=str(uuid.uuid4()), nombre="Lomo", categoria="Plato Principal", precio=80.0, costo=60.0, porciones=2)
+    cerveza = Receta(id=str(uuid.uuid4()), nombre="Cerveza", categoria="Bebida", precio=20.0, costo=8.0, porciones=1)
+    db.add_all([lomo, cerveza])
+    db.flush()
+
+    hoy = datetime.utcnow().replace(hour=12)
+    ayer = hoy - timedelta(days=1)
+    registrar(db, sucursal_id, hoy, [(lomo, 2, 80.0), (cerveza, 3, 20.0)])
+    registrar(db, sucursal_id, hoy, [(lomo, 1, 80.0), (None, 1, 10.0)])
+    registrar(db, sucursal_id, ayer, [(cerveza, 1, 20.0)])
+    db.commit()
+
+    incremental = snapshot(db, sucursal_id)
+    total_hoy = next(f for f in incremental if f[0] == hoy.date() and f[1] == RESUMEN_TOTAL_DIA)
+    assert total_hoy[2:] == (160.0 + 60.0 + 5.0 + 80.0 + 10.0 + 5.0, 7, 3 * 30.0 + 3 * 8.0, 2)
+
+    ResumenVentasService.reconstruir(db, sucursal_id=sucursal_id)
+    db.commit()
+    assert snapshot(db, sucursal_id) == incremental
+
+    # Un cambio de costo posterior no altera el histórico
+    lomo.costo = 100.0
+    db.flush()
+    ResumenVentasService.reconstruir(db, sucursal_id=sucursal_id)
+    db.commit()
+    assert snapshot(db, sucursal_id) == incremental
+
+    response = client.get(
+        f"{settings.API_V1_PREFIX}/reports/summary",
+        params={"days": 7, "sucursal_id": sucursal_id}
+    )
+    assert response.status_code == 200
+    assert response.json()["ventas_totales"] == pytest.approx(320.0 + 25.0)
+    assert response.json()["costo_total"] == pytest.approx(114.0 + 8.0)
+
+
+def test_acumular_generico_equivale_al_upsert(db: Session):
+    upsert, generico = str(uuid.uuid4()), str(uuid.uuid4())
+    receta_id = str(uuid.uuid4())
+    hoy = datetime.utcnow()
+    for _ in range(2):
+        for sucursal_id, acumular in ((upsert, ResumenVentasService._acumular),
+                                      (generico, ResumenVentasService._acumular_generico)):
+            acumular(db, ResumenVentasService._filas_venta(
+                sucursal_id, hoy, 45.0, [(receta_id, "Lomo", 2, 40.0, 12.5), (None, "Extra", 1, 5.0, None)]
+            ))
+    db.commit()
+    assert snapshot(db, generico) == snapshot(db, upsert)
+    assert snapshot(db, generico)[0][2:] == (90.0, 6, 50.0, 2)
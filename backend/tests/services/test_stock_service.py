@@ -0,0 +1,110 @@
+import uuid
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.item_inventario import ItemInventario
+from app.models.receta import Receta, IngredienteReceta
+from app.services.stock_service import StockService, StockInsuficienteError
+
+VENTAS_PARALELAS = 60
+
+
+@pytest.fixture()
+def session_factory(tmp_path):
+    # Base de datos en archivo: cada hilo usa su propia conexión, como un worker real
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'stock.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+def preparar_plato(session_factory, stock_inicial: float):
+    db = session_factory()
+    sucursal_id = str(uuid.uuid4())
+    item = ItemInventario(
+        id=str(uuid.uuid4()),
+        nombre="Carne",
+        categoria="Carnes",
+        cantidad=stock_inicial,
+        unidad="kg",
+        stock_minimo=0,
+        costo_unitario=10.0,
+        sucursal_id=sucursal_id
+    )
+    receta = Receta(
+        id=str(uuid.uuid4()),
+        nombre="Pique",
+        categoria="Plato Principal",
+        precio=50.0,
+        sucursal_id=sucursal_id
+    )
+    db.add_all([item, receta])
+    db.add(IngredienteReceta(
+        id=str(uuid.uuid4()),
+        receta_id=receta.id,
+        item_inventario_id=item.id,
+        nombre_ingrediente="Carne",
+        cantidad=1.0,
+        unidad="kg",
+        costo=10.0
+    ))
+    db.commit()
+    ids = (sucursal_id, receta.id, item.id)
+    db.close()
+    return ids
+
+
+def vender(session_factory, sucursal_id: str, receta_id: str, permitir_stock_negativo: bool) -> bool:
+    """Reproduce el flujo de stock de crear_venta en una transacción propia"""
+    db = session_factory()
+    try:
+        consumo = StockService.calcular_consumo(db, [(receta_id, 1)])
+        consumo = StockService.validar_stock(db, sucursal_id, consumo, permitir_stock_negativo)
+        StockService.aplicar_descuento(db, consumo, permitir_stock_negativo)
+        db.commit()
+        return True
+    except StockInsuficienteError:
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+def stock_final(session_factory, item_id: str) -> float:
+    db = session_factory()
+    try:
+        return db.query(ItemInventario.cantidad).filter(ItemInventario.id == item_id).scalar()
+    finally:
+        db.close()
+
+
+def test_ventas_concurrentes_no_pierden_actualizaciones(session_factory):
+    sucursal_id, receta_id, item_id = preparar_plato(session_factory, 1000.0)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        resultados = list(pool.map(
+            lambda _: vender(session_factory, sucursal_id, receta_id, True),
+            range(VENTAS_PARALELAS)
+        ))
+
+    assert all(resultados)
+    assert stock_final(session_factory, item_id) == 1000.0 - VENTAS_PARALELAS
+
+
+def test_ventas_concurrentes_no_sobrevenden_sin_stock_negativo(session_factory):
+    sucursal_id, receta_id, item_id = preparar_plato(session_factory, 25.0)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        resultados = list(pool.map(
+            lambda _: vender(session_factory, sucursal_id, receta_id, False),
+            range(VENTAS_PARALELAS)
+        ))
+
+    assert sum(resultados) == 25
+    assert stock_final(session_factory, item_id) == 0.0
@@ -39,15 +39,15 @@ function AppContent() {
             <Route path="/" element={<Navigate to="/dashboard" replace />} />
             <Route path="/dashboard" element={<Dashboard />} />
             <Route path="/inventory" element={<ProtectedRoute permission="gestionar_inventario"><Inventory /></ProtectedRoute>} />
-            <Route path="/recipes" element={<ProtectedRoute permission="gestionar_inventario"><Recipes /></ProtectedRoute>} />
+            <Route path="/recipes" element={<ProtectedRoute permission="gestionar_recetas"><Recipes /></ProtectedRoute>} />
             <Route path="/sales" element={<ProtectedRoute permission="gestionar_ventas"><Sales /></ProtectedRoute>} />
             <Route path="/reports" element={<ProtectedRoute permission="ver_reportes"><Reports /></ProtectedRoute>} />
             <Route path="/locations" element={<ProtectedRoute permission="admin"><BusinessLocations /></ProtectedRoute>} />
-            <Route path="/suppliers" element={<ProtectedRoute permission="gestionar_inventario"><Suppliers /></ProtectedRoute>} />
+            <Route path="/suppliers" element={<ProtectedRoute permission="gestionar_proveedores"><Suppliers /></ProtectedRoute>} />
             <Route path="/users" element={<ProtectedRoute permission="gestionar_usuarios"><Users /></ProtectedRoute>} />
             <Route path="/roles" element={<ProtectedRoute permission="admin"><Roles /></ProtectedRoute>} />
-            <Route path="/promotions" element={<ProtectedRoute permission="gestionar_ventas"><Promotions /></ProtectedRoute>} />
-            <Route path="/purchase-orders" element={<ProtectedRoute permission="gestionar_inventario"><PurchaseOrders /></ProtectedRoute>} />
+            <Route path="/promotions" element={<ProtectedRoute permission="gestionar_promociones"><Promotions /></ProtectedRoute>} />
+            <Route path="/purchase-orders" element={<ProtectedRoute permission="gestionar_compras"><PurchaseOrders /></ProtectedRoute>} />
             <Route path="/settings/*" element={<ProtectedRoute permission="admin"><Settings /></ProtectedRoute>} />
             <Route path="*" element={<Navigate to="/dashboard" replace />} />
           </Routes>
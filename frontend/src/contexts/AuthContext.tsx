@@ -41,10 +41,11 @@ export function AuthProvider({ children }: { children: ReactNode }) {
 
       // Llamada real a la API
       const response = await authApi.login(nombreUsuario, contrasena);
-      const { usuario: usuarioData, access_token } = response;
+      const { usuario: usuarioData, access_token, refresh_token } = response;
 
-      // Guardar token y usuario
+      // Guardar tokens y usuario
       localStorage.setItem('token', access_token);
+      localStorage.setItem('refresh_token', refresh_token);
       setUsuario(usuarioData);
       localStorage.setItem(AUTH_STORAGE_KEY, JSON.stringify({ usuario: usuarioData }));
 
@@ -59,9 +60,14 @@ export function AuthProvider({ children }: { children: ReactNode }) {
   };
 
   const logout = () => {
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (refreshToken) {
+      authApi.logout(refreshToken).catch(() => undefined);
+    }
     setUsuario(null);
     localStorage.removeItem(AUTH_STORAGE_KEY);
     localStorage.removeItem('token');
+    localStorage.removeItem('refresh_token');
     toast.success('Sesión cerrada');
   };
 
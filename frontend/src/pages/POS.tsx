@@ -15,21 +15,22 @@ import {
 } from 'lucide-react';
 import { useNavigate } from 'react-router-dom';
 import { recetasApi, ventasApi } from '../services/api';
-import { Receta, Venta } from '../types';
+import { Receta, Venta, DisponibilidadReceta } from '../types';
 import { useAuth } from '../contexts/AuthContext';
 
 // --- Components ---
 
-const ProductCard = ({ product, onAdd }: { product: Receta; onAdd: (p: Receta) => void }) => {
+const ProductCard = ({ product, onAdd, agotado = false }: { product: Receta; onAdd: (p: Receta) => void; agotado?: boolean }) => {
     return (
         <motion.div
             layout
             initial={{ opacity: 0, scale: 0.9 }}
-            animate={{ opacity: 1, scale: 1 }}
-            whileHover={{ scale: 1.02, y: -2 }}
-            whileTap={{ scale: 0.98 }}
-            onClick={() => onAdd(product)}
-            className="bg-white rounded-xl shadow-sm border border-[#1B1B1B]/5 overflow-hidden cursor-pointer hover:shadow-md hover:border-[#F26522]/30 transition-all group h-[180px] flex flex-col"
+            animate={{ opacity: agotado ? 0.45 : 1, scale: 1 }}
+            whileHover={agotado ? undefined : { scale: 1.02, y: -2 }}
+            whileTap={agotado ? undefined : { scale: 0.98 }}
+            onClick={() => !agotado && onAdd(product)}
+            title={agotado ? "Sin stock suficiente" : undefined}
+            className={`bg-white rounded-xl shadow-sm border border-[#1B1B1B]/5 overflow-hidden transition-all group h-[180px] flex flex-col ${agotado ? "cursor-not-allowed grayscale" : "cursor-pointer hover:shadow-md hover:border-[#F26522]/30"}`}
         >
             <div className="h-28 bg-[#1B1B1B]/5 relative overflow-hidden">
                 {product.imagen_url ? (
@@ -46,6 +47,11 @@ const ProductCard = ({ product, onAdd }: { product: Receta; onAdd: (p: Receta) =
                 <div className="absolute top-2 right-2 bg-white/90 backdrop-blur-sm px-2 py-1 rounded-full text-xs font-bold text-[#1B1B1B] shadow-sm">
                     Bs. {product.precio.toFixed(2)}
                 </div>
+                {agotado && (
+                    <div className="absolute bottom-2 left-2 bg-[#EA5455] px-2 py-0.5 rounded-full text-[10px] font-bold text-white uppercase tracking-wider">
+                        Agotado
+                    </div>
+                )}
             </div>
             <div className="p-3 flex-1 flex flex-col justify-between">
                 <h3 className="font-bold text-[#1B1B1B] leading-tight line-clamp-2 text-sm group-hover:text-[#F26522] transition-colors">
@@ -120,12 +126,28 @@ export default function POS() {
     const [cart, setCart] = useState<{ product: Receta, quantity: number }[]>([]);
     const [loading, setLoading] = useState(true);
     const [processing, setProcessing] = useState(false); // Processing payment
+    const [porciones, setPorciones] = useState<Record<string, number | null>>({});
 
     // Load Data
     useEffect(() => {
         loadProducts();
     }, []);
 
+    useEffect(() => {
+        loadDisponibilidad();
+    }, [usuario?.sucursal_default_id]);
+
+    // Porciones que alcanza el stock de la sucursal (para atenuar los platos agotados)
+    const loadDisponibilidad = async () => {
+        if (!usuario?.sucursal_default_id) return;
+        try {
+            const data: DisponibilidadReceta[] = await recetasApi.disponibilidad(usuario.sucursal_default_id);
+            setPorciones(Object.fromEntries(data.map(d => [d.receta_id, d.porciones_disponibles])));
+        } catch (error) {
+            console.error("Error loading availability:", error);
+        }
+    };
+
     const loadProducts = async () => {
         try {
             setLoading(true);
@@ -230,6 +252,7 @@ export default function POS() {
 
             // Reset and Feedback
             setCart([]);
+            loadDisponibilidad();
             alert("¡Venta Registrada Correctamente!"); // Replace with proper Toast later
         } catch (error: any) {
             console.error("Checkout error:", error);
@@ -313,7 +336,7 @@ export default function POS() {
                         <div className="grid grid-cols-2 lg:grid-cols-3 xl:grid-cols-4 2xl:grid-cols-5 gap-4 pb-20">
                             <AnimatePresence>
                                 {filteredProducts.map(product => (
-                                    <ProductCard key={product.id} product={product} onAdd={addToCart} />
+                                    <ProductCard key={product.id} product={product} onAdd={addToCart} agotado={porciones[product.id] === 0} />
                                 ))}
                             </AnimatePresence>
                         </div>
@@ -26,7 +26,8 @@ import {
   RecipeUpdate,
   CajaSesionCreate,
   CajaSesionCerrar,
-  CajaSesion
+  CajaSesion,
+  DisponibilidadReceta
 } from '../types';
 
 // Helper to determine the API URL
@@ -52,16 +53,49 @@ const getApiUrl = () => {
 
 const API_BASE_URL = getApiUrl();
 
+// Listados paginados por cursor: filas por página (máximo del backend) y cabecera del cursor siguiente
+const LIMITE_PAGINA = 500;
+const CABECERA_CURSOR = 'X-Next-Cursor';
+
 class ApiClient {
   private baseURL: string;
+  private renovando: Promise<boolean> | null = null;
 
   constructor(baseURL: string) {
     this.baseURL = baseURL;
   }
 
+  // Access token nuevo con el refresh token (rotativo): una sola renovación en curso
+  private renovarToken(): Promise<boolean> {
+    if (!this.renovando) {
+      this.renovando = (async () => {
+        const refreshToken = localStorage.getItem('refresh_token');
+        if (!refreshToken) return false;
+        const response = await fetch(`${this.baseURL}/login/refresh`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ refresh_token: refreshToken }),
+        });
+        if (!response.ok) {
+          localStorage.removeItem('refresh_token');
+          return false;
+        }
+        const data = await response.json();
+        localStorage.setItem('token', data.access_token);
+        localStorage.setItem('refresh_token', data.refresh_token);
+        return true;
+      })().catch(() => false).finally(() => {
+        this.renovando = null;
+      });
+    }
+    return this.renovando;
+  }
+
   private async request<T>(
     endpoint: string,
-    options: RequestInit = {}
+    options: RequestInit = {},
+    reintento = true,
+    alResponder?: (response: Response) => void
   ): Promise<T> {
     const url = `${this.baseURL}${endpoint}`;
 
@@ -88,6 +122,12 @@ class ApiClient {
     try {
       const response = await fetch(url, config);
 
+      // Access token expirado: renovarlo y repetir la petición una vez
+      if ((response.status === 401 || response.status === 403) && reintento && !endpoint.startsWith('/login/')
+          && await this.renovarToken()) {
+        return this.request<T>(endpoint, options, false, alResponder);
+      }
+
       if (!response.ok) {
         const error = await response.json().catch(() => ({ detail: 'An error occurred' }));
         const errorMessage = error.detail || error.message || `HTTP error! status: ${response.status}`;
@@ -96,6 +136,7 @@ class ApiClient {
         throw apiError;
       }
 
+      alResponder?.(response);
       return await response.json();
     } catch (error) {
       console.error('API request failed:', error);
@@ -112,6 +153,32 @@ class ApiClient {
     return this.request<T>(url, { method: 'GET' });
   }
 
+  // Una página de un listado paginado y el cursor de la siguiente (null en la última)
+  private async getPagina<T>(endpoint: string, params: Record<string, string>): Promise<{ filas: T[]; cursor: string | null }> {
+    let cursor: string | null = null;
+    const query = new URLSearchParams(params).toString();
+    const filas = await this.request<T[]>(`${endpoint}?${query}`, { method: 'GET' }, true, (response) => {
+      cursor = response.headers.get(CABECERA_CURSOR);
+    });
+    return { filas, cursor };
+  }
+
+  // Todas las páginas de un listado paginado, siguiendo X-Next-Cursor hasta la última
+  async getTodos<T>(endpoint: string, params: Record<string, string> = {}): Promise<T[]> {
+    const todos: T[] = [];
+    let cursor: string | null = null;
+    do {
+      const pagina: { filas: T[]; cursor: string | null } = await this.getPagina<T>(endpoint, {
+        ...params,
+        limite: String(LIMITE_PAGINA),
+        ...(cursor ? { cursor } : {}),
+      });
+      todos.push(...pagina.filas);
+      cursor = pagina.cursor;
+    } while (cursor);
+    return todos;
+  }
+
   async post<T>(endpoint: string, data?: any): Promise<T> {
     return this.request<T>(endpoint, {
       method: 'POST',
@@ -136,7 +203,7 @@ export const apiClient = new ApiClient(API_BASE_URL);
 // --- Servicios API ---
 
 export const inventarioApi = {
-  obtenerTodos: () => apiClient.get<ItemInventario[]>('/inventario/'),
+  obtenerTodos: () => apiClient.getTodos<ItemInventario>('/inventario/'),
   obtenerPorId: (id: string) => apiClient.get<ItemInventario>(`/inventario/${id}`),
   crear: (item: Partial<ItemInventario>) => apiClient.post<ItemInventario>('/inventario/', item),
   actualizar: (id: string, item: Partial<ItemInventario>) => apiClient.put<ItemInventario>(`/inventario/${id}`, item),
@@ -149,6 +216,8 @@ export const recetasApi = {
   crear: (data: RecipeCreate) => apiClient.post<Receta>("/recetas/", data),
   actualizar: (id: string, data: RecipeUpdate) => apiClient.put<Receta>(`/recetas/${id}`, data),
   eliminar: (id: string) => apiClient.delete(`/recetas/${id}`),
+  disponibilidad: (sucursalId: string) =>
+    apiClient.get<DisponibilidadReceta[]>("/recetas/disponibilidad", { sucursal_id: sucursalId }),
 };
 
 export const cajaApi = {
@@ -164,7 +233,7 @@ export const cajaApi = {
 };
 
 export const ventasApi = {
-  obtenerTodos: () => apiClient.get<Venta[]>('/ventas/'),
+  obtenerTodos: () => apiClient.getTodos<Venta>('/ventas/'),
   obtenerPorId: (id: string) => apiClient.get<Venta>(`/ventas/${id}`),
   crear: (venta: Partial<Venta>) => apiClient.post<Venta>('/ventas/', venta),
   eliminar: (id: string) => apiClient.delete(`/ventas/${id}`), // Nota: Normalmente no se eliminan ventas, se cancelan
@@ -213,8 +282,9 @@ export const authApi = {
     const formData = new FormData();
     formData.append('username', username);
     formData.append('password', password);
-    return apiClient.post<{ access_token: string; token_type: string; usuario: any }>('/login/access-token', formData);
+    return apiClient.post<{ access_token: string; token_type: string; refresh_token: string; usuario: any }>('/login/access-token', formData);
   },
+  logout: (refresh_token: string) => apiClient.post<{ message: string }>('/logout', { refresh_token }),
   recoverPassword: (email: string) => apiClient.post<{ message: string }>('/recover-password', { email }),
   resetPassword: (token: string, new_password: string) => apiClient.post<{ message: string }>('/reset-password', { token, new_password: new_password }),
 };
@@ -228,12 +298,12 @@ export const promocionesApi = {
 };
 
 export const movimientosApi = {
-  obtenerTodos: () => apiClient.get<MovimientoInventario[]>('/movimientos-inventario/'),
+  obtenerTodos: () => apiClient.getTodos<MovimientoInventario>('/movimientos-inventario/'),
   crear: (movimiento: Partial<MovimientoInventario>) => apiClient.post<MovimientoInventario>('/movimientos-inventario/', movimiento),
 };
 
 export const ordenesCompraApi = {
-  obtenerTodos: () => apiClient.get<OrdenCompra[]>('/ordenes-compra/'),
+  obtenerTodos: () => apiClient.getTodos<OrdenCompra>('/ordenes-compra/'),
   obtenerPorId: (id: string) => apiClient.get<OrdenCompra>(`/ordenes-compra/${id}`),
   crear: (orden: Partial<OrdenCompra>) => apiClient.post<OrdenCompra>('/ordenes-compra/', orden),
   actualizar: (id: string, orden: Partial<OrdenCompra>) => apiClient.put<OrdenCompra>(`/ordenes-compra/${id}`, orden),
@@ -150,6 +150,13 @@ export interface Receta {
     ingredientes: IngredienteReceta[];
 }
 
+export interface DisponibilidadReceta {
+    receta_id: string;
+    nombre: string;
+    porciones_disponibles: number | null; // null: no descuenta inventario
+    disponible: boolean;
+}
+
 export interface RecipeCreate {
     nombre: string;
     descripcion?: string;